@@ -0,0 +1,318 @@
+import io
+import os
+import time
+import uuid
+import asyncio
+import zipfile
+from typing import Optional, List, Dict, Any
+from fastapi import HTTPException, UploadFile
+
+from pipeline import run_analysis, validate_upload, ALLOWED_EXTENSIONS
+from utils.analysis_cache import hash_job_description
+from utils.uploads import StoredUpload, ingest_upload, UPLOAD_CHUNK_SIZE
+from utils.serialization import dumps, loads
+from utils.shared_store import SharedStore, shared_store
+
+BATCH_MAX_ITEMS = int(os.environ.get("BATCH_MAX_ITEMS", 500))
+BATCH_MAX_FILE_BYTES = int(os.environ.get("BATCH_MAX_FILE_BYTES", 10 * 1024 * 1024))
+# Cap on the whole batch: direct files plus the uncompressed zip members.
+BATCH_MAX_TOTAL_BYTES = int(os.environ.get("BATCH_MAX_TOTAL_BYTES", 256 * 1024 * 1024))
+BATCH_ITEM_CONCURRENCY = int(os.environ.get("BATCH_ITEM_CONCURRENCY", 16))
+BATCH_LLM_CONCURRENCY = int(os.environ.get("BATCH_LLM_CONCURRENCY", 4))
+BATCH_TTL = int(os.environ.get("BATCH_TTL", 3600))
+# Seconds between progress snapshots written to the shared store.
+BATCH_PUBLISH_INTERVAL = 1.0
+
+# Rank order for items that have no score yet.
+_STATUS_RANK = {"done": 0, "running": 1, "pending": 1, "failed": 2}
+
+
+def _size_error(filename: str, limit: int) -> str:
+    """413 detail for a file cut off at `limit`, which is below the per-file cap once the batch budget runs low."""
+    if limit < BATCH_MAX_FILE_BYTES:
+        return f"Batch exceeds {BATCH_MAX_TOTAL_BYTES} bytes"
+    return f"{filename} exceeds {BATCH_MAX_FILE_BYTES} bytes"
+
+
+def _extract_member(archive: zipfile.ZipFile, info: zipfile.ZipInfo, max_bytes: int) -> StoredUpload:
+    """
+    Decompress one member in chunks straight into a temp file.
+    Counts the bytes actually produced, since a zip header's size can lie.
+    """
+    upload = StoredUpload(os.path.basename(info.filename), spool_bytes=0)
+    try:
+        with archive.open(info) as member:
+            while True:
+                chunk = member.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                if upload.size + len(chunk) > max_bytes:
+                    raise HTTPException(status_code=413, detail=_size_error(info.filename, max_bytes))
+                upload.write(chunk)
+        upload.finish()
+        return upload
+    except BaseException:
+        upload.close()
+        raise
+
+
+def unpack_zip(archive_upload: StoredUpload, budget: int = BATCH_MAX_TOTAL_BYTES) -> List[StoredUpload]:
+    """
+    Extract resume files from an uploaded zip archive into temp files.
+    Skips folders, macOS metadata and unsupported extensions; refuses
+    members larger than BATCH_MAX_FILE_BYTES uncompressed, and archives
+    whose members add up to more than `budget` bytes. Blocking.
+    """
+    source = archive_upload.source()
+    try:
+        archive = zipfile.ZipFile(source if isinstance(source, str) else io.BytesIO(source))
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="Archive is not a valid zip file")
+
+    files: List[StoredUpload] = []
+    try:
+        with archive:
+            for info in archive.infolist():
+                name = info.filename
+                if info.is_dir() or name.startswith("__MACOSX/") or os.path.basename(name).startswith("."):
+                    continue
+                if not name.lower().endswith(ALLOWED_EXTENSIONS):
+                    continue
+                if info.file_size > BATCH_MAX_FILE_BYTES:
+                    raise HTTPException(status_code=413, detail=f"{name} exceeds {BATCH_MAX_FILE_BYTES} bytes")
+                if info.file_size > budget:
+                    raise HTTPException(status_code=413, detail=f"Batch exceeds {BATCH_MAX_TOTAL_BYTES} bytes")
+                upload = _extract_member(archive, info, min(BATCH_MAX_FILE_BYTES, budget))
+                files.append(upload)
+                budget -= upload.size
+                if len(files) > BATCH_MAX_ITEMS:
+                    break
+    except BaseException:
+        for upload in files:
+            upload.close()
+        raise
+    return files
+
+
+async def collect_files(resumes: List[UploadFile], archive: Optional[UploadFile]) -> List[StoredUpload]:
+    """
+    Spool the posted resumes and zip members to temp files.
+    Each file is capped at BATCH_MAX_FILE_BYTES and the batch as a whole at
+    BATCH_MAX_TOTAL_BYTES; on any error the files written so far are removed.
+    """
+    if len(resumes) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {BATCH_MAX_ITEMS} resumes")
+    files: List[StoredUpload] = []
+    try:
+        budget = BATCH_MAX_TOTAL_BYTES
+        for resume in resumes:
+            limit = min(BATCH_MAX_FILE_BYTES, budget)
+            try:
+                upload = await ingest_upload(resume, limit, spool_bytes=0)
+            except HTTPException as e:
+                if e.status_code == 413:
+                    raise HTTPException(status_code=413, detail=_size_error(resume.filename or "", limit))
+                raise
+            files.append(upload)
+            budget -= upload.size
+        if archive is not None:
+            stored_archive = await ingest_upload(archive, BATCH_MAX_TOTAL_BYTES)
+            try:
+                files.extend(await asyncio.to_thread(unpack_zip, stored_archive, budget))
+            finally:
+                stored_archive.close()
+        return files
+    except BaseException:
+        for upload in files:
+            upload.close()
+        raise
+
+
+class BatchRun:
+    """One job description scored against many resumes, processed in the background."""
+
+    def __init__(self, job_description: str, files: List[StoredUpload]):
+        self.id = uuid.uuid4().hex
+        self.job_description = job_description
+        self.jd_hash = hash_job_description(job_description)
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.items: List[Dict[str, Any]] = [
+            {"index": i, "filename": upload.filename, "status": "pending", "score": None, "error": None, "result": None}
+            for i, upload in enumerate(files)
+        ]
+        # Spooled to temp files by the route; each is removed once its item is processed.
+        self._uploads: List[Optional[StoredUpload]] = list(files)
+        self.task: Optional[asyncio.Task] = None
+        self._published_at = 0.0
+
+    @classmethod
+    def from_snapshot(cls, data: bytes) -> "BatchRun":
+        """Read-only copy of a batch running in another worker process."""
+        state = loads(data)
+        batch = cls("", [])
+        batch.id = state["batch_id"]
+        batch.created_at = state["created_at"]
+        batch.finished_at = state["finished_at"]
+        batch.items = state["items"]
+        return batch
+
+    def _snapshot(self) -> bytes:
+        return dumps({
+            "batch_id": self.id,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "items": self.items,
+        })
+
+    async def _publish(self, shared: Optional[SharedStore], force: bool = False) -> None:
+        """Write progress to the shared store so any worker can answer polls."""
+        if shared is None or (not force and time.monotonic() - self._published_at < BATCH_PUBLISH_INTERVAL):
+            return
+        self._published_at = time.monotonic()
+        try:
+            await asyncio.to_thread(lambda: shared.put("batch", self.id, self._snapshot(), BATCH_TTL * 2))
+        except Exception as e:
+            print(f"❌ Batch {self.id[:8]} snapshot error: {e}")
+
+    async def run(self, llm_slots: asyncio.Semaphore, shared: Optional[SharedStore] = None) -> None:
+        item_slots = asyncio.Semaphore(BATCH_ITEM_CONCURRENCY)
+        await self._publish(shared, force=True)
+
+        async def process(item: Dict[str, Any]) -> None:
+            async with item_slots:
+                upload = self._uploads[item["index"]]
+                item["status"] = "running"
+                try:
+                    validate_upload(upload)
+                    result = await run_analysis(
+                        upload,
+                        self.job_description,
+                        jd_hash=self.jd_hash,
+                        llm_slots=llm_slots
+                    )
+                    item["result"] = result
+                    item["score"] = result.get("score")
+                    item["status"] = "done" if result.get("score") is not None else "failed"
+                    if item["status"] == "failed":
+                        item["error"] = "No valid LLM responses received"
+                except HTTPException as e:
+                    item["status"] = "failed"
+                    item["error"] = e.detail
+                except asyncio.CancelledError:
+                    item["status"] = "failed"
+                    item["error"] = "Analysis was cancelled"
+                    # Only a stray cancellation is contained here; a cancelled batch still stops.
+                    if asyncio.current_task().cancelling():
+                        raise
+                except Exception as e:
+                    print(f"Batch {self.id[:8]} item {item['filename']} failed: {e}")
+                    item["status"] = "failed"
+                    item["error"] = f"Analysis failed: {str(e)}"
+                finally:
+                    upload.close()
+                    self._uploads[item["index"]] = None
+                await self._publish(shared)
+
+        try:
+            await asyncio.gather(*[process(item) for item in self.items])
+        finally:
+            self.release()
+            for item in self.items:
+                if item["status"] in ("pending", "running"):
+                    item["status"] = "failed"
+                    item["error"] = "Batch was cancelled"
+            self.finished_at = time.time()
+            await self._publish(shared, force=True)
+            print(f"📦 Batch {self.id[:8]} finished: {self.counts()}")
+
+    def release(self) -> None:
+        """Remove the temp files of items that never ran (batch cancelled on shutdown)."""
+        for index, upload in enumerate(self._uploads):
+            if upload is not None:
+                upload.close()
+                self._uploads[index] = None
+
+    def counts(self) -> Dict[str, int]:
+        counts = {"pending": 0, "running": 0, "done": 0, "failed": 0}
+        for item in self.items:
+            counts[item["status"]] += 1
+        return counts
+
+    def summary(self) -> Dict[str, Any]:
+        counts = self.counts()
+        return {
+            "batch_id": self.id,
+            "status": "completed" if self.finished_at else "running",
+            "total": len(self.items),
+            **counts,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+    def page(self, page: int, page_size: int) -> Dict[str, Any]:
+        """Items ranked by score (best first), unscored and failed items last."""
+        ranked = sorted(
+            self.items,
+            key=lambda item: (_STATUS_RANK[item["status"]], -(item["score"] or 0), item["index"])
+        )
+        start = (page - 1) * page_size
+        return {
+            **self.summary(),
+            "page": page,
+            "page_size": page_size,
+            "pages": max(1, -(-len(ranked) // page_size)),
+            "items": ranked[start:start + page_size],
+        }
+
+
+class BatchManager:
+    """
+    Keeps batch runs in memory for BATCH_TTL seconds after they finish.
+    With a shared store, progress is also published there so a poll that
+    lands on another worker process still finds the batch.
+    """
+
+    def __init__(self, shared: Optional[SharedStore] = shared_store):
+        self._batches: Dict[str, BatchRun] = {}
+        self._llm_slots: Optional[asyncio.Semaphore] = None
+        self.shared = shared
+
+    def submit(self, job_description: str, files: List[StoredUpload]) -> BatchRun:
+        if not files:
+            raise HTTPException(status_code=400, detail="No resume files in batch")
+        if len(files) > BATCH_MAX_ITEMS:
+            raise HTTPException(status_code=413, detail=f"Batch exceeds {BATCH_MAX_ITEMS} resumes")
+        self._expire()
+        # One semaphore across all batches so concurrent batches share the LLM budget.
+        if self._llm_slots is None:
+            self._llm_slots = asyncio.Semaphore(BATCH_LLM_CONCURRENCY)
+        batch = BatchRun(job_description, files)
+        batch.task = asyncio.create_task(batch.run(self._llm_slots, self.shared))
+        self._batches[batch.id] = batch
+        return batch
+
+    def get(self, batch_id: str) -> Optional[BatchRun]:
+        return self._batches.get(batch_id)
+
+    async def find(self, batch_id: str) -> Optional[BatchRun]:
+        """Batch from this process, else its latest snapshot in the shared store."""
+        batch = self.get(batch_id)
+        if batch is not None or self.shared is None:
+            return batch
+        data = await asyncio.to_thread(self.shared.get, "batch", batch_id)
+        return BatchRun.from_snapshot(data) if data is not None else None
+
+    def _expire(self) -> None:
+        now = time.time()
+        for batch_id, batch in list(self._batches.items()):
+            if batch.finished_at and now - batch.finished_at > BATCH_TTL:
+                del self._batches[batch_id]
+
+    async def shutdown(self) -> None:
+        for batch in self._batches.values():
+            if batch.task is not None and not batch.task.done():
+                batch.task.cancel()
+
+
+batch_manager = BatchManager()
@@ -0,0 +1,213 @@
+"""
+Generate a resume corpus for the benchmarks: PDFs and DOCX files of varying
+page counts and layouts, built without network access or extra tools.
+
+PDF layouts:
+  single   one text column per page
+  columns  two text columns per page (the order pypdf reads them in varies)
+  scanned  every third page has no text layer, which sends pypdf to the
+           pdfplumber per-page fallback
+DOCX layouts:
+  paragraphs  headings and bullet paragraphs
+  table       skills and experience laid out in a table
+
+Resumes link to `http://127.0.0.1:<stub port>/portfolio/...`, so link
+fetching hits the local stub sites (see bench.stub_sites).
+
+Run from engine/:  python -m bench.corpus [--out bench/corpus] [--stub-port 8766]
+"""
+import io
+import os
+import random
+import argparse
+from typing import List, Tuple
+
+STUB_PORT = int(os.environ.get("BENCH_STUB_PORT", 8766))
+PAGE_COUNTS = (1, 2, 5, 20, 60)
+PDF_LAYOUTS = ("single", "columns", "scanned")
+DOCX_LAYOUTS = ("paragraphs", "table")
+
+SKILLS = [
+    "Python", "Go", "TypeScript", "React", "Node.js", "PostgreSQL", "Redis", "Kafka", "Docker",
+    "Kubernetes", "AWS", "GCP", "Terraform", "FastAPI", "Django", "GraphQL", "CI/CD", "Airflow",
+    "Spark", "PyTorch", "scikit-learn", "Prometheus", "gRPC", "Rust", "Java", "Elasticsearch",
+]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Labs", "Hooli", "Stark Industries", "Wayne Tech"]
+VERBS = ["Built", "Designed", "Led", "Migrated", "Scaled", "Automated", "Optimized", "Shipped"]
+THINGS = [
+    "a payments service", "the search indexing pipeline", "an internal developer platform",
+    "a real-time analytics dashboard", "the recommendation API", "a multi-region Postgres cluster",
+    "the CI/CD system", "an event-driven order workflow",
+]
+
+JOB_DESCRIPTION = """Senior Backend Engineer
+
+We are looking for a senior backend engineer to design and scale our data platform.
+
+Requirements:
+- 5+ years of experience building production services in Python or Go
+- Strong knowledge of PostgreSQL, Redis and Kafka
+- Experience running services on Kubernetes in AWS or GCP
+- Familiarity with CI/CD, Terraform and observability tooling (Prometheus, Grafana)
+- Experience with FastAPI or Django
+
+Nice to have:
+- Rust or Java
+- Spark or Airflow data pipelines
+- Mentoring engineers and leading design reviews
+"""
+
+
+def resume_lines(seed: int, lines: int, stub_port: int = STUB_PORT) -> List[str]:
+    """Deterministic resume text, roughly `lines` lines long."""
+    rng = random.Random(seed)
+    name = f"Candidate {seed}"
+    out = [
+        name,
+        f"{name.lower().replace(' ', '.')}@example.com | +1 555 {seed:04d}",
+        f"Portfolio: http://127.0.0.1:{stub_port}/portfolio/{seed}",
+        f"Projects: http://127.0.0.1:{stub_port}/personal/{seed}/projects",
+        "",
+        "SUMMARY",
+        f"Backend engineer with {rng.randint(2, 12)} years of experience in {', '.join(rng.sample(SKILLS, 4))}.",
+        "",
+        "SKILLS",
+        ", ".join(rng.sample(SKILLS, 10)),
+        "",
+        "EXPERIENCE",
+    ]
+    while len(out) < lines - 6:
+        out.append(f"{rng.choice(COMPANIES)} - Senior Engineer ({rng.randint(2012, 2020)}-{rng.randint(2021, 2025)})")
+        for _ in range(rng.randint(3, 6)):
+            out.append(
+                f"- {rng.choice(VERBS)} {rng.choice(THINGS)} using {rng.choice(SKILLS)} and {rng.choice(SKILLS)}, "
+                f"cutting latency by {rng.randint(10, 80)}%"
+            )
+        out.append("")
+    out += ["EDUCATION", "B.Sc. Computer Science, State University", "", "INTERESTS", "Climbing, chess"]
+    return out[:max(lines, 12)]
+
+
+# ---------------------------------------------------------------- PDF
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _text_block(lines: List[str], x: int, width_chars: int) -> str:
+    ops = [f"BT /F1 9 Tf 12 TL {x} 800 Td"]
+    for line in lines:
+        ops.append(f"({_pdf_escape(line[:width_chars])}) Tj T*")
+    ops.append("ET")
+    return "\n".join(ops)
+
+
+def make_pdf(pages: List[str]) -> bytes:
+    """Minimal PDF with one content stream per page and a standard Helvetica font."""
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in below
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    kids = []
+    for stream in pages:
+        data = stream.encode("latin-1", errors="replace")
+        objects.append(f"<< /Length {len(data)} >>\nstream\n{data.decode('latin-1')}\nendstream")
+        content_id = len(objects)
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return out.getvalue()
+
+
+def resume_pdf(seed: int, page_count: int, layout: str = "single", stub_port: int = STUB_PORT) -> bytes:
+    lines_per_page = 64
+    per_page = lines_per_page * (2 if layout == "columns" else 1)
+    text = resume_lines(seed, per_page * page_count, stub_port)
+    streams = []
+    for page in range(page_count):
+        chunk = text[page * per_page:(page + 1) * per_page]
+        if layout == "scanned" and page % 3 == 2:
+            # A drawn box and no text: what an image-only page looks like to pypdf.
+            streams.append("0.9 g 50 50 495 742 re f")
+        elif layout == "columns":
+            streams.append(_text_block(chunk[:lines_per_page], 40, 60) + "\n" + _text_block(chunk[lines_per_page:], 310, 60))
+        else:
+            streams.append(_text_block(chunk, 50, 110))
+    return make_pdf(streams)
+
+
+# ---------------------------------------------------------------- DOCX
+
+def resume_docx(seed: int, page_count: int, layout: str = "paragraphs", stub_port: int = STUB_PORT) -> bytes:
+    from docx import Document
+
+    text = resume_lines(seed, 50 * page_count, stub_port)
+    document = Document()
+    if layout == "table":
+        table = document.add_table(rows=0, cols=2)
+        for left, right in zip(text[0::2], text[1::2]):
+            cells = table.add_row().cells
+            cells[0].text = left
+            cells[1].text = right
+    else:
+        for line in text:
+            if line.isupper():
+                document.add_heading(line.title(), level=2)
+            elif line:
+                document.add_paragraph(line.lstrip("- "), style="List Bullet" if line.startswith("- ") else None)
+    out = io.BytesIO()
+    document.save(out)
+    return out.getvalue()
+
+
+def build_corpus(stub_port: int = STUB_PORT, page_counts: Tuple[int, ...] = PAGE_COUNTS) -> List[Tuple[str, bytes]]:
+    """All corpus documents as (filename, bytes), in a stable order."""
+    files = []
+    seed = 0
+    for pages in page_counts:
+        for layout in PDF_LAYOUTS:
+            seed += 1
+            files.append((f"resume_{pages:02d}p_{layout}.pdf", resume_pdf(seed, pages, layout, stub_port)))
+        for layout in DOCX_LAYOUTS:
+            seed += 1
+            try:
+                files.append((f"resume_{pages:02d}p_{layout}.docx", resume_docx(seed, pages, layout, stub_port)))
+            except ImportError:
+                print("python-docx not installed, skipping DOCX corpus")
+    return files
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default=os.path.join(os.path.dirname(__file__), "corpus"))
+    parser.add_argument("--stub-port", type=int, default=STUB_PORT)
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    files = build_corpus(args.stub_port)
+    for filename, content in files:
+        with open(os.path.join(args.out, filename), "wb") as f:
+            f.write(content)
+    with open(os.path.join(args.out, "job_description.txt"), "w") as f:
+        f.write(JOB_DESCRIPTION)
+    print(f"Wrote {len(files)} documents to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
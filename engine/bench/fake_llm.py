@@ -0,0 +1,193 @@
+"""
+Local OpenAI-compatible chat completions server standing in for the LLM
+providers, with configurable latency and failure rates.
+
+The Ollama and OpenAI providers are ChatOpenAI clients, so pointing them
+here needs no code changes:
+
+    OLLAMA_API_KEY=fake OLLAMA_URL=http://127.0.0.1:8765/v1
+    OPENAI_API_KEY=fake OPENAI_API_BASE=http://127.0.0.1:8765/v1 OPENAI_BASE_URL=http://127.0.0.1:8765/v1
+    GOOGLE_API_KEY=      (Gemini has no local stand-in; leave it unset)
+
+Responses are valid `ResumeAnalysis` JSON whose scores are derived from a
+hash of the prompt, so the same prompt always gets the same answer.
+Latency and failures can differ per model name (`--model-latency
+gpt-4-turbo-preview=3000`), which makes the consensus deadline and quorum
+paths reproducible.
+
+Run from engine/:  python -m bench.fake_llm [--port 8765] [--latency-ms 800]
+                   [--jitter-ms 400] [--failure-rate 0.05] [--rate-limit-rate 0.02]
+"""
+import re
+import json
+import time
+import random
+import asyncio
+import hashlib
+import argparse
+from typing import Optional, List, Dict, Any
+
+from aiohttp import web
+
+FAKE_LLM_PORT = 8765
+_WORD_RE = re.compile(r"[A-Za-z][A-Za-z0-9+#./-]{2,}")
+
+
+def fake_analysis(prompt: str) -> Dict[str, Any]:
+    """A deterministic, schema-valid analysis for `prompt`."""
+    digest = hashlib.sha256(prompt.encode("utf-8", errors="replace")).digest()
+    breakdown = {
+        category: 40 + digest[i] % 56
+        for i, category in enumerate(("skills", "experience", "projects", "quality", "education", "external"))
+    }
+    score = round(
+        0.35 * breakdown["skills"] + 0.20 * breakdown["experience"] + 0.20 * breakdown["projects"]
+        + 0.15 * breakdown["quality"] + 0.05 * breakdown["education"] + 0.05 * breakdown["external"]
+    )
+    jd = prompt.split("### Job Description:", 1)[-1][:4000]
+    terms = []
+    for word in _WORD_RE.findall(jd):
+        if word[0].isupper() and word not in terms:
+            terms.append(word)
+    terms = (terms + ["Kubernetes", "Terraform", "Kafka", "Observability", "Mentoring"])[:8]
+    return {
+        "score": score,
+        "breakdown": breakdown,
+        "strengths": [f"Hands-on experience with {terms[0]}", f"Delivered projects involving {terms[1]}"],
+        "weaknesses": [f"Little evidence of {terms[-1]}", f"No mention of {terms[-2]}"],
+        "suggested_keywords": terms[:6],
+        "highlight_pairs": [{"jd_phrase": term, "resume_excerpt": f"Worked with {term}"} for term in terms[:3]],
+    }
+
+
+class FakeLLM:
+    """
+    aiohttp application serving `/v1/chat/completions` and `/v1/models`.
+    Args:
+        latency_ms: Base response latency
+        jitter_ms: Uniform random latency added on top
+        failure_rate: Share of calls answered with a 500
+        rate_limit_rate: Share of calls answered with a 429
+        model_latency_ms: Per-model base latency overrides
+        seed: Random seed for latency and failure draws
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 800,
+        jitter_ms: float = 400,
+        failure_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        model_latency_ms: Optional[Dict[str, float]] = None,
+        seed: int = 0
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.model_latency_ms = model_latency_ms or {}
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self.failures = 0
+        self.rate_limited = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=32 * 1024 * 1024)
+        app.router.add_post("/v1/chat/completions", self.chat_completions)
+        app.router.add_get("/v1/models", self.models)
+        app.router.add_get("/stats", self.stats)
+        return app
+
+    async def chat_completions(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        model = body.get("model", "fake")
+        prompt = "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            base = self.model_latency_ms.get(model, self.latency_ms)
+            await asyncio.sleep((base + self.rng.uniform(0, self.jitter_ms)) / 1000)
+            draw = self.rng.random()
+            if draw < self.rate_limit_rate:
+                self.rate_limited += 1
+                return web.json_response(
+                    {"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}},
+                    status=429,
+                    headers={"Retry-After": "1"}
+                )
+            if draw < self.rate_limit_rate + self.failure_rate:
+                self.failures += 1
+                return web.json_response({"error": {"message": "Injected failure", "type": "server_error"}}, status=500)
+
+            content = json.dumps(fake_analysis(prompt))
+            prompt_tokens = len(prompt) // 4
+            completion_tokens = len(content) // 4
+            return web.json_response({
+                "id": f"chatcmpl-fake-{self.calls}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            })
+        finally:
+            self.in_flight -= 1
+
+    async def models(self, request: web.Request) -> web.Response:
+        return web.json_response({"object": "list", "data": [{"id": "fake", "object": "model"}]})
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            "calls": self.calls,
+            "failures": self.failures,
+            "rate_limited": self.rate_limited,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+        })
+
+
+async def start_server(app: web.Application, port: int, host: str = "127.0.0.1") -> web.AppRunner:
+    """Serve `app` in the running loop; call `await runner.cleanup()` to stop it."""
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+def parse_model_latency(values: List[str]) -> Dict[str, float]:
+    overrides = {}
+    for value in values:
+        model, _, ms = value.rpartition("=")
+        overrides[model] = float(ms)
+    return overrides
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=FAKE_LLM_PORT)
+    parser.add_argument("--latency-ms", type=float, default=800)
+    parser.add_argument("--jitter-ms", type=float, default=400)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--model-latency", action="append", default=[], metavar="MODEL=MS")
+    args = parser.parse_args()
+
+    fake = FakeLLM(args.latency_ms, args.jitter_ms, args.failure_rate, args.rate_limit_rate,
+                   parse_model_latency(args.model_latency))
+    print(f"Fake LLM on http://127.0.0.1:{args.port}/v1")
+    web.run_app(fake.app(), host="127.0.0.1", port=args.port, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Compare the previous external-page parsing path with the current one.
+
+Old: whole body, BeautifulSoup "html.parser", full tree + decompose.
+New: body capped at EXTERNAL_FETCH_MAX_BYTES, lxml (when installed) and a
+per-site SoupStrainer, via `utils.url_fetcher.parse_html`.
+
+The old path slows down sharply with page size (about 100 s for the 6 MB
+page), so that case only runs with --large and times the old path once.
+
+Run from engine/:  python -m bench.html_parse [--runs 3] [--large]
+"""
+import argparse
+import statistics
+import time
+
+from bs4 import BeautifulSoup
+
+from utils.url_fetcher import parse_html, _parse_generic, _parse_github, EXTERNAL_FETCH_MAX_BYTES, html_parser
+
+
+def portfolio_page(paragraphs: int) -> str:
+    nav = "<nav><ul>" + "".join(f"<li><a href='/p{i}'>Navigation link {i}</a></li>" for i in range(50)) + "</ul></nav>"
+    body = "".join(
+        f"<section><div class='card'><h3>Project {i}</h3><p>Built a service handling {i} requests per second "
+        f"with Python, Go and Postgres.</p><span class='tag'>tag{i}</span><img src='/i{i}.png'></div></section>"
+        for i in range(paragraphs)
+    )
+    script = "<script>" + "var x = 1;" * 20000 + "</script>"
+    return f"<html><head><style>body{{}}</style>{script}</head><body>{nav}<main>{body}</main><footer>f</footer></body></html>"
+
+
+def github_profile_page(repos: int) -> str:
+    noise = "".join(f"<div class='d-flex'><a class='Link'>item {i}</a><svg><path d='M0 0'/></svg></div>" for i in range(repos * 40))
+    pinned = "".join(f"<span class='repo'>repo-{i}</span>" for i in range(repos))
+    return (
+        "<html><body><div class='p-note user-profile-bio'>Go and Python developer</div>"
+        f"{pinned}<span class='Counter'>42</span>{noise}</body></html>"
+    )
+
+
+def legacy_parse(html: str, url: str):
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(['script', 'style', 'nav', 'footer', 'header',
+                     'aside', 'form', 'button', 'iframe', 'noscript']):
+        tag.decompose()
+    main_content = None
+    if 'github.com' in url:
+        main_content = _parse_github(soup, url)
+    if not main_content:
+        main_content = _parse_generic(soup)
+    return main_content
+
+
+def current_parse(html: str, url: str):
+    capped = html.encode("utf-8")[:EXTERNAL_FETCH_MAX_BYTES].decode("utf-8", errors="replace")
+    return parse_html(capped, url)
+
+
+def timed(fn, html: str, url: str, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn(html, url)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--large", action="store_true", help="add the 6 MB portfolio page (old path timed once)")
+    args = parser.parse_args()
+
+    cases = [
+        ("portfolio", portfolio_page(600), "https://jane.dev", args.runs),
+        ("portfolio, long", portfolio_page(7000), "https://jane.dev", args.runs),
+        ("github profile", github_profile_page(250), "https://github.com/jane", args.runs),
+    ]
+    if args.large:
+        cases.append(("portfolio, huge", portfolio_page(30000), "https://jane.dev", 1))
+    print(f"parser={html_parser()} cap={EXTERNAL_FETCH_MAX_BYTES} bytes runs={args.runs}")
+    print(f"{'page':<22}{'size':>10}{'old ms':>10}{'new ms':>10}{'speedup':>9}")
+    for name, html, url, old_runs in cases:
+        old = timed(legacy_parse, html, url, old_runs)
+        new = timed(current_parse, html, url, args.runs)
+        print(f"{name:<22}{len(html) // 1024:>8}KB{old:>10.1f}{new:>10.1f}{old / new:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Load generator for /analyze. Reports throughput, latency percentiles,
+status codes and the median of each Server-Timing stage.
+
+By default everything runs in this process and offline: the fake LLM
+(bench.fake_llm) and stub sites (bench.stub_sites) are started on local
+ports, the providers are pointed at them through the environment, and the
+FastAPI app is driven through httpx's ASGI transport with its lifespan
+running. The database and text cache go to a temporary directory.
+With `--url` an already running engine is targeted instead (start the fake
+LLM and stub sites yourself and configure that engine to use them).
+
+Run from engine/:  python -m bench.load [--requests 200] [--concurrency 16]
+                   [--mode full|fast] [--bust-cache] [--llm-latency-ms 800]
+                   [--llm-failure-rate 0.05] [--site-latency-ms 150]
+                   [--site-failure-rate 0.1] [--url http://127.0.0.1:8080]
+"""
+import os
+import time
+import uuid
+import asyncio
+import argparse
+import tempfile
+import statistics
+from collections import Counter
+from typing import List, Dict, Tuple, Optional
+
+from bench.corpus import build_corpus, JOB_DESCRIPTION, STUB_PORT, PAGE_COUNTS
+from bench.fake_llm import FakeLLM, FAKE_LLM_PORT, start_server
+from bench.stub_sites import StubSites, start_stub_sites
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def parse_server_timing(header: Optional[str]) -> Dict[str, float]:
+    timings = {}
+    for entry in (header or "").split(","):
+        name, _, params = entry.strip().partition(";")
+        if params.startswith("dur="):
+            try:
+                timings[name] = float(params[4:])
+            except ValueError:
+                pass
+    return timings
+
+
+def offline_env(workdir: str, llm_port: int) -> Dict[str, str]:
+    """Environment that routes every provider to the fake LLM and keeps state in `workdir`."""
+    base = f"http://127.0.0.1:{llm_port}/v1"
+    return {
+        "GOOGLE_API_KEY": "",
+        "OLLAMA_API_KEY": "fake",
+        "OLLAMA_URL": base,
+        "OPENAI_API_KEY": "fake",
+        "OPENAI_API_BASE": base,
+        "OPENAI_BASE_URL": base,
+        "LLM_WARMUP": "false",
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        "TEXT_CACHE_PATH": os.path.join(workdir, "text_cache.db"),
+    }
+
+
+class LoadRun:
+    def __init__(self, files: List[Tuple[str, bytes]], mode: str, bust_cache: bool):
+        self.files = files
+        self.mode = mode
+        self.bust_cache = bust_cache
+        self.latencies: List[float] = []
+        self.statuses: Counter = Counter()
+        self.stages: Dict[str, List[float]] = {}
+
+    def request_body(self, index: int) -> Tuple[Dict, Dict]:
+        filename, content = self.files[index % len(self.files)]
+        job_description = JOB_DESCRIPTION
+        if self.bust_cache:
+            nonce = uuid.uuid4().hex
+            job_description += f"\nReference: {nonce}\n"
+            if filename.endswith(".pdf"):
+                # A trailing comment changes the hash, so extraction runs again too.
+                content = content + f"%{nonce}\n".encode()
+        return {"resume": (filename, content)}, {"jd": job_description}
+
+    async def one(self, client, index: int) -> None:
+        files, data = self.request_body(index)
+        started = time.perf_counter()
+        try:
+            response = await client.post("/analyze", params={"mode": self.mode}, files=files, data=data)
+            status = str(response.status_code)
+            for name, ms in parse_server_timing(response.headers.get("Server-Timing")).items():
+                self.stages.setdefault(name, []).append(ms)
+        except Exception as e:
+            status = type(e).__name__
+        self.latencies.append((time.perf_counter() - started) * 1000)
+        self.statuses[status] += 1
+
+    async def drive(self, client, total: int, concurrency: int) -> float:
+        queue: asyncio.Queue = asyncio.Queue()
+        for index in range(total):
+            queue.put_nowait(index)
+
+        async def worker() -> None:
+            while not queue.empty():
+                await self.one(client, queue.get_nowait())
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        return time.perf_counter() - started
+
+    def print_report(self, elapsed: float) -> None:
+        ordered = sorted(self.latencies)
+        print(f"requests={len(ordered)} elapsed={elapsed:.2f}s throughput={len(ordered) / elapsed:.2f} req/s")
+        print(f"latency ms  p50={percentile(ordered, 0.50):.1f}  p95={percentile(ordered, 0.95):.1f}  "
+              f"p99={percentile(ordered, 0.99):.1f}  max={ordered[-1] if ordered else 0:.1f}")
+        print(f"status      {dict(self.statuses)}")
+        if self.stages:
+            print("stage medians (ms, from Server-Timing):")
+            for name, samples in self.stages.items():
+                print(f"  {name:<12}{statistics.median(samples):>10.1f}  (n={len(samples)})")
+
+
+async def run_in_process(args, run: LoadRun) -> None:
+    workdir = tempfile.mkdtemp(prefix="resumescore-bench-")
+    os.environ.update(offline_env(workdir, args.llm_port))
+
+    fake = FakeLLM(args.llm_latency_ms, args.llm_jitter_ms, args.llm_failure_rate, args.llm_rate_limit_rate)
+    stubs = StubSites(args.site_latency_ms, args.site_jitter_ms, args.site_failure_rate)
+    runners = [await start_server(fake.app(), args.llm_port), await start_stub_sites(stubs, args.stub_port)]
+
+    import httpx
+    from engine import app
+
+    try:
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=args.timeout) as client:
+                elapsed = await run.drive(client, args.requests, args.concurrency)
+        run.print_report(elapsed)
+        print(f"fake LLM    calls={fake.calls} failures={fake.failures} rate_limited={fake.rate_limited} "
+              f"max_in_flight={fake.max_in_flight}")
+        print(f"stub sites  requests={stubs.requests} not_modified={stubs.not_modified} failures={stubs.failures}")
+        print(f"state in    {workdir}")
+    finally:
+        for runner in runners:
+            await runner.cleanup()
+
+
+async def run_remote(args, run: LoadRun) -> None:
+    import httpx
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout) as client:
+        elapsed = await run.drive(client, args.requests, args.concurrency)
+    run.print_report(elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--mode", choices=("full", "fast"), default="full")
+    parser.add_argument("--bust-cache", action="store_true", help="Make every request unique so no cache answers it")
+    parser.add_argument("--url", help="Target a running engine instead of an in-process one")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--llm-port", type=int, default=FAKE_LLM_PORT)
+    parser.add_argument("--llm-latency-ms", type=float, default=800)
+    parser.add_argument("--llm-jitter-ms", type=float, default=400)
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0)
+    parser.add_argument("--llm-rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--stub-port", type=int, default=STUB_PORT)
+    parser.add_argument("--site-latency-ms", type=float, default=150)
+    parser.add_argument("--site-jitter-ms", type=float, default=100)
+    parser.add_argument("--site-failure-rate", type=float, default=0.0)
+    parser.add_argument("--max-pages", type=int, default=20, help="Skip corpus documents longer than this")
+    args = parser.parse_args()
+
+    pages = tuple(p for p in PAGE_COUNTS if p <= args.max_pages)
+    run = LoadRun(build_corpus(args.stub_port, pages), args.mode, args.bust_cache)
+    if args.url:
+        asyncio.run(run_remote(args, run))
+    else:
+        asyncio.run(run_in_process(args, run))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Micro-benchmarks for the CPU-bound pieces of /analyze, on the generated
+corpus (see bench.corpus). No network access needed.
+
+  pdf     each pdf_parser strategy: pypdf page ranges (with the per-page
+          pdfplumber fallback), whole-document pdfplumber and python-docx
+  pool    extract_text_from_pdf through the extraction process pool
+  urls    extract_urls on resume texts of growing length
+  html    url_fetcher.parse_html on portfolio and GitHub-like pages
+  combine combine_analyses over 1-5 provider results
+
+Run from engine/:  python -m bench.micro [--runs 5] [--only pdf,pool,urls,html,combine]
+"""
+import asyncio
+import argparse
+import statistics
+import time
+from typing import Callable, List
+
+from bench.corpus import build_corpus, resume_lines
+from bench.fake_llm import fake_analysis
+from bench.html_parse import portfolio_page, github_profile_page
+
+
+def measure(fn: Callable[[], object], runs: int) -> List[float]:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def report(name: str, samples: List[float]) -> None:
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    print(f"{name:<44}{statistics.median(samples):>10.2f}{p95:>10.2f}{min(samples):>10.2f}")
+
+
+def bench_pdf(runs: int) -> None:
+    from utils.pdf_parser import extract_pdf_pages, _extract_from_pdf_pdfplumber, _extract_from_docx, detect_format
+
+    for filename, content in build_corpus():
+        kind = detect_format(content)
+        label = f"{filename} ({len(content) // 1024} KB)"
+        if kind == "pdf":
+            report(f"pypdf+fallback  {label}", measure(lambda: extract_pdf_pages(content, 0, 10 ** 6), runs))
+            report(f"pdfplumber      {label}", measure(lambda: _extract_from_pdf_pdfplumber(content), runs))
+        elif kind == "docx":
+            report(f"python-docx     {label}", measure(lambda: _extract_from_docx(content), runs))
+
+
+def bench_pool(runs: int) -> None:
+    from utils.pdf_parser import extract_text_from_pdf
+    from utils.extraction_pool import extraction_executor
+
+    async def run_all() -> None:
+        for filename, content in build_corpus(page_counts=(5, 60)):
+            samples = []
+            for _ in range(runs):
+                started = time.perf_counter()
+                await extract_text_from_pdf(content, filename)
+                samples.append((time.perf_counter() - started) * 1000)
+            report(f"pool            {filename}", samples)
+
+    try:
+        asyncio.run(run_all())
+    finally:
+        extraction_executor.shutdown()
+
+
+def bench_urls(runs: int) -> None:
+    from utils.url_fetcher import extract_urls
+
+    for lines in (50, 500, 5000):
+        text = "\n".join(resume_lines(lines, lines))
+        report(f"extract_urls    {lines} lines", measure(lambda: extract_urls(text), runs))
+
+
+def bench_html(runs: int) -> None:
+    from utils.url_fetcher import parse_html
+
+    cases = [
+        ("portfolio 150 KB", portfolio_page(600), "https://jane.dev"),
+        ("portfolio 1.5 MB", portfolio_page(7000), "https://jane.dev"),
+        ("github profile 1 MB", github_profile_page(250), "https://github.com/jane"),
+    ]
+    for name, html, url in cases:
+        report(f"parse_html      {name}", measure(lambda: parse_html(html, url), runs))
+
+
+def bench_combine(runs: int) -> None:
+    from chains.resume_chain import combine_analyses
+
+    for count in range(1, 6):
+        analyses = [fake_analysis(f"prompt {i}") for i in range(count)]
+        names = [f"provider-{i}" for i in range(count)]
+        report(f"combine_analyses {count} results", measure(lambda: combine_analyses(analyses, providers=names), runs * 100))
+
+
+SUITES = {
+    "pdf": bench_pdf,
+    "pool": bench_pool,
+    "urls": bench_urls,
+    "html": bench_html,
+    "combine": bench_combine,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--only", default=",".join(SUITES), help=f"Comma-separated subset of {', '.join(SUITES)}")
+    args = parser.parse_args()
+
+    print(f"{'benchmark':<44}{'p50 ms':>10}{'p95 ms':>10}{'min ms':>10}")
+    for name in args.only.split(","):
+        SUITES[name.strip()](args.runs)
+
+
+if __name__ == "__main__":
+    main()
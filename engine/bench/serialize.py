@@ -0,0 +1,106 @@
+"""
+CPU spent on the /analyze response path, previous vs current.
+
+  legacy       AnalysisResponse(**payload), validated again as the route's
+               response_model, jsonable_encoder and stdlib json.dumps
+               (what FastAPI did for every response)
+  miss         serialize_payload + timings, done once per computed result
+  hit          cached body + timings, what a cache hit pays now
+  db json      stdlib json.dumps vs utils.serialization.dumps_str for the
+               AnalysisResult JSON columns of one row
+  gzip / br    compressing the response body, with the resulting size
+
+Times are CPU microseconds per call (time.process_time over many calls).
+
+Run from engine/:  python -m bench.serialize [--calls 2000]
+"""
+import json
+import argparse
+import time
+from typing import Any, Callable, Dict
+
+from fastapi.encoders import jsonable_encoder
+
+from bench.fake_llm import fake_analysis
+from bench.corpus import JOB_DESCRIPTION, resume_lines
+from schemas import AnalysisResponse
+from pipeline import AnalysisPayload, serialize_payload, render_payload
+from utils.serialization import dumps_str, JSON_BACKEND
+from utils.responses import compress, brotli
+
+
+def sample_payload() -> Dict[str, Any]:
+    analysis = fake_analysis(JOB_DESCRIPTION)
+    keywords = [f"term{i}" for i in range(40)]
+    return {
+        "success": True,
+        **analysis,
+        "external_links": ["https://github.com/jane", "https://jane.dev"],
+        "llm_count": 3,
+        "individual_scores": [71, 76, 68],
+        "providers": ["GEMINI/gemini-2.0-flash", "OLLAMA/gpt-oss:120b", "OPENAI/gpt-4o-mini"],
+        "dropped_providers": [],
+        "compaction": {"budget": 6000, "resume_tokens": 1450, "jd_tokens": 380, "external_tokens": 900},
+        "keyword_match": {
+            "skills_match": 64,
+            "matched_keywords": keywords[:25],
+            "missing_keywords": keywords[25:],
+            "highlight_pairs": analysis["highlight_pairs"],
+            "elapsed_ms": 3.2,
+            "divergent_providers": [],
+            "job_profile": {"seniority": "senior", "skills": keywords[:15], "requirements": keywords[:10]},
+        },
+        "extracted_text": "\n".join(resume_lines(0, 40))[:1000] + "...",
+        "timings": {"cache": 0.4, "extract": 310.2, "jd": 2.1, "keywords": 4.8, "links": 0.3, "external": 820.5, "analysis": 9120.0},
+    }
+
+
+def legacy_render(payload: Dict[str, Any]) -> bytes:
+    model = AnalysisResponse(**payload)
+    validated = AnalysisResponse.model_validate(model.model_dump())
+    return json.dumps(jsonable_encoder(validated), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def cpu_us(fn: Callable[[], object], calls: int) -> float:
+    started = time.process_time()
+    for _ in range(calls):
+        fn()
+    return (time.process_time() - started) / calls * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=2000)
+    args = parser.parse_args()
+
+    payload = sample_payload()
+    cached = AnalysisPayload({k: v for k, v in payload.items() if k != "timings"}, serialize_payload(payload))
+    hit = AnalysisPayload({**cached, "timings": {"cache": 0.4}}, cached.body)
+    body = render_payload(payload)
+    columns = {k: payload[k] for k in ("breakdown", "strengths", "weaknesses", "suggested_keywords", "highlight_pairs", "individual_scores", "providers")}
+
+    assert json.loads(legacy_render(payload)) == json.loads(body)
+
+    print(f"JSON backend: {JSON_BACKEND}, body {len(body)} bytes")
+    print(f"{'path':<28}{'CPU us/call':>14}")
+    legacy = cpu_us(lambda: legacy_render(payload), args.calls)
+    rows = [
+        ("legacy (model + encoder)", legacy),
+        ("miss (serialize once)", cpu_us(lambda: render_payload(AnalysisPayload(payload)), args.calls)),
+        ("hit (cached body)", cpu_us(lambda: render_payload(hit), args.calls)),
+        ("db json: stdlib", cpu_us(lambda: {k: json.dumps(v) for k, v in columns.items()}, args.calls)),
+        ("db json: dumps_str", cpu_us(lambda: {k: dumps_str(v) for k, v in columns.items()}, args.calls)),
+    ]
+    for name, us in rows:
+        saved = f"  ({legacy / us:.1f}x faster)" if name.startswith(("miss", "hit")) and us else ""
+        print(f"{name:<28}{us:>14.1f}{saved}")
+
+    encodings = ["gzip"] + (["br"] if brotli is not None else [])
+    for encoding in encodings:
+        size = len(compress(body, encoding))
+        us = cpu_us(lambda: compress(body, encoding), max(1, args.calls // 10))
+        print(f"{encoding + ' compress':<28}{us:>14.1f}  {len(body)} -> {size} bytes")
+
+
+if __name__ == "__main__":
+    main()
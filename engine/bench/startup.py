@@ -0,0 +1,147 @@
+"""
+Cold-start report for the engine.
+
+  imports  runs `python -X importtime -c "import engine"` in a fresh
+           interpreter and lists the slowest top-level imports (cumulative
+           time), the total, and whether any heavy module (LangChain,
+           provider SDKs, aiohttp, bs4, numpy, tiktoken) loaded eagerly
+  cold     starts `python engine.py` on a free port and times the first
+           200 from /health and the moment /startup reports ready, then
+           prints the /startup profile
+
+Both run offline against a throwaway SQLite database.
+
+Run from engine/:  python -m bench.startup [--only imports,cold] [--top 25]
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+from typing import Dict, List, Tuple
+
+ENGINE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = (
+    "langchain", "langchain_core", "langchain_openai", "langchain_google_genai", "openai",
+    "google", "aiohttp", "bs4", "numpy", "tiktoken", "pypdf", "pdfplumber", "docx",
+)
+
+
+def bench_env() -> Dict[str, str]:
+    workdir = tempfile.mkdtemp(prefix="resumescore-startup-")
+    return {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'startup.db')}",
+        "TEXT_CACHE_PATH": os.path.join(workdir, "text_cache.db"),
+        "LLM_WARMUP": "false",
+        "ENV": "production",
+    }
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """
+    (module, self us, cumulative us) for every line of `-X importtime` output.
+    The module name keeps its indentation (two spaces per nesting level).
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line.split(":", 1)[1].split("|", 2)
+            rows.append((name[1:].rstrip(), int(self_us), int(cumulative_us)))
+        except ValueError:
+            continue
+    return rows
+
+
+def bench_imports(top: int) -> None:
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import engine"],
+        cwd=ENGINE_DIR, env=bench_env(), capture_output=True, text=True
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        print(result.stderr.splitlines()[-1] if result.stderr else "import engine failed")
+        return
+    rows = parse_importtime(result.stderr)
+    # Top-level entries are the ones without leading indentation in the tree.
+    top_level = [(name.strip(), cumulative) for name, _, cumulative in rows if not name.startswith(" ")]
+    total_us = sum(cumulative for _, cumulative in top_level)
+    loaded = {name.strip() for name, _, _ in rows}
+    eager = sorted(name for name in loaded if name.split(".")[0] in HEAVY_MODULES and "." not in name)
+
+    print(f"import engine: {total_us / 1000:.0f} ms in imports, {wall_ms:.0f} ms wall (interpreter start included)")
+    print(f"{'module':<48}{'cumulative ms':>14}")
+    for name, cumulative in sorted(top_level, key=lambda row: -row[1])[:top]:
+        print(f"{name:<48}{cumulative / 1000:>14.1f}")
+    print(f"heavy modules loaded at import: {', '.join(eager) if eager else 'none'}")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def get_json(url: str, timeout: float = 1.0):
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return response.status, json.loads(response.read() or b"null")
+
+
+def bench_cold(timeout: float) -> None:
+    port = free_port()
+    env = {**bench_env(), "PORT": str(port), "HOST": "127.0.0.1"}
+    base = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "engine.py"], cwd=ENGINE_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    health_ms = ready_ms = None
+    profile = None
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                if health_ms is None and get_json(f"{base}/health")[0] == 200:
+                    health_ms = (time.perf_counter() - started) * 1000
+                if health_ms is not None:
+                    profile = get_json(f"{base}/startup")[1]
+                    if profile.get("ready"):
+                        ready_ms = (time.perf_counter() - started) * 1000
+                        break
+            except OSError:
+                pass
+            time.sleep(0.02)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+    print(f"first /health 200: {health_ms:.0f} ms" if health_ms else "no /health answer before timeout")
+    print(f"ready:             {ready_ms:.0f} ms" if ready_ms else "not ready before timeout")
+    if profile:
+        print(f"profile:           {json.dumps(profile, indent=2)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", default="imports,cold")
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    suites = [name.strip() for name in args.only.split(",")]
+    if "imports" in suites:
+        bench_imports(args.top)
+    if "cold" in suites:
+        bench_cold(args.timeout)
+
+
+if __name__ == "__main__":
+    main()
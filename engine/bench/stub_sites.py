@@ -0,0 +1,100 @@
+"""
+Local HTTP stub sites for the external profile links in the bench corpus,
+with configurable latency, failure rate and page size.
+
+  /portfolio/<id>           portfolio page (generic parser)
+  /personal/<id>/projects   project list (generic parser)
+  anything else             404
+
+Pages carry an ETag so URL-cache revalidation answers `304`.
+
+Run from engine/:  python -m bench.stub_sites [--port 8766] [--latency-ms 150]
+                   [--failure-rate 0.1] [--paragraphs 600]
+"""
+import random
+import asyncio
+import hashlib
+import argparse
+
+from aiohttp import web
+
+from bench.corpus import STUB_PORT
+from bench.html_parse import portfolio_page
+from bench.fake_llm import start_server
+
+
+class StubSites:
+    """
+    aiohttp application serving generated profile pages.
+    Args:
+        latency_ms: Base response latency
+        jitter_ms: Uniform random latency added on top
+        failure_rate: Share of requests answered with a 503
+        paragraphs: Project cards per page (600 is about 150 KB)
+        seed: Random seed for latency and failure draws
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 150,
+        jitter_ms: float = 100,
+        failure_rate: float = 0.0,
+        paragraphs: int = 600,
+        seed: int = 0
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.page = portfolio_page(paragraphs)
+        self.etag = '"' + hashlib.sha256(self.page.encode()).hexdigest()[:16] + '"'
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.not_modified = 0
+        self.failures = 0
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/portfolio/{id}", self.page_handler)
+        app.router.add_get("/personal/{id}/projects", self.page_handler)
+        app.router.add_get("/stats", self.stats)
+        return app
+
+    async def page_handler(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        await asyncio.sleep((self.latency_ms + self.rng.uniform(0, self.jitter_ms)) / 1000)
+        if self.rng.random() < self.failure_rate:
+            self.failures += 1
+            return web.Response(status=503, text="Injected failure")
+        if request.headers.get("If-None-Match") == self.etag:
+            self.not_modified += 1
+            return web.Response(status=304, headers={"ETag": self.etag})
+        return web.Response(text=self.page, content_type="text/html", headers={"ETag": self.etag})
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            "requests": self.requests,
+            "not_modified": self.not_modified,
+            "failures": self.failures,
+        })
+
+
+async def start_stub_sites(stubs: StubSites, port: int = STUB_PORT) -> web.AppRunner:
+    return await start_server(stubs.app(), port)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=STUB_PORT)
+    parser.add_argument("--latency-ms", type=float, default=150)
+    parser.add_argument("--jitter-ms", type=float, default=100)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--paragraphs", type=int, default=600)
+    args = parser.parse_args()
+
+    stubs = StubSites(args.latency_ms, args.jitter_ms, args.failure_rate, args.paragraphs)
+    print(f"Stub sites on http://127.0.0.1:{args.port}/portfolio/<id>")
+    web.run_app(stubs.app(), host="127.0.0.1", port=args.port, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import os
+import time
+import asyncio
+from typing import Dict, Any
+
+LLM_INITIAL_CONCURRENCY = float(os.environ.get("LLM_INITIAL_CONCURRENCY", 4))
+LLM_MIN_CONCURRENCY = float(os.environ.get("LLM_MIN_CONCURRENCY", 1))
+LLM_MAX_CONCURRENCY = float(os.environ.get("LLM_MAX_CONCURRENCY", 32))
+LLM_LATENCY_TARGET = float(os.environ.get("LLM_LATENCY_TARGET", 30))
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get("BREAKER_FAILURE_THRESHOLD", 5))
+BREAKER_COOLDOWN = float(os.environ.get("BREAKER_COOLDOWN", 30))
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Best-effort detection of HTTP 429 / quota errors across provider SDKs."""
+    for source in (error, getattr(error, "response", None)):
+        if getattr(source, "status_code", None) == 429 or getattr(source, "code", None) == 429:
+            return True
+    name = type(error).__name__
+    if "RateLimit" in name or "ResourceExhausted" in name:
+        return True
+    message = str(error).lower()
+    return "429" in message or "rate limit" in message or "quota" in message
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit for one provider.
+
+    Each success under the latency target grows the limit by 1/limit (about
+    +1 per window of requests); a rate-limit response halves it and a slow
+    success shrinks it by 10%. Callers past the limit wait in `acquire`.
+
+    A burst of 429s from calls that were already in flight halves the limit
+    once: only calls that started after the last halving can halve it again.
+    """
+
+    def __init__(
+        self,
+        initial: float = LLM_INITIAL_CONCURRENCY,
+        min_limit: float = LLM_MIN_CONCURRENCY,
+        max_limit: float = LLM_MAX_CONCURRENCY,
+        latency_target: float = LLM_LATENCY_TARGET
+    ):
+        self.limit = initial
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.in_flight = 0
+        self.waiting = 0
+        self._last_decrease = float("-inf")
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._condition:
+            self.waiting += 1
+            try:
+                await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            finally:
+                self.waiting -= 1
+            self.in_flight += 1
+
+    async def release(self, latency: float, outcome: str) -> None:
+        """
+        Args:
+            latency: Seconds the call took
+            outcome: "ok", "rate_limited", "error" or "cancelled"
+        """
+        async with self._condition:
+            self.in_flight -= 1
+            if outcome == "rate_limited":
+                now = time.monotonic()
+                if now - latency >= self._last_decrease:
+                    self.limit = max(self.min_limit, self.limit * 0.5)
+                    self._last_decrease = now
+            elif outcome == "ok":
+                if latency > self.latency_target:
+                    self.limit = max(self.min_limit, self.limit * 0.9)
+                else:
+                    self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+        }
+
+
+class CircuitBreaker:
+    """
+    Skips a provider for `cooldown` seconds after `threshold` consecutive
+    failures. After the cool-down a single probe call is let through
+    (half-open); its outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, threshold: int = BREAKER_FAILURE_THRESHOLD, cooldown: float = BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.cooldown:
+                return False
+            self.state = "half_open"
+        if self._probe_in_flight:
+            return False
+        self._probe_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probe_in_flight = False
+        if self.state == "half_open" or self.failures >= self.threshold:
+            if self.state != "open":
+                self.trips += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def record_cancelled(self) -> None:
+        self._probe_in_flight = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        retry_in = 0.0
+        if self.state == "open":
+            retry_in = max(0.0, self.cooldown - (time.monotonic() - self.opened_at))
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "trips": self.trips,
+            "retry_in_seconds": round(retry_in, 1),
+        }
+
+
+class ProviderGuards:
+    """Per-provider limiter and breaker, created on first use."""
+
+    def __init__(self):
+        self._guards: Dict[str, tuple] = {}
+
+    def get(self, name: str) -> tuple:
+        if name not in self._guards:
+            self._guards[name] = (AdaptiveLimiter(), CircuitBreaker())
+        return self._guards[name]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            name: {"concurrency": limiter.snapshot(), "breaker": breaker.snapshot()}
+            for name, (limiter, breaker) in self._guards.items()
+        }
+
+
+provider_guards = ProviderGuards()
@@ -0,0 +1,122 @@
+import os
+import asyncio
+import threading
+from typing import Optional, List, Tuple, Dict, Any, Callable
+
+# Env vars that change which providers exist or how they are configured.
+PROVIDER_ENV_VARS = (
+    "GOOGLE_API_KEY",
+    "OLLAMA_API_KEY",
+    "OLLAMA_MODEL",
+    "OLLAMA_URL",
+    "OPENAI_API_KEY",
+)
+LLM_WARMUP = os.environ.get("LLM_WARMUP", "false").lower() in ("1", "true", "yes")
+LLM_WARMUP_TIMEOUT = float(os.environ.get("LLM_WARMUP_TIMEOUT", 20))
+
+
+class ProviderRegistry:
+    """
+    Long-lived LLM clients and analysis chains, built once and shared.
+
+    Re-creating a LangChain chat model per request throws away its HTTP
+    connection pool (and with it keep-alive connections and TLS sessions),
+    so chains are built once (normally from the app lifespan) and reused.
+    The registry rebuilds itself when any of PROVIDER_ENV_VARS changes.
+
+    Args:
+        specs: (name, llm_factory, model_getter) per provider. A factory may
+            raise ValueError or return None when the provider is not configured.
+        chain_factory: Turns an LLM into an analysis chain
+    """
+
+    def __init__(
+        self,
+        specs: List[Tuple[str, Callable[[], Any], Callable[[], str]]],
+        chain_factory: Callable[[Any], Any]
+    ):
+        self.specs = specs
+        self.chain_factory = chain_factory
+        self._providers: List[Dict[str, Any]] = []
+        self._fingerprint: Optional[tuple] = None
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.warmups: Dict[str, str] = {}
+
+    @staticmethod
+    def _current_fingerprint() -> tuple:
+        return tuple(os.environ.get(name) for name in PROVIDER_ENV_VARS)
+
+    def build(self) -> None:
+        """(Re)create every configured provider's client and chain."""
+        providers = []
+        for name, llm_factory, model_getter in self.specs:
+            try:
+                llm = llm_factory()
+                if llm is None:
+                    continue
+                providers.append({
+                    "name": name,
+                    "model": model_getter(),
+                    "llm": llm,
+                    "chain": self.chain_factory(llm),
+                })
+            except ValueError as e:
+                print(f"{name} not available: {e}")
+            except Exception as e:
+                print(f"{name} failed to initialize: {type(e).__name__}: {e}")
+        with self._lock:
+            self._providers = providers
+            self._fingerprint = self._current_fingerprint()
+            self.builds += 1
+            self.warmups = {}
+        print(f"🔌 LLM providers ready: {[p['name'] for p in providers]}")
+
+    def _ensure_current(self) -> List[Dict[str, Any]]:
+        if self._fingerprint != self._current_fingerprint():
+            self.build()
+        return self._providers
+
+    def get_chains(self) -> List[Tuple[str, Any]]:
+        """(name, chain) for every configured provider."""
+        return [(p["name"], p["chain"]) for p in self._ensure_current()]
+
+    def provider_ids(self) -> List[str]:
+        """`name:model` strings identifying the active provider set."""
+        return [f"{p['name']}:{p['model']}" for p in self._ensure_current()]
+
+    def reload(self) -> bool:
+        """
+        Rebuild if provider configuration changed since the last build.
+        Returns:
+            True if the providers were rebuilt
+        """
+        if self._fingerprint == self._current_fingerprint():
+            return False
+        self.build()
+        return True
+
+    async def warm_up(self, timeout: float = LLM_WARMUP_TIMEOUT) -> Dict[str, str]:
+        """
+        Send one tiny request per provider so DNS, TCP and TLS are set up
+        before the first real analysis.
+        """
+        async def ping(provider: Dict[str, Any]) -> str:
+            try:
+                await asyncio.wait_for(provider["llm"].ainvoke("Reply with OK."), timeout)
+                return "ok"
+            except Exception as e:
+                return f"{type(e).__name__}: {e}"
+
+        providers = self._ensure_current()
+        results = await asyncio.gather(*[ping(p) for p in providers])
+        self.warmups = {p["name"]: result for p, result in zip(providers, results)}
+        print(f"🔥 LLM warm-up: {self.warmups}")
+        return self.warmups
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "providers": [{"name": p["name"], "model": p["model"]} for p in self._providers],
+            "builds": self.builds,
+            "warmup": self.warmups,
+        }
@@ -1,12 +1,23 @@
+from __future__ import annotations
 
 import os
+import json
+import time
 import asyncio
-from typing import Optional, List, Dict, Any
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
+from typing import Optional, List, Dict, Any, Callable, Awaitable, TYPE_CHECKING
 from pydantic import BaseModel, Field
-from langchain_google_genai import ChatGoogleGenerativeAI
+from chains.providers import ProviderRegistry
+from chains.limiter import provider_guards, is_rate_limit_error
+from chains.router import provider_router
+from utils.text_compactor import compact_inputs, provider_token_budget, count_tokens
+from utils.metrics import LLM_SECONDS, LLM_ERRORS
+
+# LangChain and the provider SDKs take seconds to import, so they are loaded
+# when the clients are built (in the background after startup), not here.
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
+
+
 class ResumeBreakdown(BaseModel):
     """Score breakdown by category."""
     skills: int = Field(description="Skills match score 0-100", ge=0, le=100)
@@ -97,6 +108,14 @@ Respond with valid JSON matching this exact schema:
 
 Output ONLY valid JSON, no other text."""
 
+# Consensus policy: return once QUORUM providers succeeded (0 = all of them)
+# or when DEADLINE seconds have passed (0 = no deadline), whichever is first.
+CONSENSUS_QUORUM = int(os.environ.get("CONSENSUS_QUORUM", 0))
+CONSENSUS_DEADLINE = float(os.environ.get("CONSENSUS_DEADLINE", 60))
+
+GEMINI_MODEL = "gemini-2.0-flash"
+DEFAULT_OLLAMA_MODEL = "deepseek-v3:671b"
+OPENAI_MODEL = "gpt-4-turbo-preview"
 
 
 def get_gemini_llm() -> ChatOpenAI:
@@ -111,8 +130,9 @@ def get_gemini_llm() -> ChatOpenAI:
     if not api_key:
         raise ValueError("GOOGLE_API_KEY environment variable not set")
     
+    from langchain_google_genai import ChatGoogleGenerativeAI
     return ChatGoogleGenerativeAI(
-        model="gemini-2.0-flash",
+        model=GEMINI_MODEL,
         google_api_key=api_key,
         temperature=0.1,
         max_output_tokens=4000
@@ -129,8 +149,9 @@ def get_ollama_llm() -> ChatOpenAI:
     if not api_key:
         raise ValueError("OLLAMA_API_KEY environment variable not set")
     
+    from langchain_openai import ChatOpenAI
     return ChatOpenAI(
-        model=os.environ.get("OLLAMA_MODEL", "deepseek-v3:671b"),
+        model=os.environ.get("OLLAMA_MODEL", DEFAULT_OLLAMA_MODEL),
         openai_api_key=api_key,
         openai_api_base=os.environ.get("OLLAMA_URL", "https://ollama.com/v1"),
         temperature=0.1,
@@ -147,8 +168,9 @@ def get_backup_llm() -> ChatOpenAI:
     if not api_key:
         return None
     
+    from langchain_openai import ChatOpenAI
     return ChatOpenAI(
-        model="gpt-4-turbo-preview",
+        model=OPENAI_MODEL,
         openai_api_key=api_key,
         temperature=0.1,
         max_tokens=4000
@@ -156,8 +178,19 @@ def get_backup_llm() -> ChatOpenAI:
 
 
 
+def get_active_providers() -> List[str]:
+    """
+    List the providers that `analyze_resume` would call right now, as
+    `name:model` strings. Used to key cached analyses.
+    """
+    return provider_registry.provider_ids()
+
+
 def create_analysis_chain(llm: ChatOpenAI):
     """Create a LangChain for resume analysis with structured output."""
+    from langchain_core.prompts import ChatPromptTemplate
+    from langchain_core.output_parsers import JsonOutputParser
+
     prompt = ChatPromptTemplate.from_template(RESUME_ANALYSIS_PROMPT)
     parser = JsonOutputParser(pydantic_object=ResumeAnalysis)
     
@@ -168,30 +201,159 @@ def create_analysis_chain(llm: ChatOpenAI):
 async def run_single_llm(
     chain,
     inputs: Dict[str, str],
-    llm_name: str
+    llm_name: str,
+    prompt_tokens: int = 0
 ) -> Optional[Dict[str, Any]]:
     """
     Run a single LLM chain with error handling.
-    Returns None if the chain fails.
+    Calls go through the provider's circuit breaker and adaptive
+    concurrency limit, and their latency, outcome and token count feed the
+    provider router. Returns None if the chain fails or is skipped.
     """
+    limiter, breaker = provider_guards.get(llm_name)
+    if not breaker.allow():
+        print(f"{llm_name} skipped: circuit open")
+        LLM_ERRORS.inc(provider=llm_name, outcome="circuit_open")
+        return None
+
+    try:
+        await limiter.acquire()
+    except asyncio.CancelledError:
+        # Cancelled while queued (quorum/deadline): free a half-open probe slot.
+        breaker.record_cancelled()
+        raise
+    started = time.monotonic()
+    outcome = "error"
+    tokens = prompt_tokens
     try:
         print(f"Running {llm_name}...")
         result = await chain.ainvoke(inputs)
+        outcome = "ok"
+        tokens += count_tokens(json.dumps(result))
+        breaker.record_success()
         print(f"{llm_name} completed successfully")
         return result
+    except asyncio.CancelledError:
+        outcome = "cancelled"
+        breaker.record_cancelled()
+        raise
     except Exception as e:
+        outcome = "rate_limited" if is_rate_limit_error(e) else "error"
+        breaker.record_failure()
         print(f"{llm_name} failed: {type(e).__name__}: {e}")
         return None
+    finally:
+        elapsed = time.monotonic() - started
+        LLM_SECONDS.observe(elapsed, provider=llm_name, outcome=outcome)
+        if outcome in ("error", "rate_limited"):
+            LLM_ERRORS.inc(provider=llm_name, outcome=outcome)
+        provider_router.record(llm_name, elapsed, outcome, tokens)
+        await limiter.release(elapsed, outcome)
 
 
+def build_prompt_inputs(
+    resume_text: str,
+    job_description: str,
+    external_content: str,
+    budget: int,
+    parsed_jd: Optional[Dict[str, Any]] = None
+) -> tuple:
+    """
+    Compact the prompt variables to fit `budget` tokens.
+    Returns:
+        (inputs for RESUME_ANALYSIS_PROMPT, compaction report)
+    """
+    compacted, report = compact_inputs(resume_text, job_description, external_content or "", budget, parsed_jd)
+
+    external_section = ""
+    if compacted["external_content"].strip():
+        external_section = f"""### Additional Information from External Links (GitHub, LinkedIn, Portfolio):
+\"\"\"
+{compacted["external_content"]}
+\"\"\""""
+
+    inputs = {
+        "resume_text": compacted["resume_text"],
+        "job_description": compacted["job_description"],
+        "external_section": external_section
+    }
+    return inputs, report
+
+
+ProviderCallback = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+
+async def wait_for_quorum(
+    tasks: Dict[asyncio.Task, str],
+    quorum: int,
+    deadline: float = 0,
+    on_result: Optional[ProviderCallback] = None
+) -> tuple:
+    """
+    Wait until `quorum` tasks return a result or `deadline` seconds pass.
+    Stragglers are cancelled, also when the caller itself is cancelled.
+    Args:
+        tasks: Running provider tasks mapped to provider names
+        quorum: Successful results to wait for
+        deadline: Global time limit in seconds (0 = none)
+        on_result: Awaited with (name, result) as each provider succeeds
+    Returns:
+        ([(name, result), ...] in completion order, [names of cancelled providers])
+    """
+    loop = asyncio.get_running_loop()
+    end = loop.time() + deadline if deadline > 0 else None
+    pending = set(tasks)
+    successes = []
 
-def combine_analyses(analyses: List[Dict[str, Any]]) -> Dict[str, Any]:
+    try:
+        while pending and len(successes) < quorum:
+            timeout = None if end is None else end - loop.time()
+            if timeout is not None and timeout <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                print(f"⏱️ Consensus deadline of {deadline:g}s reached")
+                break
+            for task in done:
+                if task.cancelled():
+                    continue
+                if task.exception() is not None:
+                    print(f"{tasks[task]} raised exception: {task.exception()}")
+                elif task.result() is not None:
+                    successes.append((tasks[task], task.result()))
+                    if on_result is not None:
+                        await on_result(tasks[task], task.result())
+    finally:
+        # Also runs when the caller is cancelled (client gone, speculative run
+        # superseded), so no provider call outlives the request.
+        stragglers = [task for task in tasks if not task.done()]
+        for task in stragglers:
+            task.cancel()
+        if stragglers:
+            await asyncio.gather(*stragglers, return_exceptions=True)
+            print(f"Cancelled stragglers: {[tasks[t] for t in stragglers]}")
+    return successes, [tasks[t] for t in stragglers]
+
+
+def combine_analyses(
+    analyses: List[Dict[str, Any]],
+    providers: Optional[List[str]] = None,
+    dropped_providers: Optional[List[str]] = None
+) -> Dict[str, Any]:
     """
     Combine multiple LLM responses into a consensus result.
     Averages numerical scores and merges/deduplicates lists.
+    Args:
+        analyses: Parsed provider responses (None entries are ignored)
+        providers: Provider names matching `analyses`, reported back as the
+            providers that made it into the consensus
+        dropped_providers: Providers that were cancelled or failed
     """
+    if providers is None:
+        providers = []
+    contributing = [name for a, name in zip(analyses, providers) if a is not None]
     valid = [a for a in analyses if a is not None]
-    
+
     if not valid:
         return {
             "score": None,
@@ -202,7 +364,9 @@ def combine_analyses(analyses: List[Dict[str, Any]]) -> Dict[str, Any]:
             "highlight_pairs": [],
             "consensus": "No valid LLM responses received",
             "llm_count": 0,
-            "individual_scores": []
+            "individual_scores": [],
+            "providers": [],
+            "dropped_providers": dropped_providers or []
         }
     
     n = len(valid)
@@ -261,14 +425,19 @@ def combine_analyses(analyses: List[Dict[str, Any]]) -> Dict[str, Any]:
         "suggested_keywords": dedupe(all_keywords, 12),
         "highlight_pairs": unique_highlights,
         "llm_count": n,
-        "individual_scores": [a.get("score") for a in valid]
+        "individual_scores": [a.get("score") for a in valid],
+        "providers": contributing,
+        "dropped_providers": dropped_providers or []
     }
 
 
 async def analyze_resume(
     resume_text: str,
     job_description: str,
-    external_content: str = ""
+    external_content: str = "",
+    on_provider_result: Optional[ProviderCallback] = None,
+    parsed_jd: Optional[Dict[str, Any]] = None,
+    policy: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Main function to analyze resume using multiple LLMs via LangChain.
@@ -277,47 +446,17 @@ async def analyze_resume(
         resume_text: Extracted text from the resume
         job_description: The job description to match against
         external_content: Optional content fetched from external URLs
+        on_provider_result: Awaited with (provider name, parsed result) as
+            each provider finishes, e.g. to stream partial results
+        parsed_jd: Cached JD preprocessing (see utils.jd_cache), so the JD
+            is not normalized again for every resume
+        policy: Provider routing policy (see chains.router); ROUTER_POLICY by default
     
     Returns:
         Combined analysis result with consensus scores
     """
 
-    external_section = ""
-    if external_content and external_content.strip():
-        external_section = f"""### Additional Information from External Links (GitHub, LinkedIn, Portfolio):
-\"\"\"
-{external_content[:3000]}
-\"\"\""""
-    
-    inputs = {
-        "resume_text": resume_text,
-        "job_description": job_description,
-        "external_section": external_section
-    }
-    
-    llms_to_run = []
-    
-    try:
-        gemini_llm = get_gemini_llm()
-        gemini_chain = create_analysis_chain(gemini_llm)
-        llms_to_run.append(("Gemini", gemini_chain))
-    except ValueError as e:
-        print(f"gemini not available: {e}")
-    
-    try:
-        ollama_llm = get_ollama_llm()
-        ollama_chain = create_analysis_chain(ollama_llm)
-        llms_to_run.append(("Ollama", ollama_chain))
-    except ValueError as e:
-        print(f"Ollama not available: {e}")
-    
-    try:
-        backup_llm = get_backup_llm()
-        if backup_llm:
-            backup_chain = create_analysis_chain(backup_llm)
-            llms_to_run.append(("OpenAI/GPT-4", backup_chain))
-    except Exception as e:
-        print(f"Backup LLM not available: {e}")
+    llms_to_run = provider_router.select(provider_registry.get_chains(), policy)
     
     if not llms_to_run:
         return {
@@ -332,22 +471,46 @@ async def analyze_resume(
         }
     
     print(f"Running analysis with {len(llms_to_run)} LLM(s): {[name for name, _ in llms_to_run]}")
-    
-    # Run all LLMs in parallel
-    tasks = [
-        run_single_llm(chain, inputs, name)
+
+    # Providers sharing a token budget share one compacted prompt. Compaction
+    # tokenizes the whole resume, so it runs off the event loop.
+    inputs_by_budget: Dict[int, tuple] = {}
+    provider_inputs = {}
+    compaction = {}
+    for name, _ in llms_to_run:
+        budget = provider_token_budget(name)
+        if budget not in inputs_by_budget:
+            inputs_by_budget[budget] = await asyncio.to_thread(
+                build_prompt_inputs, resume_text, job_description, external_content, budget, parsed_jd
+            )
+        provider_inputs[name], compaction[name] = inputs_by_budget[budget]
+    print(f"✂️ Prompt compaction: {[(name, report['tokens_saved']) for name, report in compaction.items()]} tokens saved")
+
+    quorum = min(CONSENSUS_QUORUM or len(llms_to_run), len(llms_to_run))
+    tasks = {
+        asyncio.create_task(run_single_llm(chain, provider_inputs[name], name, compaction[name]["compacted_tokens"])): name
         for name, chain in llms_to_run
-    ]
-    
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-    
-    # Filter out exceptions and None results
-    valid_results = []
-    for i, result in enumerate(results):
-        if isinstance(result, Exception):
-            print(f"LLM {i} raised exception: {result}")
-        elif result is not None:
-            valid_results.append(result)
-    
+    }
+    successes, _ = await wait_for_quorum(tasks, quorum, CONSENSUS_DEADLINE, on_provider_result)
+
+    succeeded = {name for name, _ in successes}
+    dropped = [name for name, _ in llms_to_run if name not in succeeded]
+
     # Combine into consensus
-    return combine_analyses(valid_results)
+    combined = combine_analyses(
+        [result for _, result in successes],
+        providers=[name for name, _ in successes],
+        dropped_providers=dropped
+    )
+    combined["compaction"] = compaction
+    return combined
+
+
+provider_registry = ProviderRegistry(
+    specs=[
+        ("Gemini", get_gemini_llm, lambda: GEMINI_MODEL),
+        ("Ollama", get_ollama_llm, lambda: os.environ.get("OLLAMA_MODEL", DEFAULT_OLLAMA_MODEL)),
+        ("OpenAI/GPT-4", get_backup_llm, lambda: OPENAI_MODEL),
+    ],
+    chain_factory=create_analysis_chain
+)
@@ -0,0 +1,271 @@
+import os
+import re
+import time
+import random
+import asyncio
+import threading
+from datetime import datetime, timezone
+from typing import Optional, List, Dict, Any, Tuple
+
+from chains.limiter import provider_guards
+
+ROUTER_POLICY = os.environ.get("ROUTER_POLICY", "all")
+ROUTER_EWMA_ALPHA = float(os.environ.get("ROUTER_EWMA_ALPHA", 0.2))
+ROUTER_SLA_SECONDS = float(os.environ.get("ROUTER_SLA_SECONDS", 20))
+ROUTER_MAX_ERROR_RATE = float(os.environ.get("ROUTER_MAX_ERROR_RATE", 0.2))
+ROUTER_MIN_SAMPLES = int(os.environ.get("ROUTER_MIN_SAMPLES", 3))
+ROUTER_EXPLORE_RATE = float(os.environ.get("ROUTER_EXPLORE_RATE", 0.05))
+ROUTER_SAVE_INTERVAL = float(os.environ.get("ROUTER_SAVE_INTERVAL", 60))
+
+# USD per 1K tokens (prompt + completion); override with LLM_PRICE_PER_1K_<PROVIDER>.
+DEFAULT_PRICES_PER_1K = {"GEMINI": 0.0004, "OLLAMA": 0.0, "OPENAI": 0.02}
+
+POLICY_PATTERN = r"^(all|fastest(_two|:\d+)?|cheapest_sla(:\d+)?)$"
+_POLICY_RE = re.compile(POLICY_PATTERN)
+
+
+def _provider_key(provider: str) -> str:
+    return re.sub(r"[^A-Z0-9]", "", provider.split("/")[0].upper())
+
+
+def price_per_1k(provider: str) -> float:
+    key = _provider_key(provider)
+    return float(os.environ.get(f"LLM_PRICE_PER_1K_{key}", DEFAULT_PRICES_PER_1K.get(key, 0.0)))
+
+
+def parse_policy(policy: Optional[str]) -> Tuple[str, int]:
+    """
+    Split a routing policy into (kind, provider count).
+    `all`, `fastest:N` (`fastest_two` = `fastest:2`, `fastest` = 1) and
+    `cheapest_sla:N` (`cheapest_sla` = 1).
+    Raises:
+        ValueError: For unknown policies
+    """
+    policy = (policy or ROUTER_POLICY).strip().lower()
+    if not _POLICY_RE.match(policy):
+        raise ValueError(f"Unknown routing policy {policy!r}; use all, fastest:N, fastest_two or cheapest_sla:N")
+    if policy == "all":
+        return "all", 0
+    if policy == "fastest_two":
+        return "fastest", 2
+    kind, _, count = policy.partition(":")
+    return kind, max(1, int(count or 1))
+
+
+class ProviderStats:
+    """Exponentially weighted latency, error rate and cost for one provider."""
+
+    def __init__(self, alpha: float = ROUTER_EWMA_ALPHA):
+        self.alpha = alpha
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.cost: Optional[float] = None
+        self.calls = 0
+        self.errors = 0
+        self.updated_at = 0.0
+
+    def _ewma(self, current: Optional[float], value: float) -> float:
+        return value if current is None else current + self.alpha * (value - current)
+
+    def record(self, latency: float, outcome: str, tokens: int, price: float) -> None:
+        if outcome == "cancelled":
+            return
+        self.calls += 1
+        self.updated_at = time.time()
+        if outcome == "ok":
+            self.latency = self._ewma(self.latency, latency)
+            self.error_rate = self._ewma(self.error_rate, 0.0)
+            self.cost = self._ewma(self.cost, tokens / 1000 * price)
+        else:
+            self.errors += 1
+            self.error_rate = self._ewma(self.error_rate, 1.0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "latency_seconds": round(self.latency, 3) if self.latency is not None else None,
+            "error_rate": round(self.error_rate, 4),
+            "cost_usd": round(self.cost, 6) if self.cost is not None else None,
+            "calls": self.calls,
+            "errors": self.errors,
+            "updated_at": self.updated_at,
+        }
+
+
+class ProviderRouter:
+    """
+    Picks which providers to call for a request from live per-provider stats.
+
+    Policies (see `parse_policy`):
+      all             every configured provider
+      fastest:N       the N with the lowest EWMA latency
+      cheapest_sla:N  the N cheapest whose latency is within ROUTER_SLA_SECONDS;
+                      falls back to the fastest when none qualify
+    Providers with an open circuit breaker or an error rate above
+    ROUTER_MAX_ERROR_RATE are passed over while others are available.
+    Providers with fewer than ROUTER_MIN_SAMPLES calls are tried first so
+    their stats fill in, and with probability ROUTER_EXPLORE_RATE one
+    unpicked provider is added so a recovered provider gets noticed.
+
+    Stats live in memory and are written to the `provider_stats` table every
+    ROUTER_SAVE_INTERVAL seconds and on shutdown, and loaded at startup.
+    """
+
+    def __init__(self):
+        self._stats: Dict[str, ProviderStats] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._rng = random.Random()
+        self.selections: Dict[str, int] = {}
+
+    def _get(self, name: str) -> ProviderStats:
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = ProviderStats()
+        return stats
+
+    def record(self, name: str, latency: float, outcome: str, tokens: int = 0) -> None:
+        """Feed one finished call (outcome as in AdaptiveLimiter.release)."""
+        with self._lock:
+            self._get(name).record(latency, outcome, tokens, price_per_1k(name))
+
+    def select(self, candidates: List[Tuple[str, Any]], policy: Optional[str] = None) -> List[Tuple[str, Any]]:
+        """
+        Subset of `candidates` ((name, chain) pairs) to call under `policy`,
+        in the original order.
+        """
+        kind, count = parse_policy(policy)
+        if kind == "all" or count >= len(candidates):
+            return candidates
+
+        with self._lock:
+            stats = {name: self._get(name) for name, _ in candidates}
+            healthy = [
+                name for name, _ in candidates
+                if provider_guards.get(name)[1].state != "open" and stats[name].error_rate <= ROUTER_MAX_ERROR_RATE
+            ] or [name for name, _ in candidates]
+            untried = [name for name in healthy if stats[name].calls < ROUTER_MIN_SAMPLES]
+
+            def latency(name: str) -> float:
+                return stats[name].latency if stats[name].latency is not None else 0.0
+
+            def cost(name: str) -> float:
+                return stats[name].cost if stats[name].cost is not None else 0.0
+
+            tried = [name for name in healthy if name not in untried]
+            if kind == "cheapest_sla":
+                within = sorted((n for n in tried if latency(n) <= ROUTER_SLA_SECONDS), key=lambda n: (cost(n), latency(n)))
+                rest = sorted((n for n in tried if n not in within), key=latency)
+                ranked = untried + within + rest
+            else:
+                ranked = untried + sorted(tried, key=latency)
+            chosen = ranked[:count]
+
+            others = [name for name, _ in candidates if name not in chosen]
+            if others and self._rng.random() < ROUTER_EXPLORE_RATE:
+                chosen.append(self._rng.choice(others))
+            for name in chosen:
+                self.selections[name] = self.selections.get(name, 0) + 1
+        return [(name, chain) for name, chain in candidates if name in chosen]
+
+    def load(self) -> None:
+        """Restore stats saved by a previous process. Blocking."""
+        from database import SessionLocal
+        from models import ProviderStat
+
+        db = SessionLocal()
+        try:
+            rows = db.query(ProviderStat).all()
+            with self._lock:
+                for row in rows:
+                    stats = self._get(row.name)
+                    stats.latency = row.latency_ewma
+                    stats.error_rate = row.error_rate_ewma or 0.0
+                    stats.cost = row.cost_ewma
+                    stats.calls = row.calls or 0
+                    stats.errors = row.errors or 0
+                    stats.updated_at = row.updated_at.timestamp() if row.updated_at else 0.0
+            if rows:
+                print(f"🧭 Restored router stats for {[row.name for row in rows]}")
+        except Exception as e:
+            print(f"❌ Router stats load error: {e}")
+        finally:
+            db.close()
+
+    def save(self) -> None:
+        """Write current stats to the database. Blocking."""
+        from database import SessionLocal
+        from models import ProviderStat
+
+        with self._lock:
+            snapshot = {name: stats.snapshot() for name, stats in self._stats.items() if stats.calls}
+        if not snapshot:
+            return
+        db = SessionLocal()
+        try:
+            for name, stats in snapshot.items():
+                db.merge(ProviderStat(
+                    name=name,
+                    latency_ewma=stats["latency_seconds"],
+                    error_rate_ewma=stats["error_rate"],
+                    cost_ewma=stats["cost_usd"],
+                    calls=stats["calls"],
+                    errors=stats["errors"],
+                    updated_at=datetime.fromtimestamp(stats["updated_at"], tz=timezone.utc)
+                ))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"❌ Router stats write error: {e}")
+        finally:
+            db.close()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(ROUTER_SAVE_INTERVAL)
+            await asyncio.to_thread(self.save)
+
+    async def start(self) -> None:
+        await asyncio.to_thread(self.load)
+        if self._task is None and ROUTER_SAVE_INTERVAL > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await asyncio.to_thread(self.save)
+
+    def reset(self) -> None:
+        """Forget all stats, in memory and in the database. Blocking."""
+        from database import SessionLocal
+        from models import ProviderStat
+
+        with self._lock:
+            self._stats.clear()
+            self.selections.clear()
+        db = SessionLocal()
+        try:
+            db.query(ProviderStat).delete()
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"❌ Router stats reset error: {e}")
+        finally:
+            db.close()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "policy": ROUTER_POLICY,
+                "sla_seconds": ROUTER_SLA_SECONDS,
+                "max_error_rate": ROUTER_MAX_ERROR_RATE,
+                "ewma_alpha": ROUTER_EWMA_ALPHA,
+                "providers": {
+                    name: {**stats.snapshot(), "price_per_1k": price_per_1k(name), "selected": self.selections.get(name, 0)}
+                    for name, stats in self._stats.items()
+                },
+            }
+
+
+provider_router = ProviderRouter()
@@ -1,8 +1,12 @@
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from utils.serialization import dumps_str, loads
 DATABASE_URL = os.environ.get("DATABASE_URL")
+# Create missing tables/columns in the background after startup; turn off when `python migrate.py` runs at deploy time.
+DB_INIT_ON_STARTUP = os.environ.get("DB_INIT_ON_STARTUP", "true").lower() in ("1", "true", "yes")
 
 if not DATABASE_URL:
     print("⚠️ DATABASE_URL not set, using local SQLite database")
@@ -13,7 +17,10 @@ if DATABASE_URL.startswith("postgres://"):
 
 engine = create_engine(
     DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
+    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {},
+    # JSON columns (breakdowns, job results, parsed JDs) go through orjson when installed.
+    json_serializer=dumps_str,
+    json_deserializer=loads
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
@@ -23,4 +30,50 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def add_missing_columns():
+    """
+    Add columns that exist on the models but not in an already-created table.
+    `create_all` only creates missing tables, so existing databases would
+    otherwise never pick up new nullable columns.
+    """
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            column_type = column.type.compile(dialect=engine.dialect)
+            with engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+            print(f"🛠️ Added column {table.name}.{column.name}")
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+_schema_ready = False
+
+
+def init_db() -> None:
+    """
+    Create missing tables, columns and indexes. Blocking and idempotent; runs
+    once per process. Under serve.py every worker runs it after binding, so a
+    worker that loses a race to create the same table retries once against
+    the schema the other one created.
+    """
+    global _schema_ready
+    if _schema_ready:
+        return
+    import models  # noqa: F401  (registers the tables on Base.metadata)
+
+    try:
+        Base.metadata.create_all(bind=engine)
+        add_missing_columns()
+    except DBAPIError:
+        Base.metadata.create_all(bind=engine)
+        add_missing_columns()
+    _schema_ready = True
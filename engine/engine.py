@@ -7,19 +7,77 @@ if not env_path.exists():
     env_path = Path(__file__).parent / ".env.example"
 load_dotenv(env_path)
 
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends
+from startup import startup, import_modules
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends, Query, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, PlainTextResponse, JSONResponse, Response
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
+from contextlib import asynccontextmanager
 import uvicorn
 
-from chains.resume_chain import analyze_resume
-from utils.pdf_parser import extract_text_from_pdf
-from utils.url_fetcher import fetch_external_content, extract_urls
+from chains.resume_chain import provider_registry
+from chains.providers import LLM_WARMUP
+from chains.limiter import provider_guards
+from chains.router import provider_router, POLICY_PATTERN
+from utils.pdf_parser import extract_text_cached
+from utils.text_cache import text_cache
+from utils.extraction_pool import extraction_executor, ExtractionTimeout
+from utils.url_fetcher import extract_urls
+from utils.analysis_cache import analysis_cache
+from utils.jd_cache import jd_cache
+from utils.url_cache import url_cache
+from utils.http_client import http_client
+from utils.uploads import ingest_upload, UPLOAD_MAX_BYTES
+from utils.responses import FastJSONResponse, CompressionMiddleware
+from utils.serialization import dumps_str
+from utils.metrics import metrics, REQUEST_SECONDS, start_request, end_request, log_event
 from sqlalchemy.orm import Session
-from database import get_db, engine, Base
+from database import get_db, init_db, DB_INIT_ON_STARTUP
 from models import AnalysisResult
-import hashlib
+from persistence import analysis_writer
+from pipeline import run_analysis, run_fast_analysis, validate_upload, render_payload
+from schemas import AnalysisResponse
+from batch import batch_manager, collect_files, BATCH_MAX_TOTAL_BYTES
+from jobs import job_queue
+import time
+import asyncio
+
+async def initialize() -> None:
+    """Work deferred until the port is bound; requests other than /health wait for it."""
+    if DB_INIT_ON_STARTUP:
+        await startup.step("database", init_db, blocking=True)
+    await asyncio.gather(
+        startup.step("http_client", http_client.start),
+        startup.step("router_stats", provider_router.start),
+        # Imports LangChain and the provider SDKs on first build.
+        startup.step("providers", provider_registry.build, blocking=True),
+    )
+    job_queue.start()
+
+
+async def prewarm() -> None:
+    """Load the remaining parser modules and open provider connections after the app is ready."""
+    await startup.step("imports", import_modules, blocking=True)
+    if LLM_WARMUP:
+        await startup.step("llm_warmup", provider_registry.warm_up)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start-up and shutdown hooks for long-lived resources."""
+    analysis_writer.start()
+    startup.start(initialize, prewarm)
+    yield
+    await startup.stop()
+    await job_queue.stop()
+    await batch_manager.shutdown()
+    await analysis_writer.stop()
+    if startup.started("router_stats"):
+        await provider_router.stop()
+    await http_client.close()
+    extraction_executor.shutdown()
+    text_cache.close()
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -27,7 +85,9 @@ app = FastAPI(
     description="AI-powered resume analysis engine using LangChain with multi-LLM consensus",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan
 )
 
 ALLOWED_ORIGINS = [
@@ -36,40 +96,77 @@ ALLOWED_ORIGINS = [
     os.environ.get("FRONTEND_URL", "https://your-app.vercel.app"),
 ]
 
+app.add_middleware(CompressionMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=ALLOWED_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Request-ID"],
 )
 
-class BreakdownModel(BaseModel):
-    skills: int
-    experience: int
-    projects: int
-    quality: int
-    education: int
-    external: int
+# Answered while deferred initialization is still running.
+STARTUP_EXEMPT_PATHS = ("/", "/health", "/startup", "/metrics", "/docs", "/redoc", "/openapi.json")
+
+@app.middleware("http")
+async def wait_for_startup(request: Request, call_next):
+    """Hold requests that need the database or providers until `initialize` has finished."""
+    if not startup.ready and request.url.path not in STARTUP_EXEMPT_PATHS:
+        if not await startup.wait():
+            return JSONResponse(status_code=503, content={"detail": "Service is starting"}, headers={"Retry-After": "5"})
+    return await call_next(request)
+
+# Multipart framing and the `jd` field on top of the file itself.
+UPLOAD_REQUEST_OVERHEAD = 1024 * 1024
+SINGLE_UPLOAD_PATHS = ("/analyze", "/analyze/stream", "/jobs", "/extract-text")
+BATCH_UPLOAD_PATHS = ("/analyze/batch",)
+
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    """Answer 413 from Content-Length before the multipart body is read."""
+    limit = None
+    if request.method == "POST" and request.url.path in SINGLE_UPLOAD_PATHS:
+        limit = UPLOAD_MAX_BYTES
+    elif request.method == "POST" and request.url.path in BATCH_UPLOAD_PATHS:
+        limit = BATCH_MAX_TOTAL_BYTES
+    if limit is not None:
+        length = request.headers.get("content-length")
+        if length and length.isdigit() and int(length) > limit + UPLOAD_REQUEST_OVERHEAD:
+            return JSONResponse(status_code=413, content={"detail": f"Upload exceeds {limit} bytes"})
+    return await call_next(request)
+
+@app.middleware("http")
+async def request_metrics(request: Request, call_next):
+    """Tag the request with an id, time it and report stage timings as `Server-Timing`."""
+    context, token = start_request(request.headers.get("X-Request-ID"))
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        context.record("total", (time.perf_counter() - started) * 1000)
+        response.headers["Server-Timing"] = context.server_timing()
+        response.headers["X-Request-ID"] = context.request_id
+        return response
+    finally:
+        elapsed = time.perf_counter() - started
+        route = request.scope.get("route")
+        path = getattr(route, "path", "unmatched")
+        REQUEST_SECONDS.observe(elapsed, method=request.method, path=path, status=str(status))
+        if path not in ("/health", "/metrics"):
+            log_event(
+                "request",
+                method=request.method,
+                path=path,
+                status=status,
+                duration_ms=round(elapsed * 1000, 1),
+                timings=context.timings
+            )
+        end_request(token)
 
 
-class HighlightPairModel(BaseModel):
-    jd_phrase: str
-    resume_excerpt: str
-    
-class AnalysisResponse(BaseModel):
-    success: bool
-    score: Optional[int] = None
-    breakdown: Optional[BreakdownModel] = None
-    strengths: List[str] = []
-    weaknesses: List[str] = []
-    suggested_keywords: List[str] = []
-    highlight_pairs: List[HighlightPairModel] = []
-    external_links: List[str] = []
-    llm_count: Optional[int] = None
-    individual_scores: Optional[List[int]] = None
-    extracted_text: Optional[str] = None
-    
 class HealthResponse(BaseModel):
     status: str
     version: str
@@ -79,8 +176,7 @@ class ErrorResponse(BaseModel):
     success: bool = False
     error: str
     detail: Optional[str] = None
-    
-Base.metadata.create_all(bind=engine)
+
 @app.get("/", response_model=HealthResponse)
 async def root():
     """Root endpoint - service info."""
@@ -101,86 +197,30 @@ async def health_check():
 
 @app.post("/analyze", response_model=AnalysisResponse)
 async def analyze(
+    background_tasks: BackgroundTasks,
     resume: UploadFile = File(..., description="Resume file (PDF/DOCX)"),
     job_description: str = Form(..., alias="jd", description="Job description text"),
-    db: Session = Depends(get_db)
+    mode: str = Query("full", pattern="^(full|fast)$", description="`fast` skips the LLMs and returns the local keyword match"),
+    policy: Optional[str] = Query(None, pattern=POLICY_PATTERN, description="Provider routing policy, e.g. `fastest:2` (default: ROUTER_POLICY)")
 ):
     """
     Analyze a resume against a job description using multi-LLM consensus.    
     - **resume**: PDF or DOCX file of the resume
     - **job_description**: Text of the job description to match against
+    - **mode**: `full` (default) or `fast` for a keyword-only score in milliseconds
+    - **policy**: `all`, `fastest:N`, `fastest_two` or `cheapest_sla:N` to pick which providers are called
     
     Returns a comprehensive analysis with scores, strengths, weaknesses, and suggestions.
     """
-    # Validate file type
-    filename = resume.filename or ""
-    allowed_extensions = ('.pdf', '.docx', '.doc')
-    
-    if not filename.lower().endswith(allowed_extensions):
-        raise HTTPException(
-            status_code=400,
-            detail=f"Invalid file type. Allowed: {', '.join(allowed_extensions)}"
-        )
-    
+    upload = await ingest_upload(resume)
     try:
-        
-        content = await resume.read()
-        
-        if len(content) == 0:
-            raise HTTPException(
-                status_code=400,
-                detail="Uploaded file is empty"
-            )  
-        resume_hash = hashlib.sha256(content).hexdigest()         
-        extracted_text = await extract_text_from_pdf(content, filename)        
-        if not extracted_text or len(extracted_text.strip()) < 50:
-            raise HTTPException(
-                status_code=400,
-                detail="Could not extract sufficient text from the uploaded file. Please ensure the file contains readable text."
-            )                
-        urls = extract_urls(extracted_text)
-        print(f"Found {len(urls)} external URLs: {urls}")                
-        external_content = ""
-        if urls:
-            external_content = await fetch_external_content(urls)
-            print(f"Fetched external content: {len(external_content)} chars")                
-        analysis = await analyze_resume(
-            resume_text=extracted_text,
-            job_description=job_description,
-            external_content=external_content
-        )
-        print(f"📊 Analysis result: score = {analysis.get('score')}")
-        print(f"💾 Attempting to save to database...")
-        try:
-            db_result = AnalysisResult(
-                resume_hash=resume_hash,
-                job_description=job_description[:2000],
-                score=analysis.get("score"),
-                breakdown=analysis.get("breakdown"),
-                strengths=analysis.get("strengths", []),
-                weaknesses=analysis.get("weaknesses", []),
-                suggested_keywords=analysis.get("suggested_keywords", [])
-            )
-            db.add(db_result)
-            db.commit()
-            db.refresh(db_result)
-            print(f"✅ Saved analysis to database with ID: {db_result.id}")
-        except Exception as db_error:
-            print(f"❌ Database save error: {db_error}")
-            db.rollback()        
-        return AnalysisResponse(
-            success=True,
-            score=analysis.get("score"),
-            breakdown=analysis.get("breakdown"),
-            strengths=analysis.get("strengths", []),
-            weaknesses=analysis.get("weaknesses", []),
-            suggested_keywords=analysis.get("suggested_keywords", []),
-            highlight_pairs=analysis.get("highlight_pairs", []),
-            external_links=urls,
-            llm_count=analysis.get("llm_count"),
-            individual_scores=analysis.get("individual_scores"),
-            extracted_text=extracted_text[:1000] + "..." if len(extracted_text) > 1000 else extracted_text
-        )        
+        validate_upload(upload)
+        if mode == "fast":
+            payload = await run_fast_analysis(upload, job_description)
+        else:
+            payload = await run_analysis(upload, job_description, background=background_tasks, policy=policy)
+        # Validated and encoded once in the pipeline; cache hits reuse those bytes.
+        return Response(content=render_payload(payload), media_type="application/json")
     except HTTPException:
         raise
     except Exception as e:
@@ -189,6 +229,122 @@ async def analyze(
             status_code=500,
             detail=f"Analysis failed: {str(e)}"
         )
+    finally:
+        upload.close()
+
+@app.post("/analyze/stream")
+async def analyze_stream(
+    background_tasks: BackgroundTasks,
+    resume: UploadFile = File(..., description="Resume file (PDF/DOCX)"),
+    job_description: str = Form(..., alias="jd", description="Job description text"),
+    policy: Optional[str] = Query(None, pattern=POLICY_PATTERN, description="Provider routing policy (default: ROUTER_POLICY)")
+):
+    """
+    Same analysis as `/analyze`, streamed as Server-Sent Events.
+
+    Emits `extracted`, `keywords`, `links`, `external`, then a `provider` and
+    an updated `consensus` event as each LLM finishes (flagged `speculative`
+    for runs started before external content arrived), and finally `result`
+    with the `AnalysisResponse` body (or `error` with `status_code` and `detail`).
+    """
+    upload = await ingest_upload(resume)
+    try:
+        validate_upload(upload)
+    except HTTPException:
+        upload.close()
+        raise
+    # In case the client goes away before the stream starts `run`.
+    background_tasks.add_task(upload.close)
+
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def on_event(event: str, data: dict) -> None:
+        await queue.put((event, data))
+
+    async def run() -> None:
+        try:
+            payload = await run_analysis(upload, job_description, on_event, background=background_tasks, policy=policy)
+            await queue.put(("result", render_payload(payload).decode("utf-8")))
+        except HTTPException as e:
+            await queue.put(("error", {"status_code": e.status_code, "detail": e.detail}))
+        except Exception as e:
+            print(f"Analysis error: {e}")
+            await queue.put(("error", {"status_code": 500, "detail": f"Analysis failed: {str(e)}"}))
+        finally:
+            upload.close()
+
+    async def event_stream():
+        task = asyncio.create_task(run())
+        try:
+            while True:
+                event, data = await queue.get()
+                body = data if isinstance(data, str) else dumps_str(data)
+                yield f"event: {event}\ndata: {body}\n\n"
+                if event in ("result", "error"):
+                    break
+        finally:
+            if not task.done():
+                task.cancel()
+
+    return StreamingResponse(
+        event_stream(),
+        background=background_tasks,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/startup")
+async def startup_profile():
+    """Milliseconds from process start to import, lifespan and ready, plus each deferred initialization step."""
+    return startup.profile()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Prometheus histograms: upload size, extraction, URL fetches, provider calls, DB writes and stages."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Hit/miss counters and eviction policy for the analysis, parsed-JD, external-page and extracted-text caches."""
+    return {
+        "analysis": await asyncio.to_thread(analysis_cache.stats),
+        "parsed_jd": jd_cache.stats(),
+        "external_pages": await asyncio.to_thread(url_cache.stats),
+        "extracted_text": await asyncio.to_thread(text_cache.stats)
+    }
+
+@app.get("/extraction/stats")
+async def extraction_stats():
+    """Extraction worker pool configuration and job counters."""
+    return extraction_executor.stats()
+
+@app.get("/db/stats")
+async def db_writer_stats():
+    """Write-behind queue depth and batch counters."""
+    return analysis_writer.stats()
+
+@app.get("/providers")
+async def providers_info():
+    """Configured LLM providers, warm-up results, breaker state and concurrency limits."""
+    return {**provider_registry.stats(), "health": provider_guards.snapshot()}
+
+@app.post("/providers/reload")
+async def reload_providers():
+    """Re-read the env file and rebuild LLM clients if provider settings changed."""
+    load_dotenv(env_path, override=True)
+    reloaded = provider_registry.reload()
+    return {"reloaded": reloaded, **provider_registry.stats()}
+
+@app.get("/admin/providers/stats")
+async def provider_router_stats():
+    """Live EWMA latency, error rate and cost per provider, and how often the router picked each."""
+    return provider_router.snapshot()
+
+@app.post("/admin/providers/stats/reset")
+async def reset_provider_router_stats():
+    """Forget all routing stats, including the persisted copy."""
+    await asyncio.to_thread(provider_router.reset)
+    return provider_router.snapshot()
 
 @app.get("/db-test")
 async def test_db(db: Session = Depends(get_db)):
@@ -200,6 +356,70 @@ async def test_db(db: Session = Depends(get_db)):
     except Exception as e:
         return {"status": "error", "message": str(e)}  
     
+@app.post("/analyze/batch", status_code=202)
+async def analyze_batch(
+    job_description: str = Form(..., alias="jd", description="Job description text"),
+    resumes: List[UploadFile] = File(default=[], description="Resume files (PDF/DOCX)"),
+    archive: Optional[UploadFile] = File(default=None, description="Zip archive of resumes")
+):
+    """
+    Score many resumes against one job description.
+    Accepts any mix of `resumes` files and a zip `archive`. Work runs in the
+    background; poll `/analyze/batch/{batch_id}` for ranked results.
+    """
+    # Every file is spooled to disk as it arrives; the batch holds paths, not bytes.
+    files = await collect_files(resumes, archive)
+    try:
+        batch = batch_manager.submit(job_description, files)
+    except BaseException:
+        for upload in files:
+            upload.close()
+        raise
+    return batch.summary()
+
+@app.get("/analyze/batch/{batch_id}")
+async def get_batch(
+    batch_id: str,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100)
+):
+    """Batch progress plus one page of items ranked by score, each with its own status."""
+    batch = await batch_manager.find(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return batch.page(page, page_size)
+
+@app.post("/jobs", status_code=202)
+async def submit_job(
+    resume: UploadFile = File(..., description="Resume file (PDF/DOCX)"),
+    job_description: str = Form(..., alias="jd", description="Job description text")
+):
+    """
+    Queue an analysis and return immediately with a job id.
+    Responds `429` when the queue is saturated.
+    """
+    upload = await ingest_upload(resume)
+    try:
+        validate_upload(upload)
+        content = await asyncio.to_thread(upload.read)
+    finally:
+        upload.close()
+    job = await job_queue.submit(upload.filename, content, job_description)
+    return {**job, "status_url": f"/jobs/{job['job_id']}"}
+
+@app.get("/jobs/stats")
+async def job_stats():
+    """Queue depth, worker count and job counters."""
+    return await job_queue.stats()
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Job status; `result` holds the `/analyze` response body once `status` is `done`."""
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
 @app.post("/extract-text")
 async def extract_text_only(
     resume: UploadFile = File(..., description="Resume file (PDF/DOCX)")
@@ -213,9 +433,12 @@ async def extract_text_only(
     if not filename.lower().endswith(('.pdf', '.docx', '.doc')):
         raise HTTPException(status_code=400, detail="Invalid file type")
     
+    upload = await ingest_upload(resume)
     try:
-        content = await resume.read()
-        extracted_text = await extract_text_from_pdf(content, filename)
+        try:
+            extracted_text = await extract_text_cached(upload.source(), filename, upload.sha256)
+        except ExtractionTimeout as e:
+            raise HTTPException(status_code=422, detail=str(e))
         
         if not extracted_text:
             raise HTTPException(status_code=400, detail="Could not extract text")
@@ -233,6 +456,10 @@ async def extract_text_only(
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        upload.close()
+
+startup.mark("app_imported")
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8080))
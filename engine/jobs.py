@@ -0,0 +1,270 @@
+import os
+import uuid
+import asyncio
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Dict, Any
+from fastapi import HTTPException
+from sqlalchemy import update, insert, select, func, literal
+
+from database import SessionLocal
+from models import AnalysisJob
+from pipeline import run_analysis
+from utils.uploads import StoredUpload
+
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 2))
+JOB_QUEUE_MAX = int(os.environ.get("JOB_QUEUE_MAX", 100))
+JOB_POLL_INTERVAL = float(os.environ.get("JOB_POLL_INTERVAL", 2.0))
+JOB_STALE_AFTER = int(os.environ.get("JOB_STALE_AFTER", 600))
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", 2))
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class JobQueue:
+    """
+    Persistent analysis queue backed by the `analysis_jobs` table.
+
+    `submit` stores the upload and returns immediately; in-process workers
+    claim queued rows (a conditional UPDATE, so several instances can share
+    the table), run the normal analysis pipeline and store the result.
+    Submissions are rejected with 429 once JOB_QUEUE_MAX jobs are waiting or
+    running, keeping latency bounded under load. Jobs left `running` by a
+    crashed instance are re-queued after JOB_STALE_AFTER seconds.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, max_depth: int = JOB_QUEUE_MAX):
+        self.workers = workers
+        self.max_depth = max_depth
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._insert_lock = threading.Lock()
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, filename: str, content: bytes, job_description: str) -> Dict[str, Any]:
+        """
+        Enqueue an analysis.
+        Raises:
+            HTTPException: 429 when the queue is saturated
+        """
+        job_id = uuid.uuid4().hex
+        accepted = await asyncio.to_thread(self._insert, job_id, filename, content, job_description)
+        if not accepted:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=429,
+                detail="Analysis queue is full, please retry shortly",
+                headers={"Retry-After": str(int(JOB_POLL_INTERVAL * 5))}
+            )
+        self.submitted += 1
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return {"job_id": job_id, "status": "queued"}
+
+    def _insert(self, job_id: str, filename: str, content: bytes, job_description: str) -> bool:
+        """
+        Insert the job only while fewer than `max_depth` jobs are waiting or
+        running. The depth check is part of the INSERT itself (INSERT ...
+        SELECT ... WHERE depth < max), so concurrent submits cannot overshoot.
+        """
+        depth = (
+            select(func.count())
+            .select_from(AnalysisJob)
+            .where(AnalysisJob.status.in_(("queued", "running")))
+            .scalar_subquery()
+        )
+        row = select(
+            literal(job_id, AnalysisJob.id.type),
+            literal("queued", AnalysisJob.status.type),
+            literal(filename, AnalysisJob.filename.type),
+            literal(job_description, AnalysisJob.job_description.type),
+            literal(content, AnalysisJob.resume.type),
+            literal(0, AnalysisJob.attempts.type),
+        ).where(depth < self.max_depth)
+        statement = insert(AnalysisJob).from_select(
+            ["id", "status", "filename", "job_description", "resume", "attempts"], row
+        )
+        with self._insert_lock:
+            db = SessionLocal()
+            try:
+                inserted = db.execute(statement).rowcount
+                db.commit()
+                return inserted == 1
+            finally:
+                db.close()
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self._load, job_id)
+
+    def _load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        db = SessionLocal()
+        try:
+            job = db.get(AnalysisJob, job_id)
+            if job is None:
+                return None
+            info = {
+                "job_id": job.id,
+                "status": job.status,
+                "filename": job.filename,
+                "created_at": job.created_at,
+                "started_at": job.started_at,
+                "finished_at": job.finished_at,
+                "result": job.result,
+                "error": job.error,
+            }
+            if job.status == "queued":
+                info["position"] = db.query(AnalysisJob).filter(
+                    AnalysisJob.status == "queued",
+                    AnalysisJob.created_at <= job.created_at
+                ).count()
+            return info
+        finally:
+            db.close()
+
+    def _claim_next(self) -> Optional[AnalysisJob]:
+        """Atomically move the oldest queued job to `running`; None if there is none."""
+        db = SessionLocal()
+        try:
+            stale_before = _now() - timedelta(seconds=JOB_STALE_AFTER)
+            db.execute(
+                update(AnalysisJob)
+                .where(AnalysisJob.status == "running", AnalysisJob.started_at < stale_before)
+                .values(status="queued")
+            )
+            db.commit()
+
+            candidates = (
+                db.query(AnalysisJob.id)
+                .filter(AnalysisJob.status == "queued")
+                .order_by(AnalysisJob.created_at, AnalysisJob.id)
+                .limit(5)
+                .all()
+            )
+            for (job_id,) in candidates:
+                claimed = db.execute(
+                    update(AnalysisJob)
+                    .where(AnalysisJob.id == job_id, AnalysisJob.status == "queued")
+                    .values(status="running", started_at=_now(), attempts=AnalysisJob.attempts + 1)
+                )
+                db.commit()
+                if claimed.rowcount == 1:
+                    job = db.get(AnalysisJob, job_id)
+                    db.expunge(job)
+                    return job
+            return None
+        finally:
+            db.close()
+
+    def _finish(self, job_id: str, status: str, result: Optional[Dict[str, Any]], error: Optional[str]) -> None:
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(AnalysisJob)
+                .where(AnalysisJob.id == job_id)
+                .values(status=status, result=result, error=error, resume=None, finished_at=_now())
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    async def _worker(self, worker_id: int) -> None:
+        while True:
+            try:
+                job = await asyncio.to_thread(self._claim_next)
+            except Exception as e:
+                print(f"❌ Job worker {worker_id} could not claim a job: {e}")
+                job = None
+
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), JOB_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            print(f"🧾 Job {job.id[:8]} started on worker {worker_id} (attempt {job.attempts})")
+            try:
+                upload = StoredUpload.from_bytes(job.filename or "", job.resume or b"")
+                result = await run_analysis(upload, job.job_description or "")
+            except HTTPException as e:
+                await self._update(worker_id, self._finish, job.id, "failed", None, str(e.detail))
+                self.failed += 1
+            except asyncio.CancelledError:
+                # Shutting down: leave the job for the next start (or another instance).
+                await self._update(worker_id, self._requeue, job.id)
+                raise
+            except Exception as e:
+                print(f"Job {job.id[:8]} failed: {e}")
+                if job.attempts < JOB_MAX_ATTEMPTS:
+                    await self._update(worker_id, self._requeue, job.id)
+                else:
+                    await self._update(worker_id, self._finish, job.id, "failed", None, f"Analysis failed: {str(e)}")
+                    self.failed += 1
+            else:
+                await self._update(worker_id, self._finish, job.id, "done", result, None)
+                self.completed += 1
+
+    async def _update(self, worker_id: int, action, job_id: str, *args) -> None:
+        """
+        Store a job's new status off the event loop. A failed write is logged
+        and the worker keeps going; the job stays `running` and is re-queued
+        once it is stale.
+        """
+        try:
+            await asyncio.to_thread(action, job_id, *args)
+        except Exception as e:
+            print(f"❌ Job worker {worker_id} could not update job {job_id[:8]}: {e}")
+
+    def _requeue(self, job_id: str) -> None:
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(AnalysisJob)
+                .where(AnalysisJob.id == job_id, AnalysisJob.status == "running")
+                .values(status="queued", started_at=None)
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    async def stats(self) -> Dict[str, Any]:
+        def depth() -> Dict[str, int]:
+            db = SessionLocal()
+            try:
+                return {
+                    status: db.query(AnalysisJob).filter(AnalysisJob.status == status).count()
+                    for status in ("queued", "running")
+                }
+            finally:
+                db.close()
+
+        return {
+            "workers": len(self._tasks),
+            "max_depth": self.max_depth,
+            **await asyncio.to_thread(depth),
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+
+job_queue = JobQueue()
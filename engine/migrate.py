@@ -0,0 +1,11 @@
+"""
+Bring the database schema up to date (missing tables, columns and indexes).
+
+Run from engine/ as a deploy step:  python migrate.py
+With DB_INIT_ON_STARTUP=false the server then skips this work entirely.
+"""
+from database import init_db, DATABASE_URL
+
+if __name__ == "__main__":
+    init_db()
+    print(f"✅ Schema up to date ({DATABASE_URL.split('@')[-1]})")
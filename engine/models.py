@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON, Text
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Text, LargeBinary, Float
 from sqlalchemy.sql import func
 from database import Base
 
@@ -7,12 +7,20 @@ class AnalysisResult(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     resume_hash = Column(String(64), index=True)  # To avoid duplicate analyses
+    cache_key = Column(String(64), index=True)  # resume hash + JD hash + provider set
+    jd_hash = Column(String(64))
+    providers = Column(JSON)  # providers that made it into the consensus
     job_description = Column(Text)
     score = Column(Integer)
     breakdown = Column(JSON)
     strengths = Column(JSON)
     weaknesses = Column(JSON)
     suggested_keywords = Column(JSON)
+    highlight_pairs = Column(JSON)
+    external_links = Column(JSON)
+    llm_count = Column(Integer)
+    individual_scores = Column(JSON)
+    extracted_preview = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 class UserSession(Base):
@@ -22,4 +30,49 @@ class UserSession(Base):
     session_id = Column(String(64), unique=True, index=True)
     analyses_count = Column(Integer, default=0)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    last_active = Column(DateTime(timezone=True), onupdate=func.now())
\ No newline at end of file
+    last_active = Column(DateTime(timezone=True), onupdate=func.now())
+
+class AnalysisJob(Base):
+    __tablename__ = "analysis_jobs"
+
+    id = Column(String(32), primary_key=True)
+    status = Column(String(16), index=True, default="queued")  # queued, running, done, failed
+    filename = Column(String(255))
+    job_description = Column(Text)
+    resume = Column(LargeBinary)  # cleared once the job finishes
+    result = Column(JSON)
+    error = Column(Text)
+    attempts = Column(Integer, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+
+class ParsedJobDescription(Base):
+    __tablename__ = "parsed_job_descriptions"
+
+    jd_hash = Column(String(64), primary_key=True)  # hash of the normalized JD text
+    parser_version = Column(String(16))
+    parsed = Column(JSON)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class ExternalPage(Base):
+    __tablename__ = "external_pages"
+
+    url = Column(String(2048), primary_key=True)
+    status = Column(String(16))  # ok, negative
+    content = Column(Text)  # parsed text, empty for negative entries
+    etag = Column(String(255))
+    last_modified = Column(String(64))
+    fetched_at = Column(DateTime(timezone=True))
+    expires_at = Column(DateTime(timezone=True))
+
+class ProviderStat(Base):
+    __tablename__ = "provider_stats"
+
+    name = Column(String(64), primary_key=True)
+    latency_ewma = Column(Float)  # seconds, successful calls
+    error_rate_ewma = Column(Float)
+    cost_ewma = Column(Float)  # USD per call
+    calls = Column(Integer, default=0)
+    errors = Column(Integer, default=0)
+    updated_at = Column(DateTime(timezone=True))
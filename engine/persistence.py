@@ -0,0 +1,132 @@
+import os
+import asyncio
+import time
+from typing import Optional, List, Dict, Any
+from database import SessionLocal
+from models import AnalysisResult
+from utils.metrics import DB_WRITE_SECONDS
+
+WRITE_BATCH_SIZE = int(os.environ.get("WRITE_BATCH_SIZE", 50))
+WRITE_FLUSH_INTERVAL = float(os.environ.get("WRITE_FLUSH_INTERVAL", 1.0))
+WRITE_QUEUE_MAX = int(os.environ.get("WRITE_QUEUE_MAX", 10000))
+
+_STOP = object()
+
+
+class AnalysisWriter:
+    """
+    Write-behind queue for AnalysisResult rows.
+
+    Requests enqueue plain dicts and return immediately; a background task
+    batches them and inserts each batch in a worker thread, flushing when
+    `batch_size` rows are waiting or `flush_interval` seconds have passed.
+    `stop()` drains whatever is left, so rows survive a clean shutdown.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = WRITE_BATCH_SIZE,
+        flush_interval: float = WRITE_FLUSH_INTERVAL,
+        max_queue: int = WRITE_QUEUE_MAX
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.failed = 0
+        self.dropped = 0
+        self.batches = 0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._task = asyncio.create_task(self._run())
+
+    def enqueue(self, record: Dict[str, Any]) -> bool:
+        """
+        Queue an AnalysisResult row (as column kwargs) for insertion.
+        Returns:
+            False if the writer is not running or the queue is full
+        """
+        if self._queue is None:
+            self.dropped += 1
+            return False
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            print(f"❌ Write queue full, dropping analysis for {record.get('resume_hash', '')[:12]}")
+            return False
+
+    async def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch = []
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+            batch.append(item)
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        try:
+            with DB_WRITE_SECONDS.time():
+                await asyncio.to_thread(_write_batch, batch)
+            self.written += len(batch)
+            self.batches += 1
+        except Exception as e:
+            self.failed += len(batch)
+            print(f"❌ Database batch write error ({len(batch)} rows): {e}")
+
+    async def stop(self) -> None:
+        """Flush everything still queued, then stop the background task."""
+        if self._task is None:
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+        self._queue = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "written": self.written,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "batch_size": self.batch_size,
+            "flush_interval_seconds": self.flush_interval,
+        }
+
+
+def _write_batch(batch: List[Dict[str, Any]]) -> None:
+    db = SessionLocal()
+    try:
+        db.add_all([AnalysisResult(**record) for record in batch])
+        db.commit()
+        print(f"✅ Saved {len(batch)} analyses to database")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+analysis_writer = AnalysisWriter()
@@ -0,0 +1,411 @@
+import os
+import time
+import asyncio
+import contextlib
+from typing import Optional, List, Dict, Any, Callable, Awaitable, Tuple
+from fastapi import HTTPException, BackgroundTasks
+
+from chains.resume_chain import analyze_resume, combine_analyses, get_active_providers
+from chains.router import parse_policy
+from utils.pdf_parser import extract_text_cached
+from utils.extraction_pool import ExtractionTimeout
+from utils.url_fetcher import fetch_external_content, extract_urls
+from utils.analysis_cache import analysis_cache, hash_job_description, make_cache_key, AnalysisPayload
+from utils.keyword_scorer import score_keywords, find_divergent
+from utils.jd_cache import jd_cache
+from persistence import analysis_writer
+from utils.uploads import StoredUpload
+from stages import Stage, StageGraph
+from schemas import AnalysisResponse
+from utils.serialization import with_fields
+from utils.metrics import UPLOAD_BYTES, STAGE_SECONDS, record_timing, log_event
+
+ALLOWED_EXTENSIONS = ('.pdf', '.docx', '.doc')
+
+# Seconds link fetching may add before providers run without external content.
+EXTERNAL_STAGE_TIMEOUT = float(os.environ.get("EXTERNAL_STAGE_TIMEOUT", 15))
+# Start providers before external content arrives (costs a second run when links yield content).
+SPECULATIVE_ANALYSIS = os.environ.get("SPECULATIVE_ANALYSIS", "0").lower() in ("1", "true", "yes")
+
+EventCallback = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+
+async def _no_event(event: str, data: Dict[str, Any]) -> None:
+    return None
+
+
+def validate_upload(upload: StoredUpload) -> None:
+    """Reject unsupported or empty uploads with a 400."""
+    if not upload.filename.lower().endswith(ALLOWED_EXTENSIONS):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid file type. Allowed: {', '.join(ALLOWED_EXTENSIONS)}"
+        )
+    if upload.size == 0:
+        raise HTTPException(
+            status_code=400,
+            detail="Uploaded file is empty"
+        )
+    UPLOAD_BYTES.observe(upload.size)
+
+
+async def _extract(upload: StoredUpload) -> str:
+    try:
+        extracted_text = await extract_text_cached(upload.source(), upload.filename, upload.sha256)
+    except ExtractionTimeout as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if not extracted_text or len(extracted_text.strip()) < 50:
+        raise HTTPException(
+            status_code=400,
+            detail="Could not extract sufficient text from the uploaded file. Please ensure the file contains readable text."
+        )
+    return extracted_text
+
+
+def _job_profile(parsed_jd: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "seniority": parsed_jd["seniority"],
+        "skills": parsed_jd["skills"][:15],
+        "requirements": parsed_jd["requirements"][:10],
+    }
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+def serialize_payload(payload: Dict[str, Any]) -> bytes:
+    """Validate `payload` against AnalysisResponse and encode it, minus `timings`."""
+    return AnalysisResponse.model_validate(payload).model_dump_json(exclude={"timings"}).encode("utf-8")
+
+
+def _with_body(payload: Dict[str, Any]) -> AnalysisPayload:
+    # Invalid results still go to batches and jobs; /analyze fails on them in render_payload as before.
+    try:
+        body = serialize_payload(payload)
+    except ValueError as e:
+        print(f"❌ Response validation error: {e}")
+        body = None
+    return AnalysisPayload(payload, body)
+
+
+async def _cache_put(cache_key: str, value: AnalysisPayload) -> None:
+    try:
+        if analysis_cache.shared is not None:
+            await asyncio.to_thread(analysis_cache.put, cache_key, value)
+        else:
+            analysis_cache.put(cache_key, value)
+    except Exception as e:
+        print(f"❌ Analysis cache write error: {e}")
+
+
+def render_payload(payload: Dict[str, Any]) -> bytes:
+    """AnalysisResponse JSON for `payload`, reusing its cached body when it has one."""
+    body = getattr(payload, "body", None) or serialize_payload(payload)
+    return with_fields(body, {"timings": payload.get("timings")})
+
+
+def _from_cache(cached: AnalysisPayload, started: float) -> AnalysisPayload:
+    cache_ms = _elapsed_ms(started)
+    record_timing("cache", cache_ms / 1000)
+    return AnalysisPayload({**cached, "timings": {"cache": cache_ms}}, cached.body)
+
+
+def _preview(extracted_text: str) -> str:
+    return extracted_text[:1000] + "..." if len(extracted_text) > 1000 else extracted_text
+
+
+async def run_fast_analysis(upload: StoredUpload, job_description: str) -> Dict[str, Any]:
+    """
+    Keyword-only analysis (`mode=fast`): local TF-IDF match, no LLM calls,
+    no external link fetching and no persistence.
+    Returns:
+        Payload matching AnalysisResponse, with `breakdown` left empty
+    """
+    extracted_text, parsed_jd = await asyncio.gather(
+        _extract(upload),
+        jd_cache.get(job_description)
+    )
+    keyword_match = await asyncio.to_thread(score_keywords, extracted_text, job_description, parsed_jd["segments"])
+    keyword_match["job_profile"] = _job_profile(parsed_jd)
+    print(f"⚡ Keyword match: {keyword_match['skills_match']} in {keyword_match['elapsed_ms']}ms")
+    return {
+        "success": True,
+        "mode": "fast",
+        "score": keyword_match["skills_match"],
+        "suggested_keywords": keyword_match["missing_keywords"],
+        "highlight_pairs": keyword_match["highlight_pairs"],
+        "external_links": extract_urls(extracted_text),
+        "llm_count": 0,
+        "individual_scores": [],
+        "keyword_match": keyword_match,
+        "extracted_text": _preview(extracted_text)
+    }
+
+
+async def _consensus(
+    extracted_text: str,
+    job_description: str,
+    parsed_jd: Dict[str, Any],
+    external_content: str,
+    emit: EventCallback,
+    llm_slots: Optional[asyncio.Semaphore],
+    policy: Optional[str] = None,
+    speculative: bool = False
+) -> Tuple[Dict[str, Any], List[Tuple[str, Dict[str, Any]]]]:
+    """
+    One multi-LLM consensus run, emitting "provider" and "consensus" events
+    (flagged `speculative` for runs made without external content).
+    Returns:
+        (combined analysis, [(provider, result), ...] in completion order)
+    """
+    partials: List[Tuple[str, Dict[str, Any]]] = []
+
+    async def on_provider_result(name: str, result: Dict[str, Any]) -> None:
+        partials.append((name, result))
+        await emit("provider", {
+            "provider": name,
+            "score": result.get("score"),
+            "breakdown": result.get("breakdown"),
+            "speculative": speculative
+        })
+        running = combine_analyses([r for _, r in partials], providers=[n for n, _ in partials])
+        await emit("consensus", {
+            "score": running.get("score"),
+            "breakdown": running.get("breakdown"),
+            "llm_count": running.get("llm_count"),
+            "individual_scores": running.get("individual_scores"),
+            "providers": running.get("providers"),
+            "speculative": speculative
+        })
+
+    async with llm_slots or contextlib.nullcontext():
+        analysis = await analyze_resume(
+            resume_text=extracted_text,
+            job_description=job_description,
+            external_content=external_content,
+            on_provider_result=on_provider_result,
+            parsed_jd=parsed_jd,
+            policy=policy
+        )
+    return analysis, partials
+
+
+async def run_analysis(
+    upload: StoredUpload,
+    job_description: str,
+    on_event: Optional[EventCallback] = None,
+    jd_hash: Optional[str] = None,
+    llm_slots: Optional[asyncio.Semaphore] = None,
+    background: Optional[BackgroundTasks] = None,
+    policy: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Full /analyze pipeline: cache lookup, then a stage graph where
+    extraction and JD parsing overlap, link fetching runs beside keyword
+    scoring, and providers are called once their inputs are ready. With
+    SPECULATIVE_ANALYSIS the providers also start without external content;
+    that result is used when the links yield nothing and is otherwise
+    refined by a second run that includes it.
+    Args:
+        upload: Uploaded resume (see utils.uploads)
+        job_description: Job description text
+        on_event: Awaited with (event name, data) as each stage finishes:
+            "extracted", "keywords", "links", "external", "provider" and "consensus"
+        jd_hash: Precomputed job description hash (batches share one)
+        llm_slots: Semaphore held around the provider calls to bound LLM concurrency
+        background: When given, the write-behind enqueue is added here so it
+            runs after the response is sent
+        policy: Provider routing policy (see chains.router); ROUTER_POLICY by default
+    Returns:
+        AnalysisPayload matching AnalysisResponse, with per-stage `timings` in ms
+    Raises:
+        HTTPException: For unreadable uploads or an unknown policy
+    """
+    emit = on_event or _no_event
+    started = time.perf_counter()
+    try:
+        kind, count = parse_policy(policy)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    resume_hash = upload.sha256
+    jd_hash = jd_hash or hash_job_description(job_description)
+    providers = get_active_providers()
+    # Routed subsets are cached apart from full-consensus results.
+    key_parts = providers if kind == "all" else providers + [f"policy={kind}:{count}"]
+    cache_key = make_cache_key(resume_hash, jd_hash, key_parts)
+
+    cached = analysis_cache.get(cache_key)
+    if cached is not None:
+        print(f"⚡ Analysis cache hit (memory): {cache_key[:12]}")
+        return _from_cache(cached, started)
+    try:
+        cached, tier = await asyncio.to_thread(analysis_cache.load, cache_key)
+    except Exception as cache_error:
+        print(f"❌ Analysis cache lookup error: {cache_error}")
+        cached, tier = None, ""
+    if cached is not None:
+        print(f"⚡ Analysis cache hit ({tier}): {cache_key[:12]}")
+        if tier == "database":
+            cached = _with_body(cached)
+            await _cache_put(cache_key, cached)
+        return _from_cache(cached, started)
+    analysis_cache.record_miss()
+    cache_ms = _elapsed_ms(started)
+    record_timing("cache", cache_ms / 1000)
+
+    # Resolved by the speculative stage; `refined` tells it to stop early
+    # (set as soon as the run with external content starts).
+    speculative_result: asyncio.Future = asyncio.get_running_loop().create_future()
+    refined = asyncio.Event()
+
+    async def extract_stage(deps: Dict[str, Any]) -> str:
+        extracted_text = await _extract(upload)
+        await emit("extracted", {
+            "char_count": len(extracted_text),
+            "word_count": len(extracted_text.split())
+        })
+        return extracted_text
+
+    async def jd_stage(deps: Dict[str, Any]) -> Dict[str, Any]:
+        return await jd_cache.get(job_description, jd_hash)
+
+    async def keywords_stage(deps: Dict[str, Any]) -> Dict[str, Any]:
+        parsed_jd = deps["jd"]
+        keyword_match = await asyncio.to_thread(score_keywords, deps["extract"], job_description, parsed_jd["segments"])
+        keyword_match["job_profile"] = _job_profile(parsed_jd)
+        await emit("keywords", {
+            "skills_match": keyword_match["skills_match"],
+            "missing_keywords": keyword_match["missing_keywords"]
+        })
+        return keyword_match
+
+    async def links_stage(deps: Dict[str, Any]) -> List[str]:
+        urls = extract_urls(deps["extract"])
+        print(f"Found {len(urls)} external URLs: {urls}")
+        await emit("links", {"external_links": urls})
+        return urls
+
+    async def external_stage(deps: Dict[str, Any]) -> str:
+        if not deps["links"]:
+            return ""
+        external_content = await fetch_external_content(deps["links"])
+        print(f"Fetched external content: {len(external_content)} chars")
+        await emit("external", {"char_count": len(external_content)})
+        return external_content
+
+    async def speculative_stage(deps: Dict[str, Any]) -> Optional[tuple]:
+        run = asyncio.create_task(_consensus(
+            deps["extract"], job_description, deps["jd"], "", emit, llm_slots, policy, speculative=True
+        ))
+        superseded = asyncio.create_task(refined.wait())
+        try:
+            await asyncio.wait({run, superseded}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            superseded.cancel()
+            if not run.done():
+                run.cancel()
+            await asyncio.gather(run, superseded, return_exceptions=True)
+        result = None
+        if run.cancelled():
+            pass
+        elif run.exception() is not None:
+            print(f"Speculative analysis failed: {run.exception()}")
+        else:
+            result = run.result()
+        if not speculative_result.done():
+            speculative_result.set_result(result)
+        return result
+
+    async def analysis_stage(deps: Dict[str, Any]) -> tuple:
+        if SPECULATIVE_ANALYSIS and not deps["external"]:
+            result = await speculative_result
+            if result is not None and result[0].get("score") is not None:
+                print("🔮 Using speculative analysis (no external content)")
+                return result
+        # Cancel the speculative run before this one starts. Cancelling it cancels
+        # its provider calls (wait_for_quorum), which give back their limiter slots
+        # as they unwind; the stage resolves the future only after all of that.
+        refined.set()
+        if SPECULATIVE_ANALYSIS:
+            await asyncio.wait({speculative_result})
+        return await _consensus(
+            deps["extract"], job_description, deps["jd"], deps["external"], emit, llm_slots, policy
+        )
+
+    stages = [
+        Stage("extract", extract_stage),
+        Stage("jd", jd_stage),
+        Stage("keywords", keywords_stage, after=("extract", "jd")),
+        Stage("links", links_stage, after=("extract",)),
+        Stage("external", external_stage, after=("links",), timeout=EXTERNAL_STAGE_TIMEOUT, optional=True, default=""),
+        Stage("analysis", analysis_stage, after=("extract", "jd", "external")),
+    ]
+    if SPECULATIVE_ANALYSIS:
+        stages.append(Stage("speculative", speculative_stage, after=("extract", "jd"), optional=True))
+    graph = StageGraph(stages)
+    try:
+        results = await graph.run()
+    finally:
+        if not speculative_result.done():
+            speculative_result.cancel()
+        for name, ms in graph.durations().items():
+            STAGE_SECONDS.observe(ms / 1000, stage=name)
+            record_timing(name, ms / 1000)
+
+    extracted_text = results["extract"]
+    keyword_match = results["keywords"]
+    urls = results["links"]
+    analysis, partials = results["analysis"]
+    print(f"📊 Analysis result: score = {analysis.get('score')}")
+
+    keyword_match["divergent_providers"] = find_divergent(keyword_match, partials)
+    if keyword_match["divergent_providers"]:
+        print(f"⚠️ Providers diverge from keyword match ({keyword_match['skills_match']}): {keyword_match['divergent_providers']}")
+
+    extracted_preview = _preview(extracted_text)
+    record = {
+        "resume_hash": resume_hash,
+        "cache_key": cache_key,
+        "jd_hash": jd_hash,
+        "providers": analysis.get("providers", []),
+        "job_description": job_description[:2000],
+        "score": analysis.get("score"),
+        "breakdown": analysis.get("breakdown"),
+        "strengths": analysis.get("strengths", []),
+        "weaknesses": analysis.get("weaknesses", []),
+        "suggested_keywords": analysis.get("suggested_keywords", []),
+        "highlight_pairs": analysis.get("highlight_pairs", []),
+        "external_links": urls,
+        "llm_count": analysis.get("llm_count"),
+        "individual_scores": analysis.get("individual_scores"),
+        "extracted_preview": extracted_preview
+    }
+    if background is not None:
+        background.add_task(analysis_writer.enqueue, record)
+    else:
+        analysis_writer.enqueue(record)
+    payload = {
+        "success": True,
+        "score": analysis.get("score"),
+        "breakdown": analysis.get("breakdown"),
+        "strengths": analysis.get("strengths", []),
+        "weaknesses": analysis.get("weaknesses", []),
+        "suggested_keywords": analysis.get("suggested_keywords", []),
+        "highlight_pairs": analysis.get("highlight_pairs", []),
+        "external_links": urls,
+        "llm_count": analysis.get("llm_count"),
+        "individual_scores": analysis.get("individual_scores"),
+        "providers": analysis.get("providers", []),
+        "dropped_providers": analysis.get("dropped_providers", []),
+        "compaction": analysis.get("compaction"),
+        "keyword_match": keyword_match,
+        "extracted_text": extracted_preview
+    }
+    prepared = _with_body(payload)
+    if payload["score"] is not None:
+        await _cache_put(cache_key, prepared)
+    timings = {"cache": cache_ms, **graph.durations()}
+    log_event("analysis", cache_key=cache_key[:12], score=payload["score"], providers=payload["providers"], timings=timings)
+    return AnalysisPayload({**payload, "timings": timings}, prepared.body)
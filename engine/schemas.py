@@ -0,0 +1,38 @@
+from typing import Optional, List, Dict, Any
+from pydantic import BaseModel
+
+# Response models shared by the API and the pipeline, which serializes results once.
+
+
+class BreakdownModel(BaseModel):
+    skills: int
+    experience: int
+    projects: int
+    quality: int
+    education: int
+    external: int
+
+
+class HighlightPairModel(BaseModel):
+    jd_phrase: str
+    resume_excerpt: str
+
+
+class AnalysisResponse(BaseModel):
+    success: bool
+    mode: str = "full"
+    score: Optional[int] = None
+    breakdown: Optional[BreakdownModel] = None
+    strengths: List[str] = []
+    weaknesses: List[str] = []
+    suggested_keywords: List[str] = []
+    highlight_pairs: List[HighlightPairModel] = []
+    external_links: List[str] = []
+    llm_count: Optional[int] = None
+    individual_scores: Optional[List[int]] = None
+    providers: List[str] = []
+    dropped_providers: List[str] = []
+    compaction: Optional[Dict[str, Any]] = None
+    keyword_match: Optional[Dict[str, Any]] = None
+    extracted_text: Optional[str] = None
+    timings: Optional[Dict[str, float]] = None
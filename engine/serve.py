@@ -0,0 +1,132 @@
+"""
+Production server: a gunicorn master forking uvicorn workers.
+
+The app module is imported once in the master (`preload_app`). That import is
+kept light: the schema check, provider clients and heavy parser/LangChain
+imports run in each worker's lifespan after the port is bound, so /health
+answers while they load (see startup.py). Run `python migrate.py` as a
+release step with DB_INIT_ON_STARTUP=false to take the schema check out of
+startup entirely.
+With more than one worker the analysis/URL caches and batch progress move to
+the shared SQLite store (CACHE_BACKEND=shared) and each worker's extraction
+pool gets an even share of the CPUs. Workers are recycled after
+WORKER_MAX_REQUESTS requests (with jitter, so they do not restart together)
+or as soon as their resident memory passes WORKER_MAX_RSS_MB.
+
+Run from engine/:  python serve.py
+`python engine.py` still starts a single development process.
+"""
+import os
+import time
+import signal
+import threading
+
+PORT = int(os.environ.get("PORT", 8080))
+HOST = os.environ.get("HOST", "0.0.0.0")
+# Worker processes; `auto` = one per available CPU.
+WEB_CONCURRENCY = os.environ.get("WEB_CONCURRENCY", "auto")
+WORKER_MAX_REQUESTS = int(os.environ.get("WORKER_MAX_REQUESTS", 2000))
+WORKER_MAX_REQUESTS_JITTER = int(os.environ.get("WORKER_MAX_REQUESTS_JITTER", 200))
+WORKER_MAX_RSS_MB = int(os.environ.get("WORKER_MAX_RSS_MB", 1024))
+WORKER_RSS_CHECK_INTERVAL = float(os.environ.get("WORKER_RSS_CHECK_INTERVAL", 15))
+WORKER_TIMEOUT = int(os.environ.get("WORKER_TIMEOUT", 120))
+WORKER_GRACEFUL_TIMEOUT = int(os.environ.get("WORKER_GRACEFUL_TIMEOUT", 60))
+
+
+def available_cpus() -> int:
+    """CPUs this container may use: affinity mask, capped by a cgroup v2 CPU quota."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, int(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return max(1, cpus)
+
+
+def worker_count() -> int:
+    if WEB_CONCURRENCY.strip().lower() == "auto":
+        return available_cpus()
+    return max(1, int(WEB_CONCURRENCY))
+
+
+def resident_mb() -> float:
+    """Current resident set size of this process in MB (Linux), else 0."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+def _watch_memory(limit_mb: int, interval: float) -> None:
+    """Ask this worker to shut down gracefully once it outgrows `limit_mb`; gunicorn starts a fresh one."""
+    while True:
+        time.sleep(interval)
+        rss = resident_mb()
+        if rss > limit_mb:
+            print(f"♻️ Worker {os.getpid()} at {rss:.0f} MB (limit {limit_mb} MB), recycling")
+            os.kill(os.getpid(), signal.SIGTERM)
+            return
+
+
+def post_fork(server, worker) -> None:
+    # Connections inherited from the master must not be shared between processes.
+    from database import engine
+    engine.dispose(close=False)
+    if WORKER_MAX_RSS_MB > 0:
+        threading.Thread(
+            target=_watch_memory,
+            args=(WORKER_MAX_RSS_MB, WORKER_RSS_CHECK_INTERVAL),
+            name="rss-watchdog",
+            daemon=True
+        ).start()
+
+
+def configure_environment(workers: int) -> None:
+    """Settings that must be in place before the app is imported in the master."""
+    if workers > 1:
+        os.environ.setdefault("CACHE_BACKEND", "shared")
+        os.environ.setdefault("EXTRACTION_WORKERS", str(max(1, available_cpus() // workers)))
+
+
+def main() -> None:
+    from gunicorn.app.base import BaseApplication
+
+    workers = worker_count()
+    configure_environment(workers)
+
+    class EngineApplication(BaseApplication):
+        def load_config(self):
+            settings = {
+                "bind": f"{HOST}:{PORT}",
+                "workers": workers,
+                "worker_class": "uvicorn_worker.UvicornWorker",
+                "preload_app": True,
+                "max_requests": WORKER_MAX_REQUESTS,
+                "max_requests_jitter": WORKER_MAX_REQUESTS_JITTER,
+                "timeout": WORKER_TIMEOUT,
+                "graceful_timeout": WORKER_GRACEFUL_TIMEOUT,
+                "keepalive": 5,
+                "post_fork": post_fork,
+            }
+            for key, value in settings.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from engine import app
+            return app
+
+    print(f"Starting ResumeScore Engine on {HOST}:{PORT} with {workers} workers "
+          f"(cache backend: {os.environ.get('CACHE_BACKEND', 'memory')})")
+    EngineApplication().run()
+
+
+if __name__ == "__main__":
+    main()
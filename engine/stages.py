@@ -0,0 +1,129 @@
+import time
+import asyncio
+from typing import Optional, List, Dict, Any, Callable, Awaitable, Iterable
+
+StageFn = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class StageTimeout(Exception):
+    """A required stage did not finish within its timeout."""
+
+
+class Stage:
+    """
+    One step of a StageGraph.
+    Args:
+        name: Key the stage's result is stored under
+        run: Awaited with the results of the stages it depends on (by name)
+        after: Names of the stages that must finish first
+        timeout: Seconds the stage may run (None = no limit)
+        optional: On timeout or error, store `default` instead of failing the graph
+        default: Result used when an optional stage fails
+    """
+
+    def __init__(
+        self,
+        name: str,
+        run: StageFn,
+        after: Iterable[str] = (),
+        timeout: Optional[float] = None,
+        optional: bool = False,
+        default: Any = None
+    ):
+        self.name = name
+        self.run = run
+        self.after = tuple(after)
+        self.timeout = timeout if timeout and timeout > 0 else None
+        self.optional = optional
+        self.default = default
+
+
+class StageGraph:
+    """
+    Runs stages as soon as their dependencies finish, so independent stages
+    overlap. Each stage's start offset, duration and status are recorded in
+    `timings`. A failing required stage cancels everything still running
+    and its exception is raised from `run()`.
+    """
+
+    def __init__(self, stages: List[Stage]):
+        self.stages = {stage.name: stage for stage in stages}
+        self.order = self._toposort(stages)
+        self.timings: Dict[str, Dict[str, Any]] = {}
+        self._started = 0.0
+
+    def _toposort(self, stages: List[Stage]) -> List[Stage]:
+        ordered: List[Stage] = []
+        state: Dict[str, str] = {}
+
+        def visit(stage: Stage) -> None:
+            if state.get(stage.name) == "done":
+                return
+            if state.get(stage.name) == "visiting":
+                raise ValueError(f"Stage graph has a cycle through {stage.name!r}")
+            state[stage.name] = "visiting"
+            for dep in stage.after:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage {stage.name!r} depends on unknown stage {dep!r}")
+                visit(self.stages[dep])
+            state[stage.name] = "done"
+            ordered.append(stage)
+
+        for stage in stages:
+            visit(stage)
+        return ordered
+
+    async def _run_stage(self, stage: Stage, tasks: Dict[str, asyncio.Task]) -> Any:
+        deps = await asyncio.gather(*(tasks[dep] for dep in stage.after))
+        inputs = dict(zip(stage.after, deps))
+        started = time.perf_counter()
+        status = "ok"
+        try:
+            if stage.timeout is None:
+                return await stage.run(inputs)
+            return await asyncio.wait_for(stage.run(inputs), stage.timeout)
+        except asyncio.TimeoutError:
+            status = "timeout"
+            print(f"⏱️ Stage {stage.name} timed out after {stage.timeout:g}s")
+            if stage.optional:
+                return stage.default
+            raise StageTimeout(f"{stage.name} timed out after {stage.timeout:g}s")
+        except asyncio.CancelledError:
+            status = "cancelled"
+            raise
+        except Exception as e:
+            status = "error"
+            if stage.optional:
+                print(f"Stage {stage.name} failed: {type(e).__name__}: {e}")
+                return stage.default
+            raise
+        finally:
+            self.timings[stage.name] = {
+                "start_ms": round((started - self._started) * 1000, 1),
+                "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+                "status": status
+            }
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Run every stage.
+        Returns:
+            Stage results by name
+        """
+        self._started = time.perf_counter()
+        tasks: Dict[str, asyncio.Task] = {}
+        for stage in self.order:
+            tasks[stage.name] = asyncio.create_task(self._run_stage(stage, tasks))
+        try:
+            await asyncio.gather(*tasks.values())
+        finally:
+            pending = [task for task in tasks.values() if not task.done()]
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        return {name: task.result() for name, task in tasks.items()}
+
+    def durations(self) -> Dict[str, float]:
+        """Milliseconds spent in each stage that ran."""
+        return {name: timing["duration_ms"] for name, timing in self.timings.items()}
@@ -0,0 +1,145 @@
+import os
+import sys
+import time
+import asyncio
+import importlib
+from typing import Optional, Dict, Any, Callable, Iterable
+
+# Seconds a request waits for deferred initialization before getting a 503.
+STARTUP_WAIT_TIMEOUT = float(os.environ.get("STARTUP_WAIT_TIMEOUT", 60))
+
+# Imported in the background once the server is up (and by a preloading master
+# before it forks), so the first analysis does not pay for them.
+PREWARM_MODULES = (
+    "aiohttp",
+    "bs4",
+    "lxml.etree",
+    "numpy",
+    "tiktoken",
+    "pypdf",
+    "pdfplumber",
+    "docx",
+    "langchain_core.prompts",
+    "langchain_core.output_parsers",
+    "langchain_openai",
+    "langchain_google_genai",
+)
+
+
+def process_age() -> float:
+    """Seconds since this process was started (Linux), else since this module was imported."""
+    try:
+        with open("/proc/self/stat") as f:
+            # Field 22 (starttime, in clock ticks after boot); skip past the parenthesised command name.
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return time.perf_counter() - _IMPORTED_AT
+
+
+_IMPORTED_AT = time.perf_counter()
+_AGE_AT_IMPORT = process_age()
+
+
+def import_modules(names: Iterable[str] = PREWARM_MODULES) -> Dict[str, str]:
+    """Import `names`, skipping ones that are not installed. Blocking."""
+    outcome = {}
+    for name in names:
+        if name in sys.modules:
+            outcome[name] = "loaded"
+            continue
+        started = time.perf_counter()
+        try:
+            importlib.import_module(name)
+            outcome[name] = f"{(time.perf_counter() - started) * 1000:.0f}ms"
+        except Exception as e:
+            outcome[name] = f"unavailable ({type(e).__name__})"
+    return outcome
+
+
+class Startup:
+    """
+    Deferred initialization and the startup profile.
+
+    The lifespan only starts `initialize` as a task, so uvicorn binds the
+    port and `/health` answers while the database schema, provider clients
+    and heavy imports load in the background. Requests that need them wait
+    on `wait()` (see the `wait_for_startup` middleware).
+
+    `marks` are milliseconds since process start for the main milestones;
+    `steps` holds the duration and status of each initialization step.
+    """
+
+    def __init__(self):
+        self.marks: Dict[str, float] = {"module_import": round(_AGE_AT_IMPORT * 1000, 1)}
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self._ready: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def mark(self, name: str) -> None:
+        self.marks[name] = round(process_age() * 1000, 1)
+
+    @property
+    def ready(self) -> bool:
+        return self._ready is not None and self._ready.is_set()
+
+    def started(self, step: str) -> bool:
+        return self.steps.get(step, {}).get("status") == "ok"
+
+    async def step(self, name: str, fn: Callable, *args, blocking: bool = False) -> Any:
+        """Run one initialization step (in a thread when `blocking`) and record it. Errors are logged, not raised."""
+        started = time.perf_counter()
+        status, result = "ok", None
+        try:
+            result = await asyncio.to_thread(fn, *args) if blocking else await fn(*args)
+        except Exception as e:
+            status = f"error: {e}"
+            print(f"❌ Startup step {name} failed: {e}")
+        self.steps[name] = {"duration_ms": round((time.perf_counter() - started) * 1000, 1), "status": status}
+        return result
+
+    def start(self, initialize: Callable[[], Any], prewarm: Optional[Callable[[], Any]] = None) -> None:
+        """
+        Schedule `initialize` (a coroutine function) and mark the app ready
+        when it returns, then run `prewarm`, which requests do not wait for.
+        """
+        self._ready = asyncio.Event()
+        self.mark("lifespan")
+
+        async def run() -> None:
+            try:
+                await initialize()
+            finally:
+                self.mark("ready")
+                self._ready.set()
+            steps = ", ".join(f"{name} {step['duration_ms']:.0f}ms" for name, step in self.steps.items())
+            print(f"🚀 Ready {self.marks['ready']:.0f}ms after process start ({steps})")
+            if prewarm is not None:
+                await prewarm()
+                self.mark("prewarmed")
+
+        self._task = asyncio.create_task(run())
+
+    async def wait(self, timeout: float = STARTUP_WAIT_TIMEOUT) -> bool:
+        """True once initialization has finished; False if it takes longer than `timeout`."""
+        if self._ready is None:
+            return True
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def profile(self) -> Dict[str, Any]:
+        return {"ready": self.ready, "marks_ms": self.marks, "steps": self.steps}
+
+
+startup = Startup()
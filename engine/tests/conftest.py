@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import the engine modules the way engine.py does (run from engine/).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,45 @@
+import asyncio
+
+import batch
+from batch import BatchRun
+from utils.uploads import StoredUpload
+
+
+def test_cancelled_item_fails_alone_and_batch_finishes(monkeypatch):
+    async def fake_run_analysis(upload, job_description, jd_hash=None, llm_slots=None):
+        if upload.filename == "cancelled.pdf":
+            raise asyncio.CancelledError()
+        return {"score": 70}
+
+    monkeypatch.setattr(batch, "run_analysis", fake_run_analysis)
+    monkeypatch.setattr(batch, "validate_upload", lambda upload: None)
+
+    files = [StoredUpload.from_bytes(name, b"%PDF-1.4") for name in ("a.pdf", "cancelled.pdf", "b.pdf")]
+    run = BatchRun("Python engineer", files)
+    asyncio.run(asyncio.wait_for(run.run(asyncio.Semaphore(2)), 5))
+
+    statuses = {item["filename"]: item["status"] for item in run.items}
+    assert statuses == {"a.pdf": "done", "cancelled.pdf": "failed", "b.pdf": "done"}
+    assert run.finished_at is not None
+    assert run.summary()["status"] == "completed"
+
+
+def test_cancelled_batch_still_records_a_terminal_state(monkeypatch):
+    async def slow_run_analysis(upload, job_description, jd_hash=None, llm_slots=None):
+        await asyncio.sleep(30)
+
+    monkeypatch.setattr(batch, "run_analysis", slow_run_analysis)
+    monkeypatch.setattr(batch, "validate_upload", lambda upload: None)
+
+    async def scenario():
+        run = BatchRun("Python engineer", [StoredUpload.from_bytes("a.pdf", b"%PDF-1.4")])
+        task = asyncio.create_task(run.run(asyncio.Semaphore(1)))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        assert task.cancelled()
+        return run
+
+    run = asyncio.run(scenario())
+    assert run.finished_at is not None
+    assert run.items[0]["status"] == "failed"
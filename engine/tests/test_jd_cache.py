@@ -0,0 +1,33 @@
+import time
+import asyncio
+
+from utils import jd_cache as jd_cache_module
+from utils.jd_cache import ParsedJDCache
+
+JOB_DESCRIPTION = "Senior Python engineer.\n- 5+ years of Python\n- Experience with PostgreSQL and Docker"
+
+
+def test_cancelled_first_caller_does_not_cancel_waiting_callers(monkeypatch):
+    def slow_lookup(jd_hash):
+        time.sleep(0.1)
+        return None
+
+    monkeypatch.setattr(jd_cache_module, "_load_from_db", slow_lookup)
+    monkeypatch.setattr(jd_cache_module, "_save_to_db", lambda jd_hash, parsed: None)
+
+    async def scenario():
+        cache = ParsedJDCache()
+        first = asyncio.create_task(cache.get(JOB_DESCRIPTION))
+        await asyncio.sleep(0.01)
+        second = asyncio.create_task(cache.get(JOB_DESCRIPTION))
+        await asyncio.sleep(0.01)
+
+        first.cancel()
+        parsed = await asyncio.wait_for(second, 5)
+
+        assert first.cancelled()
+        assert parsed["skills"]
+        assert cache.parses == 1 and cache.coalesced == 1
+        assert await cache.get(JOB_DESCRIPTION) is parsed
+
+    asyncio.run(scenario())
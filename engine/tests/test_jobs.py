@@ -0,0 +1,66 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import jobs
+from database import Base
+from jobs import JobQueue
+from models import AnalysisJob
+
+
+def _use_temp_db(monkeypatch, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine, tables=[AnalysisJob.__table__])
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr(jobs, "SessionLocal", session)
+    return session
+
+
+def test_concurrent_submits_never_exceed_max_depth(monkeypatch, tmp_path):
+    session = _use_temp_db(monkeypatch, tmp_path)
+    queue = JobQueue(workers=0, max_depth=5)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        accepted = list(pool.map(
+            lambda i: queue._insert(f"job{i}", "resume.pdf", b"%PDF-1.4", "Python engineer"), range(20)
+        ))
+
+    db = session()
+    try:
+        assert db.query(AnalysisJob).count() == 5
+    finally:
+        db.close()
+    assert accepted.count(True) == 5
+
+
+def test_worker_survives_a_failed_status_update(monkeypatch, tmp_path):
+    _use_temp_db(monkeypatch, tmp_path)
+    queue = JobQueue(workers=1, max_depth=5)
+    finished = []
+
+    async def fake_run_analysis(upload, job_description):
+        return {"score": 70}
+
+    def flaky_finish(job_id, status, result, error):
+        finished.append(job_id)
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(jobs, "run_analysis", fake_run_analysis)
+    monkeypatch.setattr(queue, "_finish", flaky_finish)
+
+    async def scenario():
+        queue.start()
+        await queue.submit("a.pdf", b"%PDF-1.4", "Python engineer")
+        await queue.submit("b.pdf", b"%PDF-1.4", "Python engineer")
+        for _ in range(100):
+            if len(finished) == 2:
+                break
+            await asyncio.sleep(0.02)
+        alive = not queue._tasks[0].done()
+        await queue.stop()
+        return alive
+
+    assert asyncio.run(asyncio.wait_for(scenario(), 5))
+    assert len(finished) == 2
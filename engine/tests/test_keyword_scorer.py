@@ -0,0 +1,20 @@
+from utils.keyword_scorer import score_keywords
+
+JOB_DESCRIPTION = """Python engineer
+Strong python programming skills required.
+Python programming in production services.
+Experience with Kubernetes and Java.
+"""
+
+RESUME = """Jane Doe
+Backend developer working on JavaScript services and Go tooling.
+"""
+
+
+def test_missing_keywords_collapse_words_of_longer_terms():
+    missing = score_keywords(RESUME, JOB_DESCRIPTION)["missing_keywords"]
+
+    assert "python programming" in missing
+    assert "python" not in missing
+    assert "programming" not in missing
+    assert "java" in missing
@@ -0,0 +1,24 @@
+import asyncio
+
+from chains.limiter import AdaptiveLimiter
+
+
+def test_burst_of_rate_limits_halves_the_limit_once():
+    async def scenario():
+        limiter = AdaptiveLimiter(initial=8, min_limit=1)
+        for _ in range(4):
+            await limiter.acquire()
+        await asyncio.sleep(0.01)
+        for _ in range(4):
+            await limiter.release(0.01, "rate_limited")
+        after_burst = limiter.limit
+
+        # A call started after the decrease saw the lower limit and may halve it again.
+        await limiter.acquire()
+        await asyncio.sleep(0.01)
+        await limiter.release(0.005, "rate_limited")
+        return after_burst, limiter.limit
+
+    after_burst, after_next = asyncio.run(scenario())
+    assert after_burst == 4
+    assert after_next == 2
@@ -0,0 +1,114 @@
+import asyncio
+
+import pipeline
+from utils.jd_cache import parse_job_description
+from utils.uploads import StoredUpload
+
+
+class NoCache:
+    def get(self, key):
+        return None
+
+    def load(self, key):
+        return None, ""
+
+    def record_miss(self):
+        pass
+
+
+def _stub_pipeline(monkeypatch):
+    """Everything around the providers: no cache, fixed text, one link with content."""
+    async def fake_fetch(urls):
+        await asyncio.sleep(0.05)
+        return "--- Content from https://github.com/jane ---\nrepos"
+
+    async def fake_extract(upload):
+        return "Jane Doe, Python engineer. https://github.com/jane " * 3
+
+    async def fake_jd(job_description, jd_hash):
+        return parse_job_description(job_description)
+
+    async def no_cache_put(key, payload):
+        pass
+
+    monkeypatch.setattr(pipeline, "SPECULATIVE_ANALYSIS", True)
+    monkeypatch.setattr(pipeline, "analysis_cache", NoCache())
+    monkeypatch.setattr(pipeline, "_cache_put", no_cache_put)
+    monkeypatch.setattr(pipeline, "_extract", fake_extract)
+    monkeypatch.setattr(pipeline.jd_cache, "get", fake_jd)
+    monkeypatch.setattr(pipeline, "_job_profile", lambda parsed_jd: {})
+    monkeypatch.setattr(pipeline, "score_keywords", lambda *args: {"skills_match": 50, "missing_keywords": []})
+    monkeypatch.setattr(pipeline, "find_divergent", lambda *args: [])
+    monkeypatch.setattr(pipeline, "fetch_external_content", fake_fetch)
+    monkeypatch.setattr(pipeline, "get_active_providers", lambda: ["TEST/model"])
+    monkeypatch.setattr(pipeline.analysis_writer, "enqueue", lambda record: None)
+
+
+def test_external_content_cancels_speculative_run(monkeypatch):
+    events = []
+
+    async def fake_analyze_resume(resume_text, job_description, external_content, on_provider_result, parsed_jd, policy):
+        if not external_content:
+            events.append("speculative started")
+            try:
+                await asyncio.sleep(30)
+            except asyncio.CancelledError:
+                events.append("speculative cancelled")
+                raise
+        events.append("refined started")
+        return {"score": 80, "breakdown": None, "providers": ["TEST/model"], "llm_count": 1}
+
+    _stub_pipeline(monkeypatch)
+    monkeypatch.setattr(pipeline, "analyze_resume", fake_analyze_resume)
+
+    upload = StoredUpload.from_bytes("resume.pdf", b"%PDF-1.4 resume")
+    result = asyncio.run(asyncio.wait_for(pipeline.run_analysis(upload, "Python engineer"), 5))
+
+    assert result["score"] == 80
+    assert events.index("speculative cancelled") < events.index("refined started")
+
+
+ANALYSIS = {
+    "score": 80,
+    "breakdown": {"skills": 80, "experience": 80, "projects": 80, "quality": 80, "education": 80, "external": 80},
+    "strengths": ["Python", "APIs"],
+    "weaknesses": ["Go", "Kubernetes"],
+    "suggested_keywords": ["python", "fastapi", "postgres", "docker", "aws"],
+    "highlight_pairs": [],
+}
+
+
+class FakeProvider:
+    """Stands in for a LangChain chain: slow without external content, quick with it."""
+
+    def __init__(self, events):
+        self.events = events
+
+    async def ainvoke(self, inputs):
+        if not inputs["external_section"]:
+            self.events.append("speculative call started")
+            try:
+                await asyncio.sleep(30)
+            except asyncio.CancelledError:
+                self.events.append("speculative call cancelled")
+                raise
+        self.events.append("refined call started")
+        return dict(ANALYSIS)
+
+
+def test_refined_run_cancels_speculative_provider_calls(monkeypatch):
+    from chains import resume_chain
+
+    events = []
+    chains = [("TEST/provider-a", FakeProvider(events)), ("TEST/provider-b", FakeProvider(events))]
+    _stub_pipeline(monkeypatch)
+    monkeypatch.setattr(resume_chain.provider_registry, "get_chains", lambda: chains)
+
+    upload = StoredUpload.from_bytes("resume.pdf", b"%PDF-1.4 resume")
+    result = asyncio.run(asyncio.wait_for(pipeline.run_analysis(upload, "Python engineer"), 5))
+
+    assert result["score"] == 80
+    assert events.count("speculative call started") == 2
+    assert events.count("speculative call cancelled") == 2
+    first_refined = events.index("refined call started")
+    assert all(event == "refined call started" for event in events[first_refined:])
@@ -0,0 +1,67 @@
+import time
+import asyncio
+
+from chains.limiter import provider_guards
+from chains.resume_chain import run_single_llm
+
+
+class NeverCalledChain:
+    async def ainvoke(self, inputs):
+        raise AssertionError("the chain must not run while the limiter is full")
+
+
+def test_cancel_while_queued_frees_half_open_probe():
+    async def scenario():
+        limiter, breaker = provider_guards.get("TEST/queued-probe")
+        breaker.state = "open"
+        breaker.opened_at = time.monotonic() - breaker.cooldown - 1
+        limiter.limit = 1
+        limiter.in_flight = 1  # every slot taken, so the probe waits in acquire()
+
+        task = asyncio.create_task(run_single_llm(NeverCalledChain(), {}, "TEST/queued-probe"))
+        await asyncio.sleep(0.01)
+        assert breaker.state == "half_open"
+        assert limiter.waiting == 1
+
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+        assert limiter.waiting == 0
+        assert breaker.allow(), "a cancelled probe must not keep the breaker closed to new probes"
+
+    asyncio.run(scenario())
+
+
+class SlowChain:
+    def __init__(self, events):
+        self.events = events
+
+    async def ainvoke(self, inputs):
+        self.events["started"] += 1
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            self.events["cancelled"] += 1
+            raise
+        self.events["done"] += 1
+
+
+def test_cancelling_analyze_resume_cancels_provider_calls(monkeypatch):
+    from chains import resume_chain
+
+    events = {"started": 0, "done": 0, "cancelled": 0}
+    chains = [("TEST/slow-a", SlowChain(events)), ("TEST/slow-b", SlowChain(events))]
+    monkeypatch.setattr(resume_chain.provider_registry, "get_chains", lambda: chains)
+
+    async def scenario():
+        task = asyncio.create_task(resume_chain.analyze_resume("Python engineer resume", "Python engineer"))
+        for _ in range(100):
+            if events["started"] == 2:
+                break
+            await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        # Checked before asyncio.run tears the loop down and cancels leftovers itself.
+        assert events == {"started": 2, "done": 0, "cancelled": 2}
+
+    asyncio.run(scenario())
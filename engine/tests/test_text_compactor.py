@@ -0,0 +1,49 @@
+from utils.text_compactor import normalize_text
+
+MULTI_ROLE_RESUME = """Jane Doe
+jane@example.com
+
+EXPERIENCE
+
+Senior Engineer, Acme
+Jan 2021 – Present
+Led the payments platform rewrite.
+
+Engineer, Globex
+Jan 2019 – Mar 2021
+Built the ingestion pipeline.
+
+Junior Engineer, Initech
+2017 – 2019
+Maintained internal tools.
+
+EDUCATION
+
+BSc Computer Science
+2020
+
+Page 2 of 3
+"""
+
+
+def test_date_ranges_on_every_role_are_kept():
+    normalized = normalize_text(MULTI_ROLE_RESUME)
+
+    assert "Jan 2021 – Present" in normalized
+    assert "Jan 2019 – Mar 2021" in normalized
+    assert "2017 – 2019" in normalized
+
+
+def test_bare_year_is_not_a_page_number():
+    normalized = normalize_text(MULTI_ROLE_RESUME)
+
+    assert "\n2020" in normalized
+    assert "Page 2 of 3" not in normalized
+
+
+def test_running_header_with_page_reference_is_dropped_after_first_page():
+    pages = [f"Jane Doe - Resume - Page {page} of 3\nRole {page}\n2019 – 2021\nDetails {page}" for page in (1, 2, 3)]
+    normalized = normalize_text("\n\n".join(pages))
+
+    assert normalized.count("Jane Doe - Resume") == 1
+    assert normalized.count("2019 – 2021") == 3
@@ -0,0 +1,232 @@
+import os
+import re
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional, List, Dict, Any, Tuple
+
+from utils.serialization import loads
+from utils.shared_store import SharedStore, shared_store
+
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.environ.get("ANALYSIS_CACHE_MAX_ENTRIES", 512))
+ANALYSIS_CACHE_TTL = int(os.environ.get("ANALYSIS_CACHE_TTL", 3600))
+ANALYSIS_CACHE_DB_TTL = int(os.environ.get("ANALYSIS_CACHE_DB_TTL", 7 * 24 * 3600))
+
+
+def normalize_job_description(job_description: str) -> str:
+    """
+    Normalize a job description so cosmetic edits map to the same key.
+    Collapses all whitespace runs and ignores case.
+    """
+    return re.sub(r"\s+", " ", job_description or "").strip().lower()
+
+
+def hash_job_description(job_description: str) -> str:
+    """SHA-256 of the normalized job description."""
+    return hashlib.sha256(normalize_job_description(job_description).encode("utf-8")).hexdigest()
+
+
+def make_cache_key(resume_hash: str, jd_hash: str, providers: List[str]) -> str:
+    """
+    Build the content-addressed key for an analysis.
+    Args:
+        resume_hash: SHA-256 of the uploaded resume bytes
+        jd_hash: SHA-256 of the normalized job description
+        providers: Active LLM providers (order does not matter)
+    Returns:
+        Hex digest identifying the analysis
+    """
+    raw = "|".join([resume_hash, jd_hash, ",".join(sorted(providers))])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class AnalysisPayload(dict):
+    """
+    Response payload that also carries `body`, its AnalysisResponse JSON
+    without `timings`. Cached results keep the body so hits are not
+    validated and encoded again; callers that want a dict can ignore it.
+    """
+    __slots__ = ("body",)
+
+    def __init__(self, data: Dict[str, Any], body: Optional[bytes] = None):
+        super().__init__(data)
+        self.body = body
+
+
+class AnalysisCache:
+    """
+    LRU cache with per-entry TTL for analysis responses.
+
+    Entries live in process memory, or with a shared store (CACHE_BACKEND=shared)
+    in the SQLite file every worker process reads, as their encoded body.
+    The `analysis_results` table acts as the durable last tier (see
+    `load_from_db`); this class only tracks its hit counter.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = ANALYSIS_CACHE_MAX_ENTRIES,
+        ttl: int = ANALYSIS_CACHE_TTL,
+        shared: Optional[SharedStore] = shared_store
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.shared = shared
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.shared_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[AnalysisPayload]:
+        """Return the response cached in memory for `key` or None. Refreshes LRU order."""
+        if self.shared is not None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            self.memory_hits += 1
+            return value
+
+    def load(self, key: str) -> Tuple[Optional[Dict[str, Any]], str]:
+        """
+        Look `key` up in the shared store, then the database. Blocking.
+        Returns:
+            (payload or None, "shared" or "database")
+        """
+        if self.shared is not None:
+            body = self.shared.get("analysis", key)
+            if body is not None:
+                with self._lock:
+                    self.shared_hits += 1
+                return AnalysisPayload(loads(body), body), "shared"
+        payload = load_from_db(key)
+        if payload is not None:
+            self.record_db_hit()
+        return payload, "database"
+
+    def put(self, key: str, value: AnalysisPayload) -> None:
+        """
+        Insert or refresh an entry, evicting the least recently used ones.
+        Blocking with a shared store.
+        """
+        if self.max_entries <= 0:
+            return
+        if self.shared is not None:
+            # Only validated bodies are shared; other workers rebuild the payload from them.
+            if value.body is not None:
+                self.shared.put("analysis", key, value.body, self.ttl)
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def record_db_hit(self) -> None:
+        with self._lock:
+            self.db_hits += 1
+
+    def record_miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        if self.shared is not None:
+            self.shared.clear("analysis")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and the active eviction policy. Blocking with a shared store."""
+        with self._lock:
+            hits = self.memory_hits + self.shared_hits + self.db_hits
+            lookups = hits + self.misses
+            stats = {
+                "memory_hits": self.memory_hits,
+                "shared_hits": self.shared_hits,
+                "db_hits": self.db_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "size": len(self._entries),
+                "policy": {
+                    "memory": "shared" if self.shared is not None else "lru+ttl",
+                    "max_entries": self.max_entries,
+                    "ttl_seconds": self.ttl,
+                    "db_ttl_seconds": ANALYSIS_CACHE_DB_TTL,
+                },
+            }
+        if self.shared is not None:
+            stats["shared"] = self.shared.stats("analysis")
+        return stats
+
+
+def load_from_db(cache_key: str) -> Optional[Dict[str, Any]]:
+    """
+    Look up the most recent stored analysis for `cache_key`.
+    Blocking; call it through `asyncio.to_thread` from request handlers.
+    Rows older than ANALYSIS_CACHE_DB_TTL are ignored.
+    Returns:
+        Response payload dict or None
+    """
+    from database import SessionLocal
+    from models import AnalysisResult
+
+    db = SessionLocal()
+    try:
+        row = (
+            db.query(AnalysisResult)
+            .filter(AnalysisResult.cache_key == cache_key)
+            .order_by(AnalysisResult.id.desc())
+            .first()
+        )
+        if row is None or row.score is None:
+            return None
+
+        if row.created_at is not None:
+            created_at = row.created_at
+            if created_at.tzinfo is None:
+                created_at = created_at.replace(tzinfo=timezone.utc)
+            age = (datetime.now(timezone.utc) - created_at).total_seconds()
+            if age > ANALYSIS_CACHE_DB_TTL:
+                return None
+
+        return result_to_payload(row)
+    finally:
+        db.close()
+
+
+def result_to_payload(row) -> Dict[str, Any]:
+    """Rebuild an /analyze response payload from an AnalysisResult row."""
+    return {
+        "success": True,
+        "score": row.score,
+        "breakdown": row.breakdown,
+        "strengths": row.strengths or [],
+        "weaknesses": row.weaknesses or [],
+        "suggested_keywords": row.suggested_keywords or [],
+        "highlight_pairs": row.highlight_pairs or [],
+        "external_links": row.external_links or [],
+        "llm_count": row.llm_count,
+        "individual_scores": row.individual_scores,
+        "providers": row.providers or [],
+        "extracted_text": row.extracted_preview,
+    }
+
+
+analysis_cache = AnalysisCache()
@@ -0,0 +1,167 @@
+import os
+import asyncio
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Dict, Any, Callable
+
+EXTRACTION_WORKERS = int(os.environ.get("EXTRACTION_WORKERS", os.cpu_count() or 2))
+EXTRACTION_TIMEOUT = float(os.environ.get("EXTRACTION_TIMEOUT", 30))
+EXTRACTION_MAX_JOBS_PER_WORKER = int(os.environ.get("EXTRACTION_MAX_JOBS_PER_WORKER", 50))
+
+
+class ExtractionTimeout(Exception):
+    """Raised when a document takes longer than the per-job timeout to parse."""
+
+
+class ExtractionExecutor:
+    """
+    Process pool for CPU-bound document parsing.
+
+    Keeps the event loop free while pypdf/pdfplumber/python-docx run. The pool
+    is retired and replaced once it has served `max_jobs_per_worker` jobs per
+    worker, which caps memory growth from leaky parsers (the stdlib
+    `max_tasks_per_child` can deadlock on Python 3.11). A job that exceeds its
+    timeout gets the whole pool killed and replaced, since a running
+    process-pool job cannot be cancelled on its own.
+
+    Submissions are gated by a semaphore so the timeout measures parse time
+    rather than time spent queued behind other documents.
+
+    With `max_workers=0` jobs run in the default thread pool instead (no kill
+    path), which is handy for environments that cannot spawn processes.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = EXTRACTION_WORKERS,
+        timeout: float = EXTRACTION_TIMEOUT,
+        max_jobs_per_worker: int = EXTRACTION_MAX_JOBS_PER_WORKER
+    ):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._generation = 0
+        self._pool_jobs = 0
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.pool_restarts = 0
+        self.pool_recycles = 0
+        self.in_flight = 0
+
+    def _get_pool(self) -> tuple:
+        retired = None
+        with self._lock:
+            recycle_after = self.max_workers * self.max_jobs_per_worker
+            if self._pool is not None and recycle_after and self._pool_jobs >= recycle_after:
+                retired = self._pool
+                self._pool = None
+                self.pool_recycles += 1
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+                self._generation += 1
+                self._pool_jobs = 0
+            self._pool_jobs += 1
+            pool, generation = self._pool, self._generation
+        if retired is not None:
+            # Lets in-flight jobs finish, then the old workers exit.
+            retired.shutdown(wait=False)
+        return pool, generation
+
+    def _discard_pool(self, generation: int, kill: bool = False) -> None:
+        """Drop the pool of `generation` (if still current), optionally killing its workers."""
+        with self._lock:
+            if self._pool is None or generation != self._generation:
+                return
+            pool = self._pool
+            self._pool = None
+            self.pool_restarts += 1
+        if kill:
+            for process in list((pool._processes or {}).values()):
+                try:
+                    process.kill()
+                except Exception:
+                    pass
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, fn: Callable, *args, timeout: Optional[float] = None) -> Any:
+        """
+        Run `fn(*args)` in a worker process and await the result.
+        Args:
+            fn: Picklable module-level function
+            timeout: Seconds before the job is killed (defaults to the executor timeout)
+        Returns:
+            Whatever `fn` returns
+        Raises:
+            ExtractionTimeout: The job exceeded its timeout and was killed
+        """
+        timeout = self.timeout if timeout is None else timeout
+        if self.max_workers > 0 and self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+        self.in_flight += 1
+        try:
+            if self.max_workers <= 0:
+                result = await asyncio.wait_for(asyncio.to_thread(fn, *args), timeout)
+            else:
+                async with self._slots:
+                    result = await self._run_in_pool(fn, args, timeout, retry=True)
+            self.completed += 1
+            return result
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise ExtractionTimeout(f"Extraction exceeded {timeout:.0f}s and was terminated")
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+    async def _run_in_pool(self, fn: Callable, args: tuple, timeout: float, retry: bool) -> Any:
+        pool, generation = self._get_pool()
+        try:
+            future = pool.submit(fn, *args)
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            print(f"⏱️ Extraction job timed out after {timeout:.0f}s, killing worker pool")
+            self._discard_pool(generation, kill=True)
+            raise
+        except BrokenProcessPool:
+            # Another job's timeout killed the pool under us (or a worker crashed):
+            # retry once on a fresh pool.
+            self._discard_pool(generation)
+            if not retry:
+                raise
+            return await self._run_in_pool(fn, args, timeout, retry=False)
+
+    def shutdown(self) -> None:
+        """Stop all workers. Safe to call more than once."""
+        with self._lock:
+            pool = self._pool
+            self._pool = None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": "process" if self.max_workers > 0 else "thread",
+            "max_workers": self.max_workers,
+            "timeout_seconds": self.timeout,
+            "max_jobs_per_worker": self.max_jobs_per_worker,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "pool_restarts": self.pool_restarts,
+            "pool_recycles": self.pool_recycles,
+        }
+
+
+extraction_executor = ExtractionExecutor()
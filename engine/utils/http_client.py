@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import os
+import asyncio
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import aiohttp
+
+HTTP_POOL_LIMIT = int(os.environ.get("HTTP_POOL_LIMIT", 100))
+HTTP_POOL_LIMIT_PER_HOST = int(os.environ.get("HTTP_POOL_LIMIT_PER_HOST", 8))
+HTTP_DNS_CACHE_TTL = int(os.environ.get("HTTP_DNS_CACHE_TTL", 300))
+HTTP_KEEPALIVE_TIMEOUT = float(os.environ.get("HTTP_KEEPALIVE_TIMEOUT", 30))
+HTTP_DEFAULT_TIMEOUT = float(os.environ.get("HTTP_DEFAULT_TIMEOUT", 10))
+
+
+class HttpClient:
+    """
+    One aiohttp session for all outbound fetches, opened and closed by the
+    FastAPI lifespan. The pooled connector keeps connections alive and
+    caches DNS answers, so repeat fetches skip DNS, TCP and TLS setup.
+    Callers pass their own `aiohttp.ClientTimeout` per request.
+    """
+
+    def __init__(self):
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _open(self) -> aiohttp.ClientSession:
+        import aiohttp
+
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_POOL_LIMIT,
+            limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+            ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+            use_dns_cache=True,
+            keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+            enable_cleanup_closed=True
+        )
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=HTTP_DEFAULT_TIMEOUT)
+        )
+
+    async def start(self) -> None:
+        if self._session is None or self._session.closed:
+            self._session = self._open()
+
+    async def session(self) -> aiohttp.ClientSession:
+        """The shared session; opened on first use when running outside the app lifespan."""
+        if self._session is None or self._session.closed:
+            if self._lock is None:
+                self._lock = asyncio.Lock()
+            async with self._lock:
+                if self._session is None or self._session.closed:
+                    self._session = self._open()
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+http_client = HttpClient()
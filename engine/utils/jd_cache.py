@@ -0,0 +1,229 @@
+import os
+import re
+import asyncio
+import threading
+from collections import Counter, OrderedDict
+from typing import Optional, List, Dict, Any
+
+from utils.analysis_cache import hash_job_description
+from utils.keyword_scorer import split_segments
+from utils.text_compactor import normalize_text, count_tokens
+
+JD_CACHE_MAX_ENTRIES = int(os.environ.get("JD_CACHE_MAX_ENTRIES", 256))
+
+# Bump when the parsed shape changes so stored rows are re-parsed.
+JD_PARSER_VERSION = "1"
+
+MAX_REQUIREMENTS = 30
+MAX_SKILLS = 40
+
+_BULLET_RE = re.compile(r"^\s*([-*•●▪◦·]|\d+[.)])\s+")
+_REQUIREMENT_RE = re.compile(
+    r"\b(required|requirements?|must|should have|experience (with|in)|proficien\w*|knowledge of|"
+    r"familiar\w* with|degree|years?|expertise|hands-on|strong)\b",
+    re.I
+)
+_YEARS_RE = re.compile(r"(\d{1,2})\s*\+?\s*(?:-\s*\d{1,2}\s*)?(?:years?|yrs)", re.I)
+SENIORITY_LEVELS = [
+    ("intern", r"\b(intern|internship|trainee)\b"),
+    ("junior", r"\b(junior|jr\.?|entry[- ]level|graduate|associate)\b"),
+    ("mid", r"\b(mid[- ]level|intermediate)\b"),
+    ("senior", r"\b(senior|sr\.?)\b"),
+    ("lead", r"\b(lead|staff|principal|architect)\b"),
+    ("manager", r"\b(manager|head of|director|vp)\b"),
+]
+
+
+def _requirements(text: str) -> List[str]:
+    """Bullet lines and requirement-like sentences, in JD order."""
+    requirements = []
+    seen = set()
+    for line in text.split("\n"):
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if _BULLET_RE.match(stripped):
+            candidates = [_BULLET_RE.sub("", stripped)]
+        else:
+            candidates = [s for s in re.split(r"(?<=[.!?])\s+", stripped) if _REQUIREMENT_RE.search(s)]
+        for candidate in candidates:
+            candidate = candidate.strip()[:200]
+            if len(candidate) >= 8 and candidate.lower() not in seen:
+                seen.add(candidate.lower())
+                requirements.append(candidate)
+            if len(requirements) >= MAX_REQUIREMENTS:
+                return requirements
+    return requirements
+
+
+def _skills(segments: List[tuple]) -> List[str]:
+    """JD terms ranked by how many segments mention them; bigrams must recur."""
+    counts = Counter()
+    first_seen = {}
+    for position, (_, terms) in enumerate(segments):
+        for term in set(terms):
+            counts[term] += 1
+            first_seen.setdefault(term, position)
+    ranked = sorted(
+        (term for term, count in counts.items() if " " not in term or count > 1),
+        key=lambda term: (-counts[term], first_seen[term])
+    )
+    return ranked[:MAX_SKILLS]
+
+
+def _seniority(text: str) -> Dict[str, Any]:
+    lowered = text.lower()
+    signals = [level for level, pattern in SENIORITY_LEVELS if re.search(pattern, lowered)]
+    years = [int(match) for match in _YEARS_RE.findall(text)]
+    return {
+        "level": signals[-1] if signals else None,
+        "signals": signals,
+        "min_years": max(years) if years else None,
+    }
+
+
+def parse_job_description(job_description: str) -> Dict[str, Any]:
+    """
+    Preprocess a job description once for every resume scored against it.
+    Returns:
+        JSON-serializable dict with `requirements`, `skills`, `seniority`,
+        `compacted_text` (normalized prompt text), token counts and the
+        keyword scorer's `segments`
+    """
+    compacted_text = normalize_text(job_description)
+    segments = split_segments(compacted_text)
+    return {
+        "version": JD_PARSER_VERSION,
+        "requirements": _requirements(compacted_text),
+        "skills": _skills(segments),
+        "seniority": _seniority(compacted_text),
+        "compacted_text": compacted_text,
+        "original_tokens": count_tokens(job_description),
+        "tokens": count_tokens(compacted_text),
+        "segments": [[text, terms] for text, terms in segments],
+    }
+
+
+def _load_from_db(jd_hash: str) -> Optional[Dict[str, Any]]:
+    from database import SessionLocal
+    from models import ParsedJobDescription
+
+    db = SessionLocal()
+    try:
+        row = db.get(ParsedJobDescription, jd_hash)
+        if row is None or row.parser_version != JD_PARSER_VERSION:
+            return None
+        return row.parsed
+    finally:
+        db.close()
+
+
+def _save_to_db(jd_hash: str, parsed: Dict[str, Any]) -> None:
+    from database import SessionLocal
+    from models import ParsedJobDescription
+
+    db = SessionLocal()
+    try:
+        db.merge(ParsedJobDescription(jd_hash=jd_hash, parser_version=JD_PARSER_VERSION, parsed=parsed))
+        db.commit()
+    finally:
+        db.close()
+
+
+class ParsedJDCache:
+    """
+    Parsed job descriptions keyed by normalized-JD hash.
+    Memory LRU first, then the `parsed_job_descriptions` table; concurrent
+    requests for the same new JD (e.g. a batch) share a single parse, which
+    keeps running if the caller that started it is cancelled.
+    """
+
+    def __init__(self, max_entries: int = JD_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pending: Dict[str, asyncio.Future] = {}
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.parses = 0
+        self.coalesced = 0
+
+    def _get_memory(self, jd_hash: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            parsed = self._entries.get(jd_hash)
+            if parsed is not None:
+                self._entries.move_to_end(jd_hash)
+                self.memory_hits += 1
+            return parsed
+
+    def _put_memory(self, jd_hash: str, parsed: Dict[str, Any]) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[jd_hash] = parsed
+            self._entries.move_to_end(jd_hash)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def get(self, job_description: str, jd_hash: Optional[str] = None) -> Dict[str, Any]:
+        """Parsed form of `job_description`, parsing and storing it on first use."""
+        jd_hash = jd_hash or hash_job_description(job_description)
+        parsed = self._get_memory(jd_hash)
+        if parsed is not None:
+            return parsed
+
+        pending = self._pending.get(jd_hash)
+        if pending is not None:
+            self.coalesced += 1
+        else:
+            # The parse runs in its own task, so a caller cancelled mid-parse
+            # (e.g. one batch item) does not cancel it for the others waiting.
+            pending = asyncio.create_task(self._load_or_parse(job_description, jd_hash))
+            self._pending[jd_hash] = pending
+            pending.add_done_callback(lambda task: self._finish_parse(jd_hash, task))
+        return await asyncio.shield(pending)
+
+    def _finish_parse(self, jd_hash: str, task: asyncio.Task) -> None:
+        if self._pending.get(jd_hash) is task:
+            del self._pending[jd_hash]
+        if task.cancelled():
+            return
+        if task.exception() is None:
+            self._put_memory(jd_hash, task.result())
+
+    async def _load_or_parse(self, job_description: str, jd_hash: str) -> Dict[str, Any]:
+        try:
+            parsed = await asyncio.to_thread(_load_from_db, jd_hash)
+        except Exception as e:
+            print(f"❌ Parsed JD lookup error: {e}")
+            parsed = None
+        if parsed is not None:
+            self.db_hits += 1
+            return parsed
+
+        parsed = await asyncio.to_thread(parse_job_description, job_description)
+        self.parses += 1
+        print(f"🧩 Parsed JD {jd_hash[:12]}: {len(parsed['requirements'])} requirements, {len(parsed['skills'])} skills")
+        try:
+            await asyncio.to_thread(_save_to_db, jd_hash, parsed)
+        except Exception as e:
+            print(f"❌ Could not store parsed JD: {e}")
+        return parsed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.memory_hits + self.db_hits + self.coalesced + self.parses
+            hits = self.memory_hits + self.db_hits + self.coalesced
+            return {
+                "memory_hits": self.memory_hits,
+                "db_hits": self.db_hits,
+                "coalesced": self.coalesced,
+                "parses": self.parses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "parser_version": JD_PARSER_VERSION,
+            }
+
+
+jd_cache = ParsedJDCache()
@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import os
+import re
+import time
+from typing import Optional, List, Dict, Any, Tuple, TYPE_CHECKING
+
+# numpy is imported by the functions that use it, so importing the scorer is free at startup.
+if TYPE_CHECKING:
+    import numpy as np
+
+KEYWORD_TOP_TERMS = int(os.environ.get("KEYWORD_TOP_TERMS", 40))
+KEYWORD_DIVERGENCE_THRESHOLD = int(os.environ.get("KEYWORD_DIVERGENCE_THRESHOLD", 40))
+
+MAX_SEGMENTS = 600
+MIN_PAIR_SIMILARITY = 0.25
+
+# Keeps tech tokens such as c++, c#, node.js and ci/cd intact.
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#./-]*[a-z0-9+#]|[a-z]")
+_SEGMENT_RE = re.compile(r"[\n•●▪◦·;|]+|(?<=[.!?])\s+")
+
+STOPWORDS = frozenset("""
+a about above after all also an and any are as at be been being both but by can could did do does
+doing during each etc for from further had has have having he her here his how i if in into is it its
+just may me more most must my no nor not of on once only or other our out over own per same she should
+so some such than that the their them then there these they this those through to too under until up
+us very via was we were what when where which while who whom why will with within without would you
+your yours ability able across along good great strong excellent plus preferred required requirements
+responsibilities responsible role candidate candidates job looking including include includes using
+use used work working team teams year years experience experienced knowledge skills skill understanding
+familiarity familiar etc new well least minimum ideal ideally join help build building nice know offer offers
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords or tokens lacking letters (5+, 2021)."""
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        token = token.strip(".-/")
+        if token and token not in STOPWORDS and any(c.isalpha() for c in token):
+            tokens.append(token)
+    return tokens
+
+
+def _terms(tokens: List[str]) -> List[str]:
+    """Unigrams plus adjacent bigrams."""
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def _collapse_terms(terms: List[str]) -> List[str]:
+    """
+    Drop terms whose words appear in a longer term of the list ("python"
+    next to "python programming"), keeping rank order. Whole words only,
+    so "java" survives next to "javascript".
+    """
+    padded = [f" {term} " for term in terms]
+    return [
+        term for term, own in zip(terms, padded)
+        if not any(own in other and own != other for other in padded)
+    ]
+
+
+def split_segments(text: str) -> List[Tuple[str, List[str]]]:
+    """Sentence/bullet segments with their terms; segments without tokens are skipped."""
+    segments = []
+    for raw in _SEGMENT_RE.split(text):
+        segment = raw.strip(" \t-*•")
+        tokens = tokenize(segment)
+        if tokens:
+            segments.append((segment, _terms(tokens)))
+            if len(segments) >= MAX_SEGMENTS:
+                break
+    return segments
+
+
+def _count_matrix(segments: List[Tuple[str, List[str]]], vocab: Dict[str, int]) -> np.ndarray:
+    import numpy as np
+
+    matrix = np.zeros((len(segments), len(vocab)), dtype=np.float32)
+    for row, (_, terms) in enumerate(segments):
+        columns = [vocab[term] for term in terms if term in vocab]
+        if columns:
+            np.add.at(matrix[row], columns, 1.0)
+    return matrix
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    import numpy as np
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+def score_keywords(
+    resume_text: str,
+    job_description: str,
+    jd_segments: Optional[List[Tuple[str, List[str]]]] = None
+) -> Dict[str, Any]:
+    """
+    Local TF-IDF keyword match between a resume and a job description.
+
+    IDF is computed over the sentence/bullet segments of both texts, so terms
+    that recur everywhere weigh less than specific ones. The top JD terms by
+    TF-IDF weight form the keyword set.
+    Args:
+        resume_text: Extracted resume text
+        job_description: Job description text (ignored when `jd_segments` is given)
+        jd_segments: Pre-split JD segments from the parsed JD cache
+    Returns:
+        Dict with `skills_match` (0-100, weighted share of JD keywords found
+        in the resume), `similarity` (cosine of the two documents),
+        `matched_keywords`, `missing_keywords`, `highlight_pairs` and
+        `elapsed_ms`
+    """
+    import numpy as np
+
+    started = time.perf_counter()
+    if jd_segments is None:
+        jd_segments = split_segments(job_description)
+    resume_segments = split_segments(resume_text)
+
+    vocab: Dict[str, int] = {}
+    for _, terms in jd_segments:
+        for term in terms:
+            vocab.setdefault(term, len(vocab))
+
+    if not vocab or not resume_segments:
+        return {
+            "skills_match": 0,
+            "similarity": 0.0,
+            "matched_keywords": [],
+            "missing_keywords": [term for term in list(vocab)[:12] if " " not in term],
+            "highlight_pairs": [],
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+
+    terms_list = list(vocab)
+    jd_counts = _count_matrix(jd_segments, vocab)
+    resume_counts = _count_matrix(resume_segments, vocab)
+
+    n_segments = len(jd_segments) + len(resume_segments)
+    df = (jd_counts > 0).sum(axis=0) + (resume_counts > 0).sum(axis=0)
+    idf = np.log((1 + n_segments) / (1 + df)) + 1.0
+
+    jd_tf = jd_counts.sum(axis=0)
+    resume_tf = resume_counts.sum(axis=0)
+    jd_weights = np.where(jd_tf > 0, 1.0 + np.log(np.maximum(jd_tf, 1.0)), 0.0) * idf
+    resume_weights = np.where(resume_tf > 0, 1.0 + np.log(np.maximum(resume_tf, 1.0)), 0.0) * idf
+
+    # Bigrams only count as keywords when they recur; single mentions are usually prose.
+    is_bigram = np.array([" " in term for term in terms_list])
+    candidate = ~is_bigram | (jd_tf > 1)
+    ranked = [i for i in np.argsort(-jd_weights, kind="stable") if candidate[i]][:KEYWORD_TOP_TERMS]
+    top = np.array(ranked, dtype=np.int64)
+    found = resume_tf[top] > 0
+    skills_match = round(float(jd_weights[top][found].sum() / jd_weights[top].sum()) * 100)
+
+    denominator = np.linalg.norm(jd_weights) * np.linalg.norm(resume_weights)
+    similarity = float(jd_weights @ resume_weights / denominator) if denominator else 0.0
+
+    jd_vectors = _normalize_rows(jd_counts * idf)
+    resume_vectors = _normalize_rows(resume_counts * idf)
+    similarities = jd_vectors @ resume_vectors.T
+    best_match = similarities.argmax(axis=1)
+    best_score = similarities[np.arange(len(jd_segments)), best_match]
+
+    highlight_pairs = []
+    seen_excerpts = set()
+    for jd_index in np.argsort(-best_score, kind="stable"):
+        if best_score[jd_index] < MIN_PAIR_SIMILARITY or len(highlight_pairs) >= 6:
+            break
+        # Single-word JD lines ("Python") make trivial pairs.
+        if len(jd_segments[jd_index][1]) < 3:
+            continue
+        excerpt = resume_segments[best_match[jd_index]][0]
+        if excerpt in seen_excerpts:
+            continue
+        seen_excerpts.add(excerpt)
+        highlight_pairs.append({
+            "jd_phrase": jd_segments[jd_index][0][:200],
+            "resume_excerpt": excerpt[:200]
+        })
+
+    matched = [terms_list[i] for i, hit in zip(top, found) if hit]
+    missing = _collapse_terms([terms_list[i] for i, hit in zip(top, found) if not hit])
+
+    return {
+        "skills_match": skills_match,
+        "similarity": round(similarity, 3),
+        "matched_keywords": matched[:20],
+        "missing_keywords": missing[:12],
+        "highlight_pairs": highlight_pairs,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+def find_divergent(keyword_match: Dict[str, Any], provider_results: List[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Providers whose skills sub-score differs from the local keyword estimate
+    by more than KEYWORD_DIVERGENCE_THRESHOLD points.
+    """
+    divergent = []
+    for name, result in provider_results:
+        skills = (result.get("breakdown") or {}).get("skills")
+        if not isinstance(skills, (int, float)):
+            continue
+        gap = abs(skills - keyword_match["skills_match"])
+        if gap > KEYWORD_DIVERGENCE_THRESHOLD:
+            divergent.append({"provider": name, "skills": skills, "gap": round(gap)})
+    return divergent
@@ -0,0 +1,182 @@
+import re
+import time
+import uuid
+import threading
+import contextvars
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Optional, List, Dict, Any, Tuple
+
+from utils.serialization import dumps_str
+
+# Latency buckets in seconds, from cache hits to slow LLM calls.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+SIZE_BUCKETS = (16 * 1024, 64 * 1024, 256 * 1024, 1024 * 1024, 4 * 1024 * 1024, 16 * 1024 * 1024, 64 * 1024 * 1024)
+# Client-supplied X-Request-ID values are echoed in headers and logs only if they look like this.
+_REQUEST_ID_RE = re.compile(r"[A-Za-z0-9._-]{1,64}")
+
+
+def _label_key(names: Tuple[str, ...], labels: Dict[str, str]) -> Tuple[str, ...]:
+    return tuple(str(labels.get(name, "")) for name in names)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_bound(bound: float) -> str:
+    return str(int(bound)) if float(bound).is_integer() else f"{bound:g}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    """Monotonic counter with optional labels, rendered in Prometheus text format."""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = _label_key(self.labels, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, key)} {value:g}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels, rendered in Prometheus text format."""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count], sum
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = _label_key(self.labels, labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._series.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    @contextmanager
+    def time(self, **labels: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total) in sorted(self._series.items()):
+                cumulative = 0
+                bounds = [_format_bound(bound) for bound in self.buckets] + ["+Inf"]
+                for bound, count in zip(bounds, counts):
+                    cumulative += count
+                    le = 'le="' + bound + '"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {total[0]:g}")
+                lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """All engine metrics; `render()` produces the /metrics body."""
+
+    def __init__(self):
+        self._metrics: List[Any] = []
+
+    def counter(self, name: str, help_text: str, labels: Tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, help_text, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help_text, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+UPLOAD_BYTES = metrics.histogram("resumescore_upload_bytes", "Size of uploaded resumes", buckets=SIZE_BUCKETS)
+EXTRACTION_SECONDS = metrics.histogram("resumescore_extraction_seconds", "Text extraction time per parser", ("parser",))
+URL_FETCH_SECONDS = metrics.histogram("resumescore_url_fetch_seconds", "External page download and parse time per domain", ("domain", "outcome"))
+LLM_SECONDS = metrics.histogram("resumescore_llm_seconds", "Provider call latency", ("provider", "outcome"))
+LLM_ERRORS = metrics.counter("resumescore_llm_errors_total", "Failed provider calls", ("provider", "outcome"))
+DB_WRITE_SECONDS = metrics.histogram("resumescore_db_write_seconds", "Write-behind batch insert time")
+STAGE_SECONDS = metrics.histogram("resumescore_stage_seconds", "Analysis pipeline stage time", ("stage",))
+REQUEST_SECONDS = metrics.histogram("resumescore_request_seconds", "HTTP request latency", ("method", "path", "status"))
+
+
+class RequestContext:
+    """Per-request id and Server-Timing entries, carried in a context variable."""
+
+    def __init__(self, request_id: Optional[str] = None):
+        if not request_id or not _REQUEST_ID_RE.fullmatch(request_id):
+            request_id = uuid.uuid4().hex[:16]
+        self.request_id = request_id
+        self.timings: Dict[str, float] = {}
+
+    def record(self, name: str, ms: float) -> None:
+        self.timings[name] = round(self.timings.get(name, 0.0) + ms, 1)
+
+    def server_timing(self) -> str:
+        return ", ".join(f"{name};dur={ms:g}" for name, ms in self.timings.items())
+
+
+_request: contextvars.ContextVar[Optional[RequestContext]] = contextvars.ContextVar("resumescore_request", default=None)
+
+
+def start_request(request_id: Optional[str] = None) -> Tuple[RequestContext, contextvars.Token]:
+    context = RequestContext(request_id)
+    return context, _request.set(context)
+
+
+def end_request(token: contextvars.Token) -> None:
+    _request.reset(token)
+
+
+def current_request_id() -> Optional[str]:
+    context = _request.get()
+    return context.request_id if context is not None else None
+
+
+def record_timing(name: str, seconds: float) -> None:
+    """Add `seconds` to the current request's Server-Timing entry `name` (no-op outside a request)."""
+    context = _request.get()
+    if context is not None:
+        context.record(name, seconds * 1000)
+
+
+def log_event(event: str, **fields: Any) -> None:
+    """One JSON log line, tagged with the current request id."""
+    record = {"ts": round(time.time(), 3), "event": event, "request_id": current_request_id(), **fields}
+    print(dumps_str(record, default=str))
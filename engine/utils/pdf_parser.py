@@ -1,63 +1,265 @@
-
 import io
-from typing import Optional
+import os
+import time
+import asyncio
+import hashlib
+import zipfile
+from contextlib import contextmanager
+from typing import Optional, Dict, Any
+from utils.extraction_pool import extraction_executor
+from utils.text_cache import text_cache
+from utils.uploads import DocumentSource
+from utils.metrics import EXTRACTION_SECONDS, record_timing
+
+PDF_PAGES_PER_CHUNK = int(os.environ.get("PDF_PAGES_PER_CHUNK", 8))
+PDF_PARALLEL_MIN_PAGES = int(os.environ.get("PDF_PARALLEL_MIN_PAGES", 12))
+EXTRACTION_TEXT_BUDGET = int(os.environ.get("EXTRACTION_TEXT_BUDGET", 100000))
+
+# Bump when extraction output changes so cached text is not reused.
+EXTRACTOR_VERSION = f"2:{EXTRACTION_TEXT_BUDGET}"
+
+PDF_MAGIC = b"%PDF-"
+ZIP_MAGIC = b"PK\x03\x04"
+OLE2_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+
+
+@contextmanager
+def open_source(source: DocumentSource):
+    """Binary stream over in-memory bytes or a file on disk, without copying the file."""
+    if isinstance(source, (bytes, bytearray)):
+        yield io.BytesIO(source)
+    else:
+        with open(source, "rb") as f:
+            yield f
+
+
+def _parser_input(source: DocumentSource):
+    """pypdf, pdfplumber and python-docx take a path as readily as a stream."""
+    return io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+
 
-async def extract_text_from_pdf(content: bytes, filename: str = "") -> Optional[str]:
+def detect_format(source: DocumentSource) -> str:
     """
-    Extract text from PDF or DOCX file bytes.   
+    Detect the document type from its magic bytes.
     Args:
-        content: Raw file bytes
-        filename: Original filename (used to determine file type)    
+        source: File bytes or the path of the stored upload
+    Returns:
+        "pdf", "docx", "doc" (legacy Word, unsupported) or "unknown"
+    """
+    with open_source(source) as stream:
+        head = stream.read(1024)
+    # Some generators emit junk before the header; readers accept it within 1 KB.
+    if PDF_MAGIC in head:
+        return "pdf"
+    if head.startswith(ZIP_MAGIC):
+        try:
+            with open_source(source) as stream, zipfile.ZipFile(stream) as archive:
+                if "word/document.xml" in archive.namelist():
+                    return "docx"
+        except zipfile.BadZipFile:
+            pass
+        return "unknown"
+    if head.startswith(OLE2_MAGIC):
+        return "doc"
+    return "unknown"
+
+
+async def extract_text_cached(
+    content: DocumentSource,
+    filename: str = "",
+    content_hash: Optional[str] = None
+) -> Optional[str]:
+    """
+    Extract text through the persistent extracted-text cache.
+    Args:
+        content: Raw file bytes or the path of a stored upload
+        filename: Original filename (only used for logging)
+        content_hash: SHA-256 of the document; required when `content` is a path
     Returns:
         Extracted text or None if extraction fails
     """
-    text = None
-       
-    if filename.lower().endswith(('.docx', '.doc')):
-        text = await _extract_from_docx(content)
-        if text:
-            return text
-    text = await _extract_from_pdf_pypdf(content)
-    if text:
-        return text
-    text = await _extract_from_pdf_pdfplumber(content)
+    content_hash = content_hash or hashlib.sha256(content).hexdigest()
+    try:
+        cached = await asyncio.to_thread(text_cache.get, content_hash, EXTRACTOR_VERSION)
+    except Exception as e:
+        print(f"Text cache lookup failed: {e}")
+        cached = None
+    if cached is not None:
+        return cached
+
+    started = time.perf_counter()
+    text = await extract_text_from_pdf(content, filename)
+    record_timing("parse", time.perf_counter() - started)
     if text:
-        return text
-    if not filename.lower().endswith(('.docx', '.doc')):
-        text = await _extract_from_docx(content)    
+        try:
+            await asyncio.to_thread(text_cache.put, content_hash, EXTRACTOR_VERSION, text)
+        except Exception as e:
+            print(f"Text cache store failed: {e}")
     return text
-async def _extract_from_pdf_pypdf(content: bytes) -> Optional[str]:
-    """Extract text using pypdf (fast, works for most PDFs)."""
+
+
+async def extract_text_from_pdf(content: DocumentSource, filename: str = "") -> Optional[str]:
+    """
+    Extract text from PDF or DOCX file bytes.
+    The format is sniffed from the content and the matching parser runs in
+    the extraction process pool. Large PDFs are split into page ranges that
+    are parsed in parallel until EXTRACTION_TEXT_BUDGET characters are read.
+    Uploads stored on disk are passed to the workers as a path, so each
+    page-range job opens the file instead of receiving a copy of the bytes.
+    Args:
+        content: Raw file bytes or the path of a stored upload
+        filename: Original filename (only used for logging)
+    Returns:
+        Extracted text or None if extraction fails
+    Raises:
+        ExtractionTimeout: Parsing exceeded the per-job timeout
+    """
+    file_format = detect_format(content)
+
+    if file_format == "docx":
+        with EXTRACTION_SECONDS.time(parser="docx"):
+            return await extraction_executor.run(_extract_from_docx, content)
+    if file_format != "pdf":
+        print(f"Unsupported document format for {filename or 'upload'}: {file_format}")
+        return None
+
+    started = time.perf_counter()
+    first = await extraction_executor.run(extract_pdf_pages, content, 0, None, EXTRACTION_TEXT_BUDGET)
+    if first is None:
+        with EXTRACTION_SECONDS.time(parser="pdfplumber"):
+            return await extraction_executor.run(_extract_from_pdf_pdfplumber, content)
+
+    text_parts = list(first["pages"])
+    chars = first["chars"]
+    page_count = first["page_count"]
+    ranges = [
+        (page, min(page + PDF_PAGES_PER_CHUNK, page_count))
+        for page in range(first["next_page"], page_count, PDF_PAGES_PER_CHUNK)
+    ]
+    wave_size = max(1, extraction_executor.max_workers)
+
+    while ranges and chars < EXTRACTION_TEXT_BUDGET:
+        wave, ranges = ranges[:wave_size], ranges[wave_size:]
+        remaining = EXTRACTION_TEXT_BUDGET - chars
+        results = await asyncio.gather(*[
+            extraction_executor.run(extract_pdf_pages, content, start, end, remaining)
+            for start, end in wave
+        ])
+        for result in results:
+            if result is None:
+                continue
+            text_parts.extend(result["pages"])
+            chars += result["chars"]
+            if chars >= EXTRACTION_TEXT_BUDGET:
+                break
+    EXTRACTION_SECONDS.observe(time.perf_counter() - started, parser="pypdf")
+
+    if text_parts:
+        return "\n\n".join(text_parts)
+    return None
+
+
+def extract_pdf_pages(
+    content: DocumentSource,
+    start: int = 0,
+    end: Optional[int] = None,
+    budget: int = EXTRACTION_TEXT_BUDGET
+) -> Optional[Dict[str, Any]]:
+    """
+    Extract pages [start, end) with pypdf, falling back to pdfplumber only
+    for pages where pypdf returns empty or garbled text. Runs in a worker.
+    Args:
+        content: Raw PDF bytes or a file path
+        start: First page index
+        end: Page index to stop at; None means the whole document when it is
+            small, otherwise the first PDF_PAGES_PER_CHUNK pages
+        budget: Stop once this many characters have been extracted
+    Returns:
+        {"pages", "chars", "page_count", "next_page"} or None if pypdf cannot open the file
+    """
     try:
         import pypdf
-        
-        pdf_file = io.BytesIO(content)
-        reader = pypdf.PdfReader(pdf_file)
-        
-        text_parts = []
-        for page in reader.pages:
-            page_text = page.extract_text()
-            if page_text and page_text.strip():
-                text_parts.append(page_text)
-        
-        if text_parts:
-            return "\n\n".join(text_parts)
-        return None
-        
+        reader = pypdf.PdfReader(_parser_input(content))
+        page_count = len(reader.pages)
     except ImportError:
         print("pypdf not installed, skipping...")
         return None
     except Exception as e:
-        print(f"pypdf extraction failed: {e}")
+        print(f"pypdf could not open document: {e}")
         return None
 
+    if end is None:
+        end = page_count if page_count <= PDF_PARALLEL_MIN_PAGES else start + PDF_PAGES_PER_CHUNK
+    end = min(end, page_count)
+
+    plumber_pdf = None
+    text_parts = []
+    chars = 0
+    page_index = start
+    try:
+        while page_index < end and chars < budget:
+            try:
+                page_text = reader.pages[page_index].extract_text()
+            except Exception as e:
+                print(f"pypdf failed on page {page_index + 1}: {e}")
+                page_text = ""
+
+            if _looks_garbled(page_text):
+                if plumber_pdf is None:
+                    plumber_pdf = _open_pdfplumber(content)
+                if plumber_pdf is not None:
+                    try:
+                        page_text = plumber_pdf.pages[page_index].extract_text() or page_text
+                    except Exception as e:
+                        print(f"pdfplumber failed on page {page_index + 1}: {e}")
+
+            if page_text and page_text.strip():
+                text_parts.append(page_text)
+                chars += len(page_text)
+            page_index += 1
+    finally:
+        if plumber_pdf is not None:
+            plumber_pdf.close()
+
+    return {
+        "pages": text_parts,
+        "chars": chars,
+        "page_count": page_count,
+        "next_page": page_index if chars < budget else page_count,
+    }
+
+
+def _looks_garbled(text: Optional[str]) -> bool:
+    """
+    Heuristic for pages pypdf could not decode: empty text, unmapped
+    `(cid:N)` glyphs, replacement characters or mostly non-word symbols.
+    """
+    if not text or not text.strip():
+        return True
+    if text.count("(cid:") >= 3 or text.count("\ufffd") >= 3:
+        return True
+    visible = [ch for ch in text if not ch.isspace()]
+    readable = sum(1 for ch in visible if ch.isalnum() or ch in ".,;:!?'\"()-/&@+#%$")
+    return readable / len(visible) < 0.6
+
+
+def _open_pdfplumber(content: DocumentSource):
+    try:
+        import pdfplumber
+        return pdfplumber.open(_parser_input(content))
+    except ImportError:
+        print("pdfplumber not installed, skipping...")
+    except Exception as e:
+        print(f"pdfplumber could not open document: {e}")
+    return None
+
 
-async def _extract_from_pdf_pdfplumber(content: bytes) -> Optional[str]:
-    """Extract text using pdfplumber (better for complex layouts)."""
+def _extract_from_pdf_pdfplumber(content: DocumentSource) -> Optional[str]:
+    """Whole-document pdfplumber extraction, used when pypdf cannot open the file."""
     try:
         import pdfplumber
         
-        pdf_file = io.BytesIO(content)
+        pdf_file = _parser_input(content)
         text_parts = []
         
         with pdfplumber.open(pdf_file) as pdf:
@@ -78,12 +280,12 @@ async def _extract_from_pdf_pdfplumber(content: bytes) -> Optional[str]:
         return None
 
 
-async def _extract_from_docx(content: bytes) -> Optional[str]:
+def _extract_from_docx(content: DocumentSource) -> Optional[str]:
     """Extract text from DOCX files."""
     try:
         from docx import Document
         
-        docx_file = io.BytesIO(content)
+        docx_file = _parser_input(content)
         doc = Document(docx_file)
         
         text_parts = []
@@ -0,0 +1,117 @@
+import os
+import gzip
+from typing import Any, Optional, List
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+
+from utils.serialization import dumps
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Preferred encodings, in order; `off` or empty disables compression.
+RESPONSE_COMPRESSION = os.environ.get("RESPONSE_COMPRESSION", "br,gzip")
+RESPONSE_COMPRESSION_MIN_BYTES = int(os.environ.get("RESPONSE_COMPRESSION_MIN_BYTES", 2048))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+
+COMPRESSIBLE_TYPES = ("application/json", "text/plain", "text/html")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered through utils.serialization (orjson when installed)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _enabled_encodings() -> List[str]:
+    if RESPONSE_COMPRESSION.strip().lower() in ("", "off", "none", "0", "false"):
+        return []
+    encodings = []
+    for name in RESPONSE_COMPRESSION.lower().split(","):
+        name = name.strip()
+        if name == "br" and brotli is None:
+            continue
+        if name in ("br", "gzip"):
+            encodings.append(name)
+    return encodings
+
+
+def choose_encoding(accept_encoding: str, encodings: List[str]) -> Optional[str]:
+    """First of `encodings` the client accepts (entries with q=0 count as refused)."""
+    accepted = set()
+    for entry in accept_encoding.lower().split(","):
+        name, _, params = entry.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name.strip())
+    for name in encodings:
+        if name in accepted or "*" in accepted:
+            return name
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    """
+    gzip/brotli for single-chunk responses of at least `minimum_size` bytes.
+    Streaming responses (SSE) and already encoded bodies pass through untouched,
+    so events are never held back waiting for a compression buffer.
+    """
+
+    def __init__(self, app, minimum_size: int = RESPONSE_COMPRESSION_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = _enabled_encodings()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.encodings:
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+
+        async def send_compressed(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            pending, start = start, None
+            headers = MutableHeaders(raw=pending["headers"])
+            body = message.get("body", b"")
+            media_type = headers.get("content-type", "").split(";")[0].strip()
+            if (
+                message.get("more_body", False)
+                or "content-encoding" in headers
+                or len(body) < self.minimum_size
+                or media_type not in COMPRESSIBLE_TYPES
+            ):
+                await send(pending)
+                await send(message)
+                return
+
+            compressed = compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            await send(pending)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
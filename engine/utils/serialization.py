@@ -0,0 +1,42 @@
+import json
+from typing import Any, Callable, Dict, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # stdlib fallback, same compact output
+    orjson = None
+
+JSON_BACKEND = "orjson" if orjson is not None else "json"
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+
+
+def dumps(value: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """Compact UTF-8 JSON, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(value, default=default, option=_ORJSON_OPTIONS)
+    return json.dumps(value, default=default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps_str(value: Any, default: Optional[Callable[[Any], Any]] = None) -> str:
+    """`dumps` as text; used as SQLAlchemy's JSON column serializer and for log lines."""
+    return dumps(value, default).decode("utf-8")
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def with_fields(body: bytes, fields: Dict[str, Any]) -> bytes:
+    """
+    Append top-level `fields` to an already serialized JSON object without
+    decoding it again. The keys must not be present in `body`.
+    """
+    if not fields:
+        return body
+    extra = dumps(fields)
+    if body.rstrip() == b"{}":
+        return extra
+    return body.rstrip()[:-1] + b"," + extra[1:]
@@ -0,0 +1,179 @@
+import os
+import time
+import sqlite3
+import threading
+from typing import Optional, Dict, Any
+
+# `shared` keeps the analysis and URL caches (and batch progress) in one SQLite
+# file that every worker process reads, instead of a copy per process.
+# serve.py switches to it when it starts more than one worker.
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "memory").lower()
+SHARED_CACHE_PATH = os.environ.get("SHARED_CACHE_PATH", "./shared_cache.db")
+SHARED_CACHE_MAX_BYTES = int(os.environ.get("SHARED_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+# Namespaces that are never evicted or counted against the cap (batch progress of running batches).
+PINNED_NAMESPACES = ("batch",)
+# Puts between re-reading the stored total, which other processes change too.
+_RESYNC_EVERY = 64
+# Eviction frees space down to this share of the cap, so a full cache does not evict on every put.
+_LOW_WATER = 0.9
+
+
+class SharedStore:
+    """
+    Byte values in a local SQLite file, shared by the worker processes of one host.
+
+    Values live in namespaces ("analysis", "url", "batch") with an optional
+    expiry. WAL mode lets readers in other processes run alongside a writer.
+    Once the stored bytes exceed `max_bytes` the least recently used entries
+    are evicted, except in `pinned` namespaces, which only expire. The total
+    is tracked per put and re-read every _RESYNC_EVERY puts, so a put does not
+    scan the table. Every method is blocking; call them off the event loop.
+    """
+
+    def __init__(
+        self,
+        path: str = SHARED_CACHE_PATH,
+        max_bytes: int = SHARED_CACHE_MAX_BYTES,
+        pinned: tuple = PINNED_NAMESPACES
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.pinned = pinned
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._total: Optional[int] = None
+        self._puts = 0
+        self.evictions = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        # A connection opened before a fork must not be used by the child.
+        if self._conn is not None and self._pid != os.getpid():
+            self._conn = None
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS shared_cache ("
+                " namespace TEXT NOT NULL,"
+                " cache_key TEXT NOT NULL,"
+                " data BLOB NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " expires_at REAL,"
+                " last_used REAL NOT NULL,"
+                " PRIMARY KEY (namespace, cache_key))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_shared_cache_last_used ON shared_cache (last_used)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_shared_cache_expires_at ON shared_cache (expires_at)")
+            conn.commit()
+            self._conn = conn
+            self._pid = os.getpid()
+            self._total = None
+        return self._conn
+
+    def _not_pinned(self) -> str:
+        return f"namespace NOT IN ({', '.join('?' * len(self.pinned))})"
+
+    def _evictable_total(self, conn: sqlite3.Connection) -> int:
+        """Bytes stored outside the pinned namespaces, after dropping expired entries."""
+        conn.execute("DELETE FROM shared_cache WHERE expires_at < ?", (time.time(),))
+        return conn.execute(
+            f"SELECT COALESCE(SUM(size), 0) FROM shared_cache WHERE {self._not_pinned()}",
+            self.pinned
+        ).fetchone()[0]
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Drop least recently used unpinned entries until the total is under the low-water mark."""
+        total = self._evictable_total(conn)
+        target = int(self.max_bytes * _LOW_WATER) if total > self.max_bytes else total
+        while total > target:
+            rows = conn.execute(
+                f"SELECT namespace, cache_key, size FROM shared_cache WHERE {self._not_pinned()}"
+                " ORDER BY last_used ASC LIMIT 256",
+                self.pinned
+            ).fetchall()
+            if not rows:
+                break
+            for namespace, key, size in rows:
+                if total <= target:
+                    break
+                conn.execute("DELETE FROM shared_cache WHERE namespace = ? AND cache_key = ?", (namespace, key))
+                total -= size
+                self.evictions += 1
+        self._total = total
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        """Stored bytes, or None when missing or expired."""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT data, expires_at FROM shared_cache WHERE namespace = ? AND cache_key = ?",
+                (namespace, key)
+            ).fetchone()
+            if row is None:
+                return None
+            data, expires_at = row
+            if expires_at is not None and expires_at < now:
+                conn.execute("DELETE FROM shared_cache WHERE namespace = ? AND cache_key = ?", (namespace, key))
+                conn.commit()
+                return None
+            conn.execute(
+                "UPDATE shared_cache SET last_used = ? WHERE namespace = ? AND cache_key = ?",
+                (now, namespace, key)
+            )
+            conn.commit()
+        return bytes(data)
+
+    def put(self, namespace: str, key: str, data: bytes, ttl: Optional[float] = None) -> None:
+        """Store `data`, evicting least recently used entries over the size cap."""
+        if len(data) > self.max_bytes:
+            return
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+        with self._lock:
+            conn = self._connect()
+            replaced = conn.execute(
+                "SELECT size FROM shared_cache WHERE namespace = ? AND cache_key = ?", (namespace, key)
+            ).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO shared_cache (namespace, cache_key, data, size, expires_at, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (namespace, key, data, len(data), expires_at, now)
+            )
+            if namespace not in self.pinned:
+                self._puts += 1
+                if self._total is None or self._puts % _RESYNC_EVERY == 0:
+                    self._total = self._evictable_total(conn)
+                else:
+                    self._total += len(data) - (replaced[0] if replaced else 0)
+                if self._total > self.max_bytes:
+                    self._evict(conn)
+            conn.commit()
+
+    def clear(self, namespace: str) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM shared_cache WHERE namespace = ?", (namespace,))
+            conn.commit()
+            self._total = None
+
+    def stats(self, namespace: str) -> Dict[str, Any]:
+        with self._lock:
+            conn = self._connect()
+            entries, total = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM shared_cache WHERE namespace = ?",
+                (namespace,)
+            ).fetchone()
+            return {"entries": entries, "bytes": total, "max_bytes": self.max_bytes, "path": self.path}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+            self._total = None
+
+
+shared_store = SharedStore() if CACHE_BACKEND == "shared" else None
@@ -0,0 +1,140 @@
+import os
+import time
+import zlib
+import sqlite3
+import threading
+from typing import Optional, Dict, Any
+
+TEXT_CACHE_PATH = os.environ.get("TEXT_CACHE_PATH", "./text_cache.db")
+TEXT_CACHE_MAX_BYTES = int(os.environ.get("TEXT_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+# Puts between re-reading the stored total (other worker processes write to the same file).
+_RESYNC_EVERY = 64
+# Eviction frees space down to this share of the cap, so a full cache does not evict on every put.
+_LOW_WATER = 0.9
+
+
+class TextCache:
+    """
+    SQLite-backed store of extracted document text.
+
+    Entries are keyed by the upload's SHA-256 plus the extractor version, so a
+    parser upgrade simply stops matching old rows (they age out through
+    eviction). Text is zlib-compressed; once the stored bytes exceed
+    `max_bytes` the least recently used entries are evicted. The total is
+    tracked per put and re-read every _RESYNC_EVERY puts.
+    """
+
+    def __init__(self, path: str = TEXT_CACHE_PATH, max_bytes: int = TEXT_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._total: Optional[int] = None
+        self._puts = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS extracted_text ("
+                " cache_key TEXT PRIMARY KEY,"
+                " data BLOB NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_extracted_text_last_used ON extracted_text (last_used)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def make_key(content_hash: str, extractor_version: str) -> str:
+        return f"{content_hash}:{extractor_version}"
+
+    def get(self, content_hash: str, extractor_version: str) -> Optional[str]:
+        """Return cached text for the upload or None."""
+        key = self.make_key(content_hash, extractor_version)
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT data FROM extracted_text WHERE cache_key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute("UPDATE extracted_text SET last_used = ? WHERE cache_key = ?", (time.time(), key))
+            conn.commit()
+            self.hits += 1
+        return zlib.decompress(row[0]).decode("utf-8")
+
+    def put(self, content_hash: str, extractor_version: str, text: str) -> None:
+        """Store extracted text, evicting least recently used entries over the size cap."""
+        data = zlib.compress(text.encode("utf-8"), 6)
+        if len(data) > self.max_bytes:
+            return
+        key = self.make_key(content_hash, extractor_version)
+        with self._lock:
+            conn = self._connect()
+            replaced = conn.execute("SELECT size FROM extracted_text WHERE cache_key = ?", (key,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO extracted_text (cache_key, data, size, last_used) VALUES (?, ?, ?, ?)",
+                (key, data, len(data), time.time())
+            )
+            self._puts += 1
+            if self._total is None or self._puts % _RESYNC_EVERY == 0:
+                self._total = self._stored_bytes(conn)
+            else:
+                self._total += len(data) - (replaced[0] if replaced else 0)
+            if self._total > self.max_bytes:
+                self._evict(conn)
+            conn.commit()
+
+    @staticmethod
+    def _stored_bytes(conn: sqlite3.Connection) -> int:
+        return conn.execute("SELECT COALESCE(SUM(size), 0) FROM extracted_text").fetchone()[0]
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Drop least recently used entries until the total is under the low-water mark."""
+        total = self._stored_bytes(conn)
+        target = int(self.max_bytes * _LOW_WATER) if total > self.max_bytes else total
+        while total > target:
+            rows = conn.execute(
+                "SELECT cache_key, size FROM extracted_text ORDER BY last_used ASC LIMIT 256"
+            ).fetchall()
+            if not rows:
+                break
+            for old_key, size in rows:
+                if total <= target:
+                    break
+                conn.execute("DELETE FROM extracted_text WHERE cache_key = ?", (old_key,))
+                total -= size
+                self.evictions += 1
+        self._total = total
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            conn = self._connect()
+            entries, total = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM extracted_text"
+            ).fetchone()
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": entries,
+                "bytes": total,
+                "max_bytes": self.max_bytes,
+                "policy": "lru",
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._total = None
+
+
+text_cache = TextCache()
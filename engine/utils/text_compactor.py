@@ -0,0 +1,237 @@
+import os
+import re
+import math
+from collections import Counter
+from typing import Optional, List, Dict, Any, Tuple
+
+from utils.pdf_parser import clean_extracted_text
+
+PROMPT_TOKEN_BUDGET = int(os.environ.get("PROMPT_TOKEN_BUDGET", 6000))
+
+# Share of the budget each input may claim; unused share goes to the resume.
+JD_BUDGET_SHARE = 0.30
+EXTERNAL_BUDGET_SHARE = 0.15
+
+# Lower number = kept longer when the resume has to be cut.
+SECTION_PRIORITIES = {
+    "skills": 0, "technical skills": 0, "experience": 0, "work experience": 0,
+    "professional experience": 0, "employment": 0, "projects": 1, "summary": 1,
+    "profile": 1, "objective": 2, "education": 1, "certifications": 1,
+    "achievements": 2, "awards": 2, "publications": 2, "volunteering": 3,
+    "languages": 3, "interests": 4, "hobbies": 4, "references": 4,
+}
+DEFAULT_SECTION_PRIORITY = 2
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+# At most three digits, so a bare year ("2020") on its own line is kept.
+_PAGE_NUMBER_RE = re.compile(r"^(page\s*)?\d{1,3}(\s*(of|/)\s*\d{1,3})?$|^[-–]\s*\d{1,3}\s*[-–]$", re.I)
+_PAGE_REF_RE = re.compile(r"page\s*\d+(\s*(of|/)\s*\d+)?", re.I)
+_YEAR_RE = re.compile(r"\b(19|20)\d\d\b")
+
+_ENCODING = None
+_ENCODING_LOADED = False
+
+
+def _encoding():
+    """tiktoken's cl100k_base, loaded on first use (loading may fetch the BPE file), or None."""
+    global _ENCODING, _ENCODING_LOADED
+    if not _ENCODING_LOADED:
+        try:
+            import tiktoken
+            _ENCODING = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _ENCODING = None
+        _ENCODING_LOADED = True
+    return _ENCODING
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count prompt tokens locally. Uses tiktoken when installed, otherwise a
+    word/punctuation estimate that tracks BPE counts closely enough for budgeting.
+    """
+    if not text:
+        return 0
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return sum(max(1, math.ceil(len(token) / 4)) for token in _TOKEN_RE.findall(text))
+
+
+def provider_token_budget(provider: str) -> int:
+    """Budget from PROMPT_TOKEN_BUDGET_<PROVIDER> (e.g. _GEMINI, _OLLAMA, _OPENAI) or the default."""
+    key = re.sub(r"[^A-Z0-9]", "", provider.split("/")[0].upper())
+    return int(os.environ.get(f"PROMPT_TOKEN_BUDGET_{key}", PROMPT_TOKEN_BUDGET))
+
+
+def _line_signature(line: str) -> str:
+    # Only page references vary between copies of a running header; other
+    # digits (dates, versions) are part of the line.
+    return _PAGE_REF_RE.sub("page #", line.strip().lower())
+
+
+def _running_lines(text: str) -> set:
+    """
+    Signatures of running headers/footers: lines found among the first or
+    last two lines of at least three page blocks (pages are joined by blank
+    lines during extraction). Lines with a year are never running lines:
+    they are the date ranges that open each role.
+    """
+    blocks = [block.strip().split("\n") for block in re.split(r"\n\s*\n", text) if block.strip()]
+    if len(blocks) < 3:
+        return set()
+    counts = Counter()
+    for lines in blocks:
+        edges = {
+            _line_signature(line) for line in lines[:2] + lines[-2:]
+            if 0 < len(line.strip()) <= 80 and not _YEAR_RE.search(line)
+        }
+        counts.update(edges)
+    return {signature for signature, count in counts.items() if count >= 3}
+
+
+def normalize_text(text: str) -> str:
+    """
+    Whitespace and boilerplate normalization: collapse blank runs and spaces,
+    drop page-number lines, repeated page headers/footers and consecutive
+    duplicate lines.
+    """
+    text = clean_extracted_text(text)
+    running = _running_lines(text)
+
+    kept: List[str] = []
+    seen_running = set()
+    for line in text.split("\n"):
+        stripped = line.strip()
+        if _PAGE_NUMBER_RE.match(stripped):
+            continue
+        signature = _line_signature(stripped)
+        if signature in running:
+            if signature in seen_running:
+                continue
+            seen_running.add(signature)
+        if kept and stripped and stripped == kept[-1].strip():
+            continue
+        kept.append(line.rstrip())
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(kept)).strip()
+
+
+def _section_title(line: str) -> Optional[str]:
+    stripped = line.strip().rstrip(":").strip()
+    if not stripped or len(stripped) > 40:
+        return None
+    lowered = stripped.lower()
+    if lowered in SECTION_PRIORITIES:
+        return lowered
+    if stripped.isupper() and len(stripped.split()) <= 4:
+        return lowered
+    return None
+
+
+def split_sections(text: str) -> List[Tuple[str, str]]:
+    """Split resume text into (title, body) sections on heading-like lines."""
+    sections: List[Tuple[str, List[str]]] = [("header", [])]
+    for line in text.split("\n"):
+        title = _section_title(line)
+        if title is not None:
+            sections.append((title, [line]))
+        else:
+            sections[-1][1].append(line)
+    return [(title, "\n".join(lines)) for title, lines in sections if "\n".join(lines).strip()]
+
+
+def _truncate_to_tokens(text: str, budget: int) -> str:
+    if budget <= 0:
+        return ""
+    encoding = _encoding()
+    if encoding is not None:
+        # One encode: keep the first `budget` tokens.
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= budget:
+            return text
+        cut = encoding.decode(tokens[:budget])
+    else:
+        total = count_tokens(text)
+        if total <= budget:
+            return text
+        # Cut at the text's own chars-per-token ratio; one check usually confirms it fits.
+        end = len(text) * budget // total
+        while end > 0 and count_tokens(text[:end]) > budget:
+            end = int(end * 0.95)
+        cut = text[:end]
+    # Back off to a line or word boundary.
+    boundary = max(cut.rfind("\n"), cut.rfind(" "))
+    if boundary > len(cut) * 0.8:
+        cut = cut[:boundary]
+    return cut.rstrip() + " …"
+
+
+def fit_sections(text: str, budget: int, tokens: Optional[int] = None) -> str:
+    """
+    Section-aware truncation: drop the lowest-priority sections first, then
+    shorten the remaining ones proportionally, keeping their opening lines.
+    `tokens` is the caller's count of `text`, when it already has one.
+    """
+    if (count_tokens(text) if tokens is None else tokens) <= budget:
+        return text
+    sections = split_sections(text)
+    priority = lambda title: 0 if title == "header" else SECTION_PRIORITIES.get(title, DEFAULT_SECTION_PRIORITY)
+    kept = [(title, body, count_tokens(body)) for title, body in sections]
+
+    while len(kept) > 1 and sum(tokens for _, _, tokens in kept) > budget:
+        worst = max(priority(title) for title, _, _ in kept)
+        if worst <= 1:
+            break
+        drop_index = max(i for i, (title, _, _) in enumerate(kept) if priority(title) == worst)
+        kept.pop(drop_index)
+
+    total = sum(tokens for _, _, tokens in kept)
+    if total <= budget:
+        return "\n".join(body for _, body, _ in kept)
+    ratio = budget / total
+    return "\n".join(_truncate_to_tokens(body, int(tokens * ratio)) for _, body, tokens in kept).strip()
+
+
+def compact_inputs(
+    resume_text: str,
+    job_description: str,
+    external_content: str,
+    budget: int,
+    parsed_jd: Optional[Dict[str, Any]] = None
+) -> Tuple[Dict[str, str], Dict[str, Any]]:
+    """
+    Normalize and fit resume, JD and external content into `budget` tokens.
+    Args:
+        parsed_jd: Cached JD preprocessing; its `compacted_text` and token
+            counts are reused instead of normalizing the JD again
+    Returns:
+        ({"resume_text", "job_description", "external_content"}, report) where
+        the report has original/compacted token counts and tokens saved
+    """
+    if parsed_jd is not None:
+        jd = parsed_jd["compacted_text"]
+        jd_original_tokens = parsed_jd["original_tokens"]
+    else:
+        jd = normalize_text(job_description)
+        jd_original_tokens = count_tokens(job_description)
+    original_tokens = count_tokens(resume_text) + jd_original_tokens + count_tokens(external_content)
+
+    resume = normalize_text(resume_text)
+    external = normalize_text(external_content) if external_content else ""
+    resume_tokens = count_tokens(resume)
+
+    jd = _truncate_to_tokens(jd, max(int(budget * JD_BUDGET_SHARE), budget - resume_tokens - count_tokens(external)))
+    external = _truncate_to_tokens(external, int(budget * EXTERNAL_BUDGET_SHARE))
+    fixed_tokens = count_tokens(jd) + count_tokens(external)
+    fitted = fit_sections(resume, budget - fixed_tokens, resume_tokens)
+    if fitted is not resume:
+        resume, resume_tokens = fitted, count_tokens(fitted)
+
+    compacted_tokens = resume_tokens + fixed_tokens
+    report = {
+        "budget": budget,
+        "original_tokens": original_tokens,
+        "compacted_tokens": compacted_tokens,
+        "tokens_saved": original_tokens - compacted_tokens,
+    }
+    return {"resume_text": resume, "job_description": jd, "external_content": external}, report
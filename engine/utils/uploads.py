@@ -0,0 +1,125 @@
+import os
+import hashlib
+import tempfile
+from typing import Optional, Union
+from fastapi import HTTPException, UploadFile
+
+UPLOAD_MAX_BYTES = int(os.environ.get("UPLOAD_MAX_BYTES", 10 * 1024 * 1024))
+UPLOAD_SPOOL_BYTES = int(os.environ.get("UPLOAD_SPOOL_BYTES", 1024 * 1024))
+UPLOAD_CHUNK_SIZE = 64 * 1024
+UPLOAD_TMP_DIR = os.environ.get("UPLOAD_TMP_DIR") or None
+
+# What the extraction workers read: bytes for small in-memory uploads, a file path otherwise.
+DocumentSource = Union[bytes, str]
+
+
+class StoredUpload:
+    """
+    One uploaded document, hashed as it was written.
+
+    Uploads up to UPLOAD_SPOOL_BYTES stay in memory; larger ones are moved to
+    a named temp file, so extraction workers open the file themselves instead
+    of receiving a pickled copy of the bytes for every job. `close()` removes
+    the temp file.
+    """
+
+    def __init__(self, filename: str, spool_bytes: int = UPLOAD_SPOOL_BYTES):
+        self.filename = filename
+        self.spool_bytes = spool_bytes
+        self.size = 0
+        self.path: Optional[str] = None
+        self._hasher = hashlib.sha256()
+        self._buffer: Optional[bytearray] = bytearray()
+        self._data: Optional[bytes] = None
+        self._file = None
+        self.sha256 = ""
+
+    @classmethod
+    def from_bytes(cls, filename: str, content: bytes) -> "StoredUpload":
+        """Wrap bytes already in memory (zip members, queued jobs) without copying them."""
+        upload = cls(filename)
+        upload._buffer = None
+        upload._data = content
+        upload.size = len(content)
+        upload.sha256 = hashlib.sha256(content).hexdigest()
+        return upload
+
+    def write(self, chunk: bytes) -> None:
+        self._hasher.update(chunk)
+        self.size += len(chunk)
+        if self._file is None and self.size > self.spool_bytes:
+            self._file = tempfile.NamedTemporaryFile(prefix="resume-", dir=UPLOAD_TMP_DIR, delete=False)
+            self.path = self._file.name
+            self._file.write(self._buffer)
+            self._buffer = None
+        if self._file is not None:
+            self._file.write(chunk)
+        else:
+            self._buffer.extend(chunk)
+
+    def finish(self) -> None:
+        self.sha256 = self._hasher.hexdigest()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        elif self._buffer is not None:
+            self._data = bytes(self._buffer)
+            self._buffer = None
+
+    def source(self) -> DocumentSource:
+        return self.path if self.path is not None else self._data
+
+    def head(self, size: int = 1024) -> bytes:
+        if self.path is None:
+            return self._data[:size]
+        with open(self.path, "rb") as f:
+            return f.read(size)
+
+    def read(self) -> bytes:
+        """Whole document in memory; only for callers that must store the bytes."""
+        if self.path is None:
+            return self._data
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+        self._data = None
+
+
+async def ingest_upload(
+    upload: UploadFile,
+    max_bytes: int = UPLOAD_MAX_BYTES,
+    spool_bytes: int = UPLOAD_SPOOL_BYTES
+) -> StoredUpload:
+    """
+    Copy an UploadFile in chunks into a StoredUpload, hashing as it goes.
+    Args:
+        spool_bytes: Size above which the copy moves to a temp file (0 = always on disk)
+    Raises:
+        HTTPException: 413 as soon as more than `max_bytes` have been read
+    """
+    stored = StoredUpload(upload.filename or "", spool_bytes)
+    try:
+        while True:
+            chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            if stored.size + len(chunk) > max_bytes:
+                raise HTTPException(status_code=413, detail=f"Upload exceeds {max_bytes} bytes")
+            stored.write(chunk)
+        stored.finish()
+        return stored
+    except BaseException:
+        stored.close()
+        raise
+    finally:
+        await upload.close()
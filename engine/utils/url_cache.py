@@ -0,0 +1,187 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any
+
+from utils.serialization import dumps, loads
+from utils.shared_store import SharedStore, shared_store
+
+URL_CACHE_TTL = int(os.environ.get("URL_CACHE_TTL", 24 * 3600))
+URL_CACHE_NEGATIVE_TTL = int(os.environ.get("URL_CACHE_NEGATIVE_TTL", 15 * 60))
+URL_CACHE_MAX_ENTRIES = int(os.environ.get("URL_CACHE_MAX_ENTRIES", 1024))
+
+
+def _to_datetime(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc)
+
+
+def _to_timestamp(value: Optional[datetime]) -> float:
+    if value is None:
+        return 0.0
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class UrlCache:
+    """
+    Parsed external-page text per URL, in a memory LRU (or the shared store
+    with CACHE_BACKEND=shared) backed by the `external_pages` table.
+
+    Entries are dicts with `status` ("ok" or "negative"), `content`, the
+    response `etag`/`last_modified` validators and `expires_at` (epoch
+    seconds). Expired "ok" entries are kept so the fetcher can revalidate
+    them with a conditional request instead of downloading the page again.
+    """
+
+    def __init__(self, max_entries: int = URL_CACHE_MAX_ENTRIES, shared: Optional[SharedStore] = shared_store):
+        self.max_entries = max_entries
+        self.shared = shared
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {
+            "fresh_hits": 0,
+            "negative_hits": 0,
+            "revalidated": 0,
+            "refetched": 0,
+            "misses": 0,
+            "negative_stored": 0,
+            "stale_served": 0,
+        }
+
+    def count(self, counter: str) -> None:
+        with self._lock:
+            self.counters[counter] += 1
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Entry for `url` (fresh or expired) from memory or the shared store, then the database. Blocking."""
+        if self.shared is not None:
+            data = self.shared.get("url", url)
+            if data is not None:
+                return loads(data)
+        else:
+            with self._lock:
+                entry = self._entries.get(url)
+                if entry is not None:
+                    self._entries.move_to_end(url)
+                    return entry
+        entry = self._load(url)
+        if entry is not None:
+            self._remember(url, entry)
+        return entry
+
+    def put(
+        self,
+        url: str,
+        status: str,
+        content: str = "",
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Store a fetch outcome. Blocking (writes the database row)."""
+        now = time.time()
+        ttl = URL_CACHE_TTL if status == "ok" else URL_CACHE_NEGATIVE_TTL
+        entry = {
+            "status": status,
+            "content": content,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": now,
+            "expires_at": now + ttl,
+        }
+        if status == "negative":
+            self.count("negative_stored")
+        self._remember(url, entry)
+        self._save(url, entry)
+        return entry
+
+    def touch(self, url: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Extend an entry confirmed by a 304 response. Blocking."""
+        refreshed = {**entry, "expires_at": time.time() + URL_CACHE_TTL}
+        self._remember(url, refreshed)
+        self._save(url, refreshed)
+        return refreshed
+
+    def _remember(self, url: str, entry: Dict[str, Any]) -> None:
+        if self.max_entries <= 0:
+            return
+        if self.shared is not None:
+            # No expiry here: stale entries are still needed for revalidation.
+            self.shared.put("url", url, dumps(entry))
+            return
+        with self._lock:
+            self._entries[url] = entry
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _load(self, url: str) -> Optional[Dict[str, Any]]:
+        from database import SessionLocal
+        from models import ExternalPage
+
+        db = SessionLocal()
+        try:
+            row = db.get(ExternalPage, url)
+            if row is None:
+                return None
+            return {
+                "status": row.status,
+                "content": row.content or "",
+                "etag": row.etag,
+                "last_modified": row.last_modified,
+                "fetched_at": _to_timestamp(row.fetched_at),
+                "expires_at": _to_timestamp(row.expires_at),
+            }
+        except Exception as e:
+            print(f"❌ URL cache lookup error: {e}")
+            return None
+        finally:
+            db.close()
+
+    def _save(self, url: str, entry: Dict[str, Any]) -> None:
+        from database import SessionLocal
+        from models import ExternalPage
+
+        db = SessionLocal()
+        try:
+            db.merge(ExternalPage(
+                url=url,
+                status=entry["status"],
+                content=entry["content"],
+                etag=entry["etag"],
+                last_modified=entry["last_modified"],
+                fetched_at=_to_datetime(entry["fetched_at"]),
+                expires_at=_to_datetime(entry["expires_at"])
+            ))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"❌ URL cache write error: {e}")
+        finally:
+            db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters and policy. Blocking with a shared store."""
+        with self._lock:
+            lookups = self.counters["fresh_hits"] + self.counters["negative_hits"] + \
+                self.counters["revalidated"] + self.counters["refetched"] + self.counters["misses"]
+            saved = self.counters["fresh_hits"] + self.counters["negative_hits"] + self.counters["revalidated"]
+            stats = {
+                **self.counters,
+                "hit_rate": round(saved / lookups, 4) if lookups else 0.0,
+                "size": len(self._entries),
+                "policy": {
+                    "memory": "shared" if self.shared is not None else "lru",
+                    "max_entries": self.max_entries,
+                    "ttl_seconds": URL_CACHE_TTL,
+                    "negative_ttl_seconds": URL_CACHE_NEGATIVE_TTL,
+                },
+            }
+        if self.shared is not None:
+            stats["shared"] = self.shared.stats("url")
+        return stats
+
+
+url_cache = UrlCache()
@@ -1,8 +1,68 @@
+from __future__ import annotations
+
 import re
+import time
 import asyncio
-from typing import List, Optional
-import aiohttp
-from bs4 import BeautifulSoup
+from typing import List, Optional, Dict, Any, Tuple, TYPE_CHECKING
+import os
+from urllib.parse import urlparse
+
+from utils.url_cache import url_cache
+from utils.http_client import http_client
+from utils.metrics import URL_FETCH_SECONDS
+
+# aiohttp and BeautifulSoup are imported on first use to keep startup fast.
+if TYPE_CHECKING:
+    import aiohttp
+    from bs4 import BeautifulSoup, SoupStrainer
+
+EXTERNAL_FETCH_MAX_BYTES = int(os.environ.get("EXTERNAL_FETCH_MAX_BYTES", 1024 * 1024))
+FETCH_CHUNK_SIZE = 64 * 1024
+
+_html_parser: Optional[str] = None
+
+
+def html_parser() -> str:
+    """`lxml` when it is installed, else the stdlib parser. Probed on first parse, not at import."""
+    global _html_parser
+    if _html_parser is None:
+        try:
+            import lxml  # noqa: F401
+            _html_parser = "lxml"
+        except ImportError:
+            _html_parser = "html.parser"
+    return _html_parser
+
+
+_SKIPPED_TAGS = ['script', 'style', 'nav', 'footer', 'header',
+                 'aside', 'form', 'button', 'iframe', 'noscript']
+# Skipped containers are kept as whole subtrees so their own <p>/<li> are dropped with them.
+_GENERIC_TAGS = ['main', 'article', 'h1', 'h2', 'h3', 'p', 'li'] + _SKIPPED_TAGS
+
+RELEVANT_DOMAINS = [
+    'github.com',
+    'gitlab.com',
+    'bitbucket.org',
+    'linkedin.com',
+    'stackoverflow.com',
+    'medium.com',
+    'dev.to',
+    'hashnode.com',
+    'behance.net',
+    'dribbble.com',
+    'kaggle.com',
+    'huggingface.co',
+]
+
+
+def metric_domain(url: str) -> str:
+    """Metric label for a URL: a known profile site, else "other" (hosts come from user uploads)."""
+    host = (urlparse(url).hostname or "").lower()
+    for domain in RELEVANT_DOMAINS:
+        if host == domain or host.endswith("." + domain):
+            return domain
+    return "other"
+
 
 def extract_urls(text: str) -> List[str]:
     """
@@ -16,21 +76,6 @@ def extract_urls(text: str) -> List[str]:
     url_pattern = r'https?://[^\s<>"{}|\\^`\[\]()\']*[^\s<>"{}|\\^`\[\]()\',.]'
     matches = re.findall(url_pattern, text, re.IGNORECASE)    
 
-    relevant_domains = [
-        'github.com',
-        'gitlab.com',
-        'bitbucket.org',
-        'linkedin.com',
-        'stackoverflow.com',
-        'medium.com',
-        'dev.to',
-        'hashnode.com',
-        'behance.net',
-        'dribbble.com',
-        'kaggle.com',
-        'huggingface.co',
-    ]
-
     personal_tlds = ['.io', '.dev', '.me', '.tech', '.app', '.xyz', '.site', '.co']    
     relevant_urls = []
     seen = set()    
@@ -42,7 +87,7 @@ def extract_urls(text: str) -> List[str]:
             continue
         seen.add(url_lower)        
         is_relevant = False                        
-        for domain in relevant_domains:
+        for domain in RELEVANT_DOMAINS:
             if domain in url_lower:
                 is_relevant = True
                 break
@@ -56,66 +101,180 @@ def extract_urls(text: str) -> List[str]:
         if len(relevant_urls) >= 5:
             break   
     return relevant_urls
-async def fetch_single_url(
+def _format_content(url: str, content: str) -> Optional[str]:
+    return f"\n--- Content from {url} ---\n{content}" if content else None
+
+
+async def _download(
     session: aiohttp.ClientSession,
     url: str,
-    timeout: int = 10
-) -> Optional[str]:
+    timeout: int,
+    cached: Optional[Dict[str, Any]]
+) -> Tuple[str, str, Optional[str], Optional[str]]:
     """
-    Fetch and extract meaningful text from a single URL.    
-    Args:
-        session: aiohttp session to use
-        url: URL to fetch
-        timeout: Request timeout in seconds   
+    Fetch and parse one URL, conditionally when `cached` has validators.
     Returns:
-        Extracted text content or None if failed
+        (outcome, parsed text, etag, last_modified) where outcome is "ok",
+        "not_modified", "negative" (4xx, non-HTML or timeout) or "error"
     """
+    headers = {
+        "User-Agent": "Mozilla/5.0 (compatible; ResumeScoreBot/1.0; +https://resumescore.app)",
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+        "Accept-Language": "en-US,en;q=0.5",
+    }
+    if cached is not None and cached["status"] == "ok":
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+    import aiohttp
+
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (compatible; ResumeScoreBot/1.0; +https://resumescore.app)",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-            "Accept-Language": "en-US,en;q=0.5",
-        }        
         async with session.get(
             url,
             timeout=aiohttp.ClientTimeout(total=timeout),
             headers=headers,
             allow_redirects=True,
             ssl=False
-        ) as response:            
+        ) as response:
+            if response.status == 304:
+                return "not_modified", "", None, None
             if response.status != 200:
                 print(f"URL {url} returned status {response.status}")
-                return None            
+                outcome = "negative" if 400 <= response.status < 500 else "error"
+                return outcome, "", None, None
             content_type = response.headers.get('Content-Type', '')
             if 'html' not in content_type.lower() and 'text' not in content_type.lower():
                 print(f"URL {url} is not HTML/text: {content_type}")
-                return None            
-            html = await response.text()                       
-            soup = BeautifulSoup(html, 'html.parser')            
-            for tag in soup(['script', 'style', 'nav', 'footer', 'header', 
-                           'aside', 'form', 'button', 'iframe', 'noscript']):
-                tag.decompose()
-            main_content = None            
-            if 'github.com' in url:
-                main_content = _parse_github(soup, url)    
-            elif 'linkedin.com' in url:
-                main_content = _parse_linkedin(soup)            
-            if not main_content:
-                main_content = _parse_generic(soup)            
-            if main_content:
-                content = main_content[:3000]
-                return f"\n--- Content from {url} ---\n{content}"            
-            return None            
+                return "negative", "", None, None
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            html = await _read_capped(response, url)
     except asyncio.TimeoutError:
         print(f"Timeout fetching {url}")
-        return None
+        return "negative", "", None, None
     except Exception as e:
         print(f"Failed to fetch {url}: {type(e).__name__}: {e}")
+        return "error", "", None, None
+
+    main_content = await asyncio.to_thread(parse_html, html, url)
+    return "ok", (main_content or "")[:3000], etag, last_modified
+
+
+async def _read_capped(response: aiohttp.ClientResponse, url: str) -> str:
+    """Stream the body, stopping after EXTERNAL_FETCH_MAX_BYTES."""
+    chunks = []
+    size = 0
+    async for chunk in response.content.iter_chunked(FETCH_CHUNK_SIZE):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= EXTERNAL_FETCH_MAX_BYTES:
+            print(f"URL {url} truncated at {EXTERNAL_FETCH_MAX_BYTES} bytes")
+            break
+    body = b"".join(chunks)[:EXTERNAL_FETCH_MAX_BYTES]
+    return body.decode(response.charset or "utf-8", errors="replace")
+
+
+def _is_github_profile(url: str) -> bool:
+    return '/github.com/' in url and url.count('/') <= 4
+
+
+def _has_class(*names: str):
+    """class_ matcher for SoupStrainer; at parse time the value is the raw class string."""
+    wanted = set(names)
+    return lambda value: value is not None and bool(wanted & set(value.split()))
+
+
+def _strainer_for(url: str) -> Optional[SoupStrainer]:
+    """Only build the parts of the tree the site parser reads."""
+    from bs4 import SoupStrainer
+
+    if 'github.com' in url:
+        if _is_github_profile(url):
+            return SoupStrainer(['div', 'span'], class_=_has_class('p-note', 'repo', 'Counter'))
+        return SoupStrainer(['article', 'p', 'a'], class_=_has_class('markdown-body', 'f4', 'topic-tag'))
+    if 'linkedin.com' in url:
+        return SoupStrainer(['main', 'body'])
+    return SoupStrainer(_GENERIC_TAGS)
+
+
+def _soup(html: str, strainer: Optional[SoupStrainer]) -> BeautifulSoup:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, html_parser(), parse_only=strainer)
+    for tag in soup(_SKIPPED_TAGS):
+        tag.decompose()
+    return soup
+
+
+def parse_html(html: str, url: str) -> Optional[str]:
+    """
+    Extract profile text from a page. CPU-bound; run it off the event loop.
+    Uses lxml when installed and a per-site SoupStrainer, so only the
+    elements the site parser reads are built into the tree.
+    """
+    main_content = None
+    if 'github.com' in url:
+        main_content = _parse_github(_soup(html, _strainer_for(url)), url)
+    elif 'linkedin.com' in url:
+        main_content = _parse_linkedin(_soup(html, _strainer_for(url)))
+    if not main_content:
+        from bs4 import SoupStrainer
+        main_content = _parse_generic(_soup(html, SoupStrainer(_GENERIC_TAGS)))
+    return main_content
+
+async def fetch_single_url(
+    session: aiohttp.ClientSession,
+    url: str,
+    timeout: int = 10
+) -> Optional[str]:
+    """
+    Fetch and extract meaningful text from a single URL, through the URL cache.
+    Fresh entries are served without a request; expired ones are revalidated
+    with If-None-Match/If-Modified-Since. 4xx responses and timeouts are
+    negatively cached for URL_CACHE_NEGATIVE_TTL; on other errors a stale
+    entry is served if there is one.
+    Args:
+        session: aiohttp session to use
+        url: URL to fetch
+        timeout: Request timeout in seconds
+    Returns:
+        Extracted text content or None if failed
+    """
+    cached = await asyncio.to_thread(url_cache.get, url)
+    if cached is not None and cached["expires_at"] > time.time():
+        if cached["status"] == "negative":
+            url_cache.count("negative_hits")
+            return None
+        url_cache.count("fresh_hits")
+        return _format_content(url, cached["content"])
+
+    started = time.perf_counter()
+    outcome, content, etag, last_modified = await _download(session, url, timeout, cached)
+    URL_FETCH_SECONDS.observe(time.perf_counter() - started, domain=metric_domain(url), outcome=outcome)
+
+    if outcome == "not_modified" and cached is not None:
+        url_cache.count("revalidated")
+        cached = await asyncio.to_thread(url_cache.touch, url, cached)
+        return _format_content(url, cached["content"])
+
+    url_cache.count("refetched" if cached is not None else "misses")
+    if outcome == "ok":
+        await asyncio.to_thread(url_cache.put, url, "ok", content, etag, last_modified)
+        return _format_content(url, content)
+    if outcome == "negative":
+        await asyncio.to_thread(url_cache.put, url, "negative")
         return None
+    if cached is not None and cached["status"] == "ok":
+        url_cache.count("stale_served")
+        return _format_content(url, cached["content"])
+    return None
+
+
 def _parse_github(soup: BeautifulSoup, url: str) -> Optional[str]:
     """Parse GitHub profile or repository page."""
     content_parts = []    
-    if '/github.com/' in url and url.count('/') <= 4:
+    if _is_github_profile(url):
         # Bio
         bio = soup.find('div', class_='p-note')
         if bio:
@@ -160,7 +319,8 @@ def _parse_generic(soup: BeautifulSoup) -> Optional[str]:
         soup.find('main') or 
         soup.find('article') or 
         soup.find('div', class_=re.compile(r'content|main|body', re.I)) or
-        soup.find('body')
+        soup.find('body') or
+        soup
     )   
     if main:
         for tag in main.find_all(['h1', 'h2', 'h3', 'p', 'li']):
@@ -169,21 +329,21 @@ def _parse_generic(soup: BeautifulSoup) -> Optional[str]:
                 content_parts.append(text)
     
     return '\n'.join(content_parts[:50]) if content_parts else None
-async def fetch_external_content(urls: List[str]) -> str:
+async def fetch_external_content(urls: List[str], timeout: int = 10) -> str:
     """
-    Fetch content from multiple URLs in parallel.    
+    Fetch content from multiple URLs in parallel over the shared HTTP session.
     Args:
-        urls: List of URLs to fetch    
+        urls: List of URLs to fetch
+        timeout: Per-URL timeout budget in seconds
     Returns:
         Combined text content from all successful fetches
     """
     if not urls:
-        return ""    
-    print(f"Fetching content from {len(urls)} URLs...")    
-    connector = aiohttp.TCPConnector(limit=5, limit_per_host=2)   
-    async with aiohttp.ClientSession(connector=connector) as session:
-        tasks = [fetch_single_url(session, url) for url in urls]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        return ""
+    print(f"Fetching content from {len(urls)} URLs...")
+    session = await http_client.session()
+    tasks = [fetch_single_url(session, url, timeout) for url in urls]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
     valid_results = []
     for i, result in enumerate(results):
         if isinstance(result, Exception):